@@ -0,0 +1,109 @@
+"""
+Проигрыватель размеченных интервалов строки.
+Окна строки загружаются один раз в непрерывные массивы (K, W), кадр - замена данных постоянных элементов
+графика (SpectrometerPlotWidget.plot_positive_interval / plot_negative) без пересоздания элементов.
+"""
+import math
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+from src.labeling import LabeledWindows
+from src.plotting import SpectrometerPlotWidget
+
+# Наибольшая частота отрисовки кадров: при меньшей задержке кадры пропускаются, скорость сохраняется
+MAX_FPS: int = 60
+
+
+class AnimationPlayer(QObject):
+    """
+    Анимация окон LabeledWindows: положительные окна, затем отрицательные (порядок LabeledWindows).
+    Поддерживает паузу, перемотку к любому кадру (seek) и изменение задержки между кадрами на ходу.
+    """
+    # номер текущего кадра, всего кадров
+    frame_changed = Signal(int, int)
+    # воспроизведение дошло до последнего кадра
+    finished = Signal()
+
+    def __init__(self, plot_widget: SpectrometerPlotWidget, delay: int = 200, parent=None):
+        super().__init__(parent)
+        self.plot_widget = plot_widget
+        self.delay = delay
+        self.frame = 0
+        self.gamma = np.empty((0, 0))
+        self.line_index = np.empty((0, 0), dtype=np.int8)
+        self.label = np.empty(0, dtype=bool)
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._advance)
+        # Кадров анимации на одно срабатывание таймера
+        self._step = 1
+
+    def __len__(self) -> int:
+        return len(self.label)
+
+    def load(self, windows: LabeledWindows) -> None:
+        """Загружает окна строки (массивы копируются один раз в непрерывную память) и показывает первый кадр"""
+        self.stop()
+        self.gamma = np.ascontiguousarray(windows.gamma, dtype=np.float64)
+        self.line_index = np.ascontiguousarray(windows.line_index)
+        self.label = np.ascontiguousarray(windows.label, dtype=bool)
+        if len(self):
+            self.seek(0)
+
+    def is_playing(self) -> bool:
+        return self._timer.isActive()
+
+    def play(self) -> None:
+        if not len(self):
+            return
+        # Воспроизведение с последнего кадра начинается заново
+        if self.frame >= len(self) - 1:
+            self.seek(0)
+        self._start_timer()
+
+    def pause(self) -> None:
+        self._timer.stop()
+
+    def toggle(self) -> None:
+        if self.is_playing():
+            self.pause()
+        else:
+            self.play()
+
+    def stop(self) -> None:
+        self._timer.stop()
+        self.frame = 0
+
+    def set_delay(self, delay: int) -> None:
+        """Задержка между кадрами [мс], применяется сразу, в том числе во время воспроизведения"""
+        self.delay = max(int(delay), 0)
+        if self.is_playing():
+            self._start_timer()
+
+    def seek(self, frame: int) -> None:
+        """Показывает кадр frame (перемотка), воспроизведение продолжается с него"""
+        if not len(self):
+            return
+        self.frame = min(max(int(frame), 0), len(self) - 1)
+        self._render()
+
+    def _start_timer(self) -> None:
+        # Таймер не чаще MAX_FPS, при меньшей задержке за срабатывание проходится несколько кадров
+        min_interval = 1000 / MAX_FPS
+        self._step = max(math.ceil(min_interval / self.delay), 1) if self.delay > 0 else math.ceil(min_interval)
+        self._timer.start(round(max(self.delay * self._step, min_interval)))
+
+    def _advance(self) -> None:
+        if self.frame >= len(self) - 1:
+            self._timer.stop()
+            self.finished.emit()
+            return
+        self.seek(self.frame + self._step)
+
+    def _render(self) -> None:
+        gamma, line_index = self.gamma[self.frame], self.line_index[self.frame]
+        if self.label[self.frame]:
+            self.plot_widget.plot_positive_interval(gamma, line_index)
+        else:
+            self.plot_widget.plot_negative(gamma, line_index)
+        self.frame_changed.emit(self.frame, len(self))
@@ -0,0 +1,70 @@
+from typing import Any, Callable
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class BackgroundTaskSignals(QObject):
+    """Сигналы фоновой задачи (QRunnable не является QObject и не может испускать сигналы сам)"""
+    # результат функции
+    finished = Signal(object)
+    # текст ошибки
+    failed = Signal(str)
+
+
+class BackgroundTask(QRunnable):
+    """Вызов функции в рабочем потоке, результат или ошибка передаются сигналами"""
+
+    def __init__(self, function: Callable[[], Any]):
+        super().__init__()
+        self.function = function
+        self.signals = BackgroundTaskSignals()
+
+    def run(self) -> None:
+        try:
+            result = self.function()
+        except Exception as e:
+            print(f"Error in background task: {e}")
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+
+class BackgroundRunner(QObject):
+    """
+    Выполнение долгих операций над строкой (поиск линий, разметка, производные данные) вне потока интерфейса.
+    Обработчики результата и ошибки вызываются в потоке BackgroundRunner (потоке интерфейса).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        # Обработчики результата и ошибки выполняемых задач
+        self._callbacks: dict[BackgroundTaskSignals, tuple[Callable | None, Callable | None]] = {}
+
+    def start(
+            self,
+            function: Callable[[], Any],
+            on_finished: Callable[[Any], None] | None = None,
+            on_failed: Callable[[str], None] | None = None
+    ) -> None:
+        task = BackgroundTask(function)
+        # Сигналы задачи приходят из рабочего потока и обрабатываются в потоке BackgroundRunner
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        self._callbacks[task.signals] = (on_finished, on_failed)
+        self.thread_pool.start(task)
+
+    def _on_finished(self, result: Any) -> None:
+        on_finished, _ = self._callbacks.pop(self.sender())
+        if on_finished is not None:
+            on_finished(result)
+
+    def _on_failed(self, message: str) -> None:
+        _, on_failed = self._callbacks.pop(self.sender())
+        if on_failed is not None:
+            on_failed(message)
+
+    def is_busy(self) -> bool:
+        return bool(self._callbacks)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        return self.thread_pool.waitForDone(msecs)
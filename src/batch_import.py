@@ -0,0 +1,151 @@
+"""
+Пакетный импорт директории файлов спектрометра в строки базы.
+Запуск без GUI: python -m src.batch_import <директория> [--pattern REGEX] [--workers N]
+"""
+import os
+import re
+import shutil
+import argparse
+import multiprocessing
+import pandas as pd
+from typing import Callable
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.constant import COLUMN_2_WITH_SUB, COLUMN_3_WITHOUT_SUB
+from src.database import Database
+from src.spectrum_parser import parse_spectrum_file
+from src.storage import get_storage
+
+# Имя файла: <общая часть>_<тип данных>[.<расширение>], например sample1_with.txt и sample1_without.txt
+DEFAULT_PATTERN = r"^(?P<key>.+)_(?P<kind>with|without)(\.[^.]*)?$"
+# Соответствие типа данных из имени файла полю строки
+DEFAULT_KINDS = {
+    "with": COLUMN_2_WITH_SUB,
+    "without": COLUMN_3_WITHOUT_SUB,
+}
+
+
+@dataclass
+class NamingRule:
+    """
+    Правило сопоставления файлов строкам.
+    pattern - регулярное выражение с группами key (файлы с одинаковым key попадают в одну строку)
+    и kind (тип данных, по kinds определяет поле строки). Сравнение без учета регистра.
+    """
+    pattern: str = DEFAULT_PATTERN
+    kinds: dict[str, str] = field(default_factory=lambda: dict(DEFAULT_KINDS))
+
+    def match(self, file_name: str) -> tuple[str, str] | None:
+        """Возвращает (key, поле строки) для имени файла или None, если файл не подходит под правило"""
+        match = re.match(self.pattern, file_name, flags=re.IGNORECASE)
+        if match is None:
+            return None
+        db_field = self.kinds.get(match.group("kind").lower())
+        if db_field is None:
+            return None
+        return match.group("key"), db_field
+
+
+@dataclass
+class ImportGroup:
+    """Файлы одной будущей строки: поле строки -> путь к файлу"""
+    key: str
+    files: dict[str, str] = field(default_factory=dict)
+
+
+def match_files(directory: str, rule: NamingRule | None = None) -> list[ImportGroup]:
+    """Группирует файлы директории по строкам согласно правилу, группы упорядочены по key"""
+    rule = rule or NamingRule()
+    groups: dict[str, ImportGroup] = {}
+    for file_name in sorted(os.listdir(directory)):
+        file_path = os.path.join(directory, file_name)
+        if not os.path.isfile(file_path):
+            continue
+        matched = rule.match(file_name)
+        if matched is None:
+            continue
+        key, db_field = matched
+        group = groups.setdefault(key, ImportGroup(key=key))
+        if db_field in group.files:
+            raise ValueError(f"Several files for '{key}' match field {db_field}")
+        group.files[db_field] = file_path
+    return [groups[key] for key in sorted(groups)]
+
+
+def _parse_to_staging(file_path: str, staging_dir: str, storage_format: str) -> str:
+    """
+    Выполняется в процессе пула: разбирает файл спектрометра (как при загрузке в ячейку таблицы)
+    и записывает его в формате хранения базы во временную директорию строки. Возвращает имя файла.
+    """
+    frequency, gamma = parse_spectrum_file(file_path)
+    df = pd.DataFrame({
+        'frequency': frequency,
+        'gamma': gamma
+    })
+    file_name = os.path.basename(file_path)
+    get_storage(storage_format).write(staging_dir, file_name, df)
+    return file_name
+
+
+def import_directory(
+        db: Database,
+        directory: str,
+        rule: NamingRule | None = None,
+        workers: int | None = None,
+        progress_callback: Callable[[int, int], None] | None = None
+) -> list[int]:
+    """
+    Импортирует файлы директории в новые строки в конце таблицы.
+    Файлы разбираются в пуле процессов и сразу записываются во временные директории строк,
+    затем все строки добавляются в базу одной транзакцией. Возвращает id добавленных строк.
+    progress_callback(обработано файлов, всего файлов) вызывается после разбора каждого файла.
+    """
+    groups = match_files(directory, rule)
+    if not groups:
+        return []
+    staging = [(db.create_staging_directory(), group) for group in groups]
+    total = sum(len(group.files) for group in groups)
+    try:
+        rows: list[tuple[str, dict[str, str]]] = [(staging_dir, {}) for staging_dir, _ in staging]
+        # spawn: процессы пула не наследуют состояние GUI и потоков родительского процесса
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(_parse_to_staging, file_path, staging_dir, db.storage.name): (index, db_field)
+                for index, (staging_dir, group) in enumerate(staging)
+                for db_field, file_path in group.files.items()
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                index, db_field = futures[future]
+                rows[index][1][db_field] = future.result()
+                if progress_callback is not None:
+                    progress_callback(done, total)
+        return db.add_rows_from_staging(rows)
+    finally:
+        # Удаляем временные директории, не перенесенные в базу (при ошибке)
+        for staging_dir, _ in staging:
+            if os.path.exists(staging_dir):
+                shutil.rmtree(staging_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный импорт директории файлов спектрометра в базу")
+    parser.add_argument("directory", help="директория с файлами спектрометра")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help="регулярное выражение с группами key и kind")
+    parser.add_argument("--workers", type=int, default=None, help="количество процессов разбора")
+    args = parser.parse_args()
+
+    db = Database()
+    row_ids = import_directory(
+        db,
+        args.directory,
+        rule=NamingRule(pattern=args.pattern),
+        workers=args.workers,
+        progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True)
+    )
+    print(f"\nДобавлено строк: {len(row_ids)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Скорость вставки строк в Database: фиксация каждой операции с журналом отката (как было раньше)
+и пакетная вставка в одной транзакции с журналом WAL.
+Запуск: python -m src.bench_database [количество строк]
+"""
+import os
+import sys
+import time
+import tempfile
+
+from src.database import Database
+
+# Количество вставляемых строк по умолчанию
+DEFAULT_ROWS = 10_000
+
+
+def _run_in_temp_dir(function) -> float:
+    """Выполняет function в новой временной директории (пути базы относительные) и возвращает время выполнения"""
+    current_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            start = time.perf_counter()
+            function()
+            return time.perf_counter() - start
+        finally:
+            os.chdir(current_dir)
+
+
+def insert_rollback_journal(rows: int) -> None:
+    """Исходный режим: журнал отката, полная синхронизация, фиксация после каждой вставки"""
+    db = Database()
+    db.cursor.execute("PRAGMA journal_mode = DELETE")
+    db.cursor.execute("PRAGMA synchronous = FULL")
+    for _ in range(rows):
+        db.add_row_to_end()
+    del db
+
+
+def insert_wal(rows: int) -> None:
+    """Журнал WAL, фиксация после каждой вставки"""
+    db = Database()
+    for _ in range(rows):
+        db.add_row_to_end()
+    del db
+
+
+def insert_wal_batch(rows: int) -> None:
+    """Журнал WAL, все вставки в одной транзакции Database.batch()"""
+    db = Database()
+    with db.batch():
+        for _ in range(rows):
+            db.add_row_to_end()
+    del db
+
+
+def run(rows: int) -> None:
+    for name, function in [
+        ("rollback journal, commit per row", insert_rollback_journal),
+        ("WAL, commit per row", insert_wal),
+        ("WAL, Database.batch()", insert_wal_batch),
+    ]:
+        elapsed = _run_in_temp_dir(lambda: function(rows))
+        print(f"{name:35s} {elapsed:8.2f} c  {rows / elapsed:12,.0f} строк/с")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
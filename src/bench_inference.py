@@ -0,0 +1,49 @@
+"""
+Пропускная способность распознавания линий по скользящим окнам (окон в секунду)
+для разных размеров пакета и шага окон на синтетическом спектре.
+Запуск: python -m src.bench_inference [количество точек спектра] [ширина окна]
+"""
+import sys
+import time
+import numpy as np
+
+from src.inference import InferenceParams, LinearWindowModel, window_scores
+from src.labeling import DEFAULT_WINDOW_WIDTH
+
+# Количество точек синтетического спектра по умолчанию
+DEFAULT_POINTS = 1_000_000
+BATCH_SIZES = (256, 4096, 65536)
+STRIDES = (1, 4)
+
+
+def synthetic_gamma(points: int) -> np.ndarray:
+    """Шум с плавным фоном и лоренцевыми линиями"""
+    rng = np.random.default_rng(0)
+    index = np.arange(points, dtype=np.float64)
+    gamma = 1 + 0.1 * np.sin(index / points * 6) + rng.normal(0, 0.01, points)
+    for center in rng.integers(0, points, max(points // 10_000, 1)):
+        gamma += 0.05 / (1 + ((index - center) / 5) ** 2)
+    return gamma
+
+
+def run(points: int, window_width: int) -> None:
+    gamma = synthetic_gamma(points)
+    model = LinearWindowModel.default(window_width)
+    print(f"Спектр: {points} точек, окно: {model.window_width} точек")
+    for stride in STRIDES:
+        for batch_size in BATCH_SIZES:
+            params = InferenceParams(batch_size=batch_size, stride=stride)
+            start = time.perf_counter()
+            centers, _ = window_scores(gamma, model, params)
+            elapsed = time.perf_counter() - start
+            print(f"шаг {stride}, пакет {batch_size:>6}: {len(centers) / elapsed:>14,.0f} окон/с ({elapsed:.3f} с)")
+
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_POINTS
+    window_width = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_WINDOW_WIDTH
+    run(points, window_width)
+
+
+if __name__ == "__main__":
+    main()
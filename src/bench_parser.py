@@ -0,0 +1,66 @@
+"""
+Сравнение скорости разбора файла спектрометра: построчный _parser_all_data и потоковый parse_spectrum_file.
+Запуск: python -m src.bench_parser [количество строк] [путь к файлу]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+from src.spectrum_parser import _parser_all_data, parse_spectrum_file
+
+# Количество строк тестового файла по умолчанию
+DEFAULT_LINES = 10_000_000
+# Количество строк, записываемых за один вызов np.savetxt при генерации
+GENERATE_BLOCK = 1_000_000
+
+
+def generate_spectrum_file(file_path: str, lines: int) -> None:
+    """Создает файл в формате спектрометра: заголовок, строки из 5 столбцов и строка-терминатор "*" """
+    with open(file_path, 'w') as file:
+        file.write("N frequency p1 p2 gamma\n")
+        for start in range(0, lines, GENERATE_BLOCK):
+            index = np.arange(start, min(lines, start + GENERATE_BLOCK))
+            block = np.column_stack([
+                index,
+                100000.0 + index * 0.01,
+                np.zeros(len(index)),
+                np.ones(len(index)),
+                np.sin(index / 100.0) * 1e-6,
+            ])
+            np.savetxt(file, block, fmt=["%d", "%.4f", "%g", "%g", "%.9e"])
+        file.write("*" * 20 + "\n")
+
+
+def _measure(function) -> tuple[float, tuple]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def run(lines: int, file_path: str) -> None:
+    if not os.path.exists(file_path):
+        print(f"Генерация файла {file_path} ({lines} строк)...")
+        generate_spectrum_file(file_path, lines)
+    print(f"Размер файла: {os.path.getsize(file_path) / 2 ** 20:.1f} МБ")
+
+    def legacy():
+        with open(file_path, 'r') as file:
+            return _parser_all_data(file.readlines())
+
+    legacy_time, (legacy_frequency, legacy_gamma) = _measure(legacy)
+    streaming_time, (frequency, gamma) = _measure(lambda: parse_spectrum_file(file_path))
+
+    assert np.array_equal(np.asarray(legacy_frequency), frequency)
+    assert np.array_equal(np.asarray(legacy_gamma), gamma)
+    count = len(frequency)
+    print(f"_parser_all_data:    {legacy_time:8.2f} c  ({count / legacy_time:,.0f} строк/с)")
+    print(f"parse_spectrum_file: {streaming_time:8.2f} c  ({count / streaming_time:,.0f} строк/с)")
+    print(f"Ускорение: x{legacy_time / streaming_time:.2f}")
+
+
+if __name__ == "__main__":
+    lines_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LINES
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.gettempdir(), f"spectrum_{lines_count}.txt")
+    run(lines_count, path)
@@ -0,0 +1,22 @@
+import hashlib
+import pandas as pd
+
+
+def frame_hash(data: pd.DataFrame) -> str:
+    """
+    Хэш содержимого DataFrame: имена столбцов и значения (индекс не учитывается).
+    Значения хэшируются векторно (pd.util.hash_pandas_object), затем сворачиваются в blake2b.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\x1f".join(str(column) for column in data.columns).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def combine_hash(*parts) -> str:
+    """Хэш набора значений (хэшей входных данных и параметров обработки)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
@@ -1,8 +1,18 @@
 import os
 import shutil
 import sqlite3
+import tempfile
+import threading
+import uuid
 import pandas as pd
-from src.row_data import RowName, RowData
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable
+from src.content_hash import combine_hash, frame_hash
+from src.derived import DERIVED_SERIES
+from src.row_data import RowFiles, RowName, RowData
+from src.row_index import RowIndex
+from src.storage import CsvStorage, DEFAULT_STORAGE_FORMAT, get_storage
 
 # Директория хранения данных приложения
 PROJECT_DIR: str = "app_data"
@@ -16,6 +26,23 @@ COLUMN_2_WITH_SUB = "with_substance"
 COLUMN_3_WITHOUT_SUB = "without_substance"
 COLUMN_4_ABSORPTION = "absorption_lines"
 COLUMN_5_LABELED = "labeled_data"
+# Уплотнение ключей порядка строк при запуске, если пропусков больше, чем строк
+ROW_ORDER_COMPACT_RATIO = 2
+# Поля строки, хранящие данные в файлах
+DATA_FIELDS = [COLUMN_2_WITH_SUB, COLUMN_3_WITHOUT_SUB, COLUMN_4_ABSORPTION, COLUMN_5_LABELED]
+# Префикс имени файла производного спектра в директории строки (см. src.derived)
+DERIVED_FILE_PREFIX = ".derived_"
+# Префикс временного имени файла, под которым данные записываются до замены ими поля строки
+TEMP_FILE_PREFIX = ".tmp_"
+
+# Настройки соединения SQLite: журнал WAL (запись без блокировки читателей и с одним fsync на контрольную точку),
+# кэш страниц 64 МБ и временные таблицы в памяти
+CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -64 * 1024,
+}
 
 # Названия столбцов таблицы
 COLUMN_NAMES = ["Удалить", "Данные с веществом", "Данные без вещества", "Линии поглощения", "Размеченные данные"]
@@ -38,24 +65,96 @@ def _db_data_changed(func):
     return wrapper
 
 
+def _synchronized(func):
+    """Выполняет метод под блокировкой базы: соединение используется и из GUI, и из фоновых потоков"""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
 class Database:
-    def __init__(self, data_change_call_function: callable = None):
-        """Инициализация базы данных и создание таблицы если она не создана"""
+    def __init__(self, data_change_call_function: callable = None, storage_format: str = DEFAULT_STORAGE_FORMAT):
+        """
+        Инициализация базы данных и создание таблицы если она не создана.
+        storage_format - формат хранения данных строк на диске (см. src.storage.STORAGE_FORMATS).
+        """
+        self.storage = get_storage(storage_format)
+        self._legacy_storage = CsvStorage()
+        # Блокировка соединения и индекса строк, сериализует запросы из разных потоков
+        self._lock = threading.RLock()
+        # Глубина вложенности batch(): пока она больше нуля, операции не фиксируют транзакцию
+        self._batch_depth = 0
+        # Директории строк, созданных внутри batch(), удаляются при откате транзакции
+        self._batch_created_dirs: list[str] = []
+        # Подписчики на изменение данных строк (получают row_id или None при очистке всей базы)
+        self._row_change_listeners: list[Callable[[int | None], None]] = []
         # Создание директории проекта, если она не существует
         os.makedirs(PROJECT_DIR, exist_ok=True)
         os.makedirs(FILE_DATA_PATH, exist_ok=True)
         os.makedirs(os.path.dirname(DATA_BASE_PATH), exist_ok=True)
         # Подключение к базе данных
         try:
-            self.conn = sqlite3.connect(DATA_BASE_PATH)
+            self.conn = sqlite3.connect(DATA_BASE_PATH, check_same_thread=False)
             self.cursor = self.conn.cursor()
+            self._configure_connection()
             self._create_table()
             self._create_triggers()
+            self._load_row_index()
             self._db_data_change_call_function = data_change_call_function
         except sqlite3.OperationalError as e:
             print(f"Failed to connect to database: {e}")
             raise
 
+    def _configure_connection(self):
+        """Установка параметров соединения CONNECTION_PRAGMAS"""
+        for name, value in CONNECTION_PRAGMAS.items():
+            self.cursor.execute(f'PRAGMA {name} = {value}')
+
+    def _commit(self) -> None:
+        """Фиксирует транзакцию, если операция выполняется не внутри batch()"""
+        if self._batch_depth == 0:
+            self.conn.commit()
+
+    @contextmanager
+    def batch(self):
+        """
+        Группирует операции с базой в одну транзакцию:
+
+            with db.batch():
+                for ...:
+                    row_id, _ = db.add_row_to_end()
+                    db.set_data(row_id, ...)
+
+        Транзакция фиксируется при выходе из внешнего блока batch() и откатывается при исключении.
+        Блоки могут быть вложенными. На время блока другие потоки ожидают доступа к базе.
+        При откате удаляются директории строк, созданных внутри блока. Остальные файлы данных не откатываются:
+        файлы, записанные set_data в существующие строки, остаются, а удаленные delete_row не восстанавливаются.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.conn.rollback()
+                    for row_dir in self._batch_created_dirs:
+                        if os.path.exists(row_dir):
+                            shutil.rmtree(row_dir)
+                    self._batch_created_dirs.clear()
+                    # Индекс строк мог измениться внутри блока, восстанавливаем его по базе
+                    self._load_row_index()
+                    self._notify_row_changed(None)
+                raise
+            else:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.conn.commit()
+                    self._batch_created_dirs.clear()
+
     def _create_table(self):
         """Создание таблицы file_name"""
         self.cursor.execute(f'''
@@ -68,36 +167,100 @@ class Database:
                 {COLUMN_5_LABELED} TEXT
             )
         ''')
+        # Хэши содержимого файлов полей строк (записываются в set_data)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS field_hash (
+                row_id INTEGER NOT NULL,
+                field TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (row_id, field)
+            )
+        ''')
+        # Хэши входных данных и параметров, с которыми строка последний раз обработана заданием (например, разметкой)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_hash (
+                row_id INTEGER NOT NULL,
+                job TEXT NOT NULL,
+                input_hash TEXT NOT NULL,
+                PRIMARY KEY (row_id, job)
+            )
+        ''')
         self.conn.commit()
 
     def _create_triggers(self):
-        """Создание триггеров для управления полем row"""
+        """
+        Создание триггеров для управления полем row.
+        Поле row - ключ порядка строк с пропусками: новая строка получает ключ больше максимального
+        (MAX по уникальному индексу поля - O(log N)), удаление строки не меняет ключи остальных строк.
+        Плотные номера строк вычисляет индекс RowIndex.
+        """
+        # Триггер сдвига номеров после удаления (O(N) записей) и старая версия auto_increment_row,
+        # в которой MAX с условием на id не использовал индекс, удаляются из существующих баз
+        self.cursor.execute('DROP TRIGGER IF EXISTS shift_row_after_delete')
+        self.cursor.execute('DROP TRIGGER IF EXISTS auto_increment_row')
         self.cursor.execute(f'''
-            CREATE TRIGGER IF NOT EXISTS auto_increment_row
+            CREATE TRIGGER auto_increment_row
             AFTER INSERT ON file_name
             WHEN NEW.{COLUMN_1_ROW_NUMBER} IS NULL
             BEGIN
                 UPDATE file_name
-                SET {COLUMN_1_ROW_NUMBER} = (SELECT COALESCE(MAX({COLUMN_1_ROW_NUMBER}), -1) + 1 
-                FROM file_name WHERE {COLUMN_0_ROW_ID} != NEW.{COLUMN_0_ROW_ID})
+                SET {COLUMN_1_ROW_NUMBER} = (SELECT COALESCE(MAX({COLUMN_1_ROW_NUMBER}), -1) + 1 FROM file_name)
                 WHERE {COLUMN_0_ROW_ID} = NEW.{COLUMN_0_ROW_ID};
             END;
         ''')
+        # Хэши удаленной строки удаляются вместе с ней
         self.cursor.execute(f'''
-            CREATE TRIGGER IF NOT EXISTS shift_row_after_delete
+            CREATE TRIGGER IF NOT EXISTS delete_row_hashes
             AFTER DELETE ON file_name
             BEGIN
-                UPDATE file_name
-                SET {COLUMN_1_ROW_NUMBER} = {COLUMN_1_ROW_NUMBER} - 1
-                WHERE {COLUMN_1_ROW_NUMBER} > OLD.{COLUMN_1_ROW_NUMBER};
+                DELETE FROM field_hash WHERE row_id = OLD.{COLUMN_0_ROW_ID};
+                DELETE FROM job_hash WHERE row_id = OLD.{COLUMN_0_ROW_ID};
             END;
         ''')
         self.conn.commit()
 
+    def _compact_row_order(self) -> None:
+        """Перенумерация ключей порядка строк в 0..N-1 с сохранением порядка"""
+        self.cursor.execute(f'''
+            CREATE TEMP TABLE row_order AS
+            SELECT {COLUMN_0_ROW_ID} AS row_id, ROW_NUMBER() OVER (ORDER BY {COLUMN_1_ROW_NUMBER}) - 1 AS position
+            FROM file_name
+        ''')
+        # Через отрицательные значения, чтобы не нарушить уникальность поля в процессе обновления
+        self.cursor.execute(f'''
+            UPDATE file_name SET {COLUMN_1_ROW_NUMBER} =
+            -1 - (SELECT position FROM row_order WHERE row_order.row_id = file_name.{COLUMN_0_ROW_ID})
+        ''')
+        self.cursor.execute(f'UPDATE file_name SET {COLUMN_1_ROW_NUMBER} = -1 - {COLUMN_1_ROW_NUMBER}')
+        self.cursor.execute('DROP TABLE row_order')
+        self.conn.commit()
+
+    def _load_row_index(self) -> None:
+        """
+        Загрузка индекса номер строки <-> id строки из таблицы.
+        Если пропусков в ключах порядка стало слишком много, ключи предварительно уплотняются.
+        """
+        self.cursor.execute(f'SELECT COUNT(*), MAX({COLUMN_1_ROW_NUMBER}) FROM file_name')
+        count, max_key = self.cursor.fetchone()
+        if count and max_key + 1 > ROW_ORDER_COMPACT_RATIO * count and self._batch_depth == 0:
+            self._compact_row_order()
+        self.row_index = RowIndex()
+        self.cursor.execute(f'SELECT {COLUMN_0_ROW_ID} FROM file_name ORDER BY {COLUMN_1_ROW_NUMBER}')
+        self.row_index.load([row_id for row_id, in self.cursor.fetchall()])
+
+    def add_row_change_listener(self, listener: Callable[[int | None], None]) -> None:
+        """Подписка на изменение данных строки: listener(row_id), при очистке всей базы listener(None)"""
+        self._row_change_listeners.append(listener)
+
+    def _notify_row_changed(self, row_id: int | None) -> None:
+        for listener in self._row_change_listeners:
+            listener(row_id)
+
     def _get_row_directory(self, id: int) -> str:
         """Возвращает путь к директории для строки с заданным id"""
         return os.path.join(FILE_DATA_PATH, str(id))
 
+    @_synchronized
     def add_row_to_end(self) -> tuple[int, int]:
         """
         Создание новой строки и возврат ее идентификатора и номера строки.
@@ -105,13 +268,55 @@ class Database:
         """
         self.cursor.execute(f'INSERT INTO file_name ({COLUMN_1_ROW_NUMBER}) VALUES (NULL)')
         row_id = self.cursor.lastrowid
-        self.cursor.execute(f'SELECT {COLUMN_1_ROW_NUMBER} FROM file_name WHERE {COLUMN_0_ROW_ID} = ?', (row_id,))
-        row_number = self.cursor.fetchone()[0]
         # Создание директории для новой строки
         os.makedirs(self._get_row_directory(row_id), exist_ok=True)
-        self.conn.commit()
+        if self._batch_depth > 0:
+            self._batch_created_dirs.append(self._get_row_directory(row_id))
+        self._commit()
+        row_number = self.row_index.append(row_id)
         return row_id, row_number
 
+    def create_staging_directory(self) -> str:
+        """
+        Создает временную директорию для подготовки данных новой строки вне блокировки базы.
+        Данные записываются в нее методами self.storage и добавляются в базу через add_rows_from_staging.
+        """
+        return tempfile.mkdtemp(prefix=".staging-", dir=FILE_DATA_PATH)
+
+    @_synchronized
+    def add_rows_from_staging(self, rows: list[tuple[str, dict[str, str]]]) -> list[int]:
+        """
+        Добавляет в конец таблицы строки, данные которых уже записаны во временные директории.
+        rows - список (директория из create_staging_directory, {поле: имя файла}).
+        Все строки добавляются одной транзакцией: при ошибке база и директории строк остаются без изменений.
+        Возвращает id добавленных строк.
+        """
+        created: list[tuple[int, str]] = []
+        try:
+            with self.batch():
+                for staging_dir, names in rows:
+                    if any(field not in DATA_FIELDS for field in names):
+                        raise ValueError(f"Invalid fields: {list(names)}")
+                    self.cursor.execute(f'INSERT INTO file_name ({COLUMN_1_ROW_NUMBER}) VALUES (NULL)')
+                    row_id = self.cursor.lastrowid
+                    for field, file_name in names.items():
+                        self.cursor.execute(
+                            f'UPDATE file_name SET {field} = ? WHERE {COLUMN_0_ROW_ID} = ?', (file_name, row_id)
+                        )
+                    row_dir = self._get_row_directory(row_id)
+                    if os.path.exists(row_dir):
+                        shutil.rmtree(row_dir)
+                    os.replace(staging_dir, row_dir)
+                    created.append((row_id, staging_dir))
+                    self.row_index.append(row_id)
+        except Exception:
+            # Возвращаем данные во временные директории
+            for row_id, staging_dir in created:
+                os.replace(self._get_row_directory(row_id), staging_dir)
+            raise
+        return [row_id for row_id, _ in created]
+
+    @_synchronized
     def delete_row(self, id: int) -> bool:
         """
         Удаление строки и соответствующей директории по id.
@@ -127,46 +332,104 @@ class Database:
             shutil.rmtree(row_dir)
 
         self.cursor.execute(f'DELETE FROM file_name WHERE {COLUMN_0_ROW_ID} = ?', (id,))
-        self.conn.commit()
+        self._commit()
+        # Номера следующих строк уменьшаются только в индексе, ключи порядка в базе не меняются
+        self.row_index.remove(id)
+        self._notify_row_changed(id)
         return True
 
+    @_synchronized
+    def _row_exists(self, id: int) -> bool:
+        self.cursor.execute(f'SELECT {COLUMN_0_ROW_ID} FROM file_name WHERE {COLUMN_0_ROW_ID} = ?', (id,))
+        return self.cursor.fetchone() is not None
+
+    def _write_temporary(self, row_dir: str, data: pd.DataFrame) -> str:
+        """
+        Записывает данные в директорию строки под временным именем (без блокировки базы) и возвращает это имя.
+        Под блокировкой остается только переименование (storage.replace) и обновление базы.
+        """
+        temp_name = f"{TEMP_FILE_PREFIX}{uuid.uuid4().hex}"
+        try:
+            self.storage.write(row_dir, temp_name, data)
+        except Exception:
+            self.storage.remove(row_dir, temp_name)
+            raise
+        return temp_name
+
     def set_data(self, id: int, field: str, field_value: str, file_data: pd.DataFrame) -> bool:
         """
         Установка значения для указанного поля в строке с заданным id.
-        Если значение - DataFrame, сохраняет его как CSV в директории строки с уникальным именем.
+        Сохраняет DataFrame в директории строки в формате хранения базы под именем field_value.
         Возвращает True при успехе, False если поле невалидно или строка не найдена.
+        Файл записывается без блокировки базы, поэтому сохранение большого файла в рабочем потоке
+        не задерживает обращения к базе из потока интерфейса.
         """
-        valid_fields = [COLUMN_2_WITH_SUB, COLUMN_3_WITHOUT_SUB, COLUMN_4_ABSORPTION, COLUMN_5_LABELED]
-        if field not in valid_fields:
-            return False
-
-        self.cursor.execute(f'SELECT {COLUMN_0_ROW_ID} FROM file_name WHERE {COLUMN_0_ROW_ID} = ?', (id,))
-        if not self.cursor.fetchone():
+        if field not in DATA_FIELDS or not self._row_exists(id):
             return False
 
         row_dir = self._get_row_directory(id)
-        os.makedirs(row_dir, exist_ok=True)
-        file_path = os.path.join(row_dir, field_value)
-        file_data.to_csv(file_path, index=False)
-
-        self.cursor.execute(f'UPDATE file_name SET {field} = ? WHERE {COLUMN_0_ROW_ID} = ?', (field_value, id))
-        self.conn.commit()
+        try:
+            os.makedirs(row_dir, exist_ok=True)
+            temp_name = self._write_temporary(row_dir, file_data)
+        except OSError:
+            # Строка удалена вместе с директорией во время записи
+            if not self._row_exists(id):
+                return False
+            raise
+        content_hash = frame_hash(file_data)
+
+        with self._lock:
+            if not self._row_exists(id):
+                self.storage.remove(row_dir, temp_name)
+                return False
+            self.storage.replace(row_dir, temp_name, field_value)
+            self.cursor.execute(f'UPDATE file_name SET {field} = ? WHERE {COLUMN_0_ROW_ID} = ?', (field_value, id))
+            self._set_field_hash(id, field, content_hash)
+            # Производные спектры, вычисленные из прежних данных поля, больше не действительны
+            for name, (inputs, _) in DERIVED_SERIES.items():
+                if field in inputs:
+                    self.storage.remove(row_dir, DERIVED_FILE_PREFIX + name)
+            self._commit()
+            self._notify_row_changed(id)
         return True
 
+    def _set_field_hash(self, row_id: int, field: str, content_hash: str) -> None:
+        self.cursor.execute(
+            'INSERT OR REPLACE INTO field_hash (row_id, field, hash) VALUES (?, ?, ?)', (row_id, field, content_hash)
+        )
+
+    @_synchronized
+    def set_job_hash(self, row_id: int, job: str, input_hash: str) -> None:
+        """Запоминает хэш входных данных, с которыми строка обработана заданием job"""
+        self.cursor.execute(
+            'INSERT OR REPLACE INTO job_hash (row_id, job, input_hash) VALUES (?, ?, ?)', (row_id, job, input_hash)
+        )
+        self._commit()
+
     # ------------------------------------------------------------------------------------------------------------------
     #                                                 GET
     # ------------------------------------------------------------------------------------------------------------------
+    @_synchronized
     def get_row_number_by_id(self, row_id: int) -> int | None:
         """
         Возвращает значение COLUMN_1_ROW_NUMBER для строки с заданным COLUMN_0_ROW_ID.
         Возвращает None, если строка с указанным row_id не найдена.
         """
-        self.cursor.execute(f'SELECT {COLUMN_1_ROW_NUMBER} FROM file_name WHERE {COLUMN_0_ROW_ID} = ?', (row_id,))
-        result = self.cursor.fetchone()
-        return result[0] if result else None
+        return self.row_index.get_row_number(row_id)
 
-    def _row_data_formation(self, row: tuple) -> tuple[int, int, RowName]:
-        """Формирует данные строки из кортежа, возвращая row_id, row_number и RowName."""
+    @_synchronized
+    def get_row_id_by_number(self, row_number: int) -> int | None:
+        """
+        Возвращает COLUMN_0_ROW_ID строки с заданным номером COLUMN_1_ROW_NUMBER.
+        Возвращает None, если строки с таким номером нет.
+        """
+        return self.row_index.get_row_id(row_number)
+
+    def _row_data_formation(self, row: tuple, row_number: int) -> tuple[int, int, RowName]:
+        """
+        Формирует данные строки из кортежа, возвращая row_id, row_number и RowName.
+        row_number - плотный номер строки (в кортеже поле row содержит ключ порядка с пропусками).
+        """
         column_names = [COLUMN_0_ROW_ID, COLUMN_1_ROW_NUMBER, COLUMN_2_WITH_SUB, COLUMN_3_WITHOUT_SUB,
                         COLUMN_4_ABSORPTION, COLUMN_5_LABELED]
         row_dict = dict(zip(column_names, row))
@@ -176,40 +439,164 @@ class Database:
             absorption_lines=row_dict[COLUMN_4_ABSORPTION],
             labeled_data=row_dict[COLUMN_5_LABELED]
         )
-        return row_dict[COLUMN_0_ROW_ID], row_dict[COLUMN_1_ROW_NUMBER], row_name
+        return row_dict[COLUMN_0_ROW_ID], row_number, row_name
 
+    @_synchronized
     def get_names_row(self, row_id: int) -> tuple[int, int, RowName] | None:
         """Возвращает данные в формате row_id, row_number, RowName или None, если не найдена."""
         self.cursor.execute(f'SELECT * FROM file_name WHERE {COLUMN_0_ROW_ID} = ?', (row_id,))
         row = self.cursor.fetchone()
         if not row:
             return None
-        return self._row_data_formation(row)
+        return self._row_data_formation(row, self.row_index.get_row_number(row_id))
 
+    @_synchronized
     def get_names_all_rows(self) -> list[tuple[int, int, RowName]]:
         """
         Возвращает все строки из таблицы в виде списка кортежей row_id,row_number,RowName,отсортированных по row_number
         """
         self.cursor.execute(f'SELECT * FROM file_name ORDER BY {COLUMN_1_ROW_NUMBER}')
         rows = self.cursor.fetchall()
-        return [self._row_data_formation(row) for row in rows]
+        return [self._row_data_formation(row, row_number) for row_number, row in enumerate(rows)]
 
-    def get_data_row(self, row_id: int) -> tuple[int, int, RowData] | None:
+    @_synchronized
+    def get_names_rows(self, offset: int, limit: int) -> list[tuple[int, int, RowName]]:
         """
-        Возвращает данные строки по row_id в формате (row_id, row_number, RowData) или None, если строка не найдена.
-        Читает CSV-файлы из директории строки для заполнения полей RowData.
+        Возвращает не более limit строк, начиная с номера строки offset, в формате get_names_all_rows.
+        Используется для постраничной загрузки таблицы.
         """
-        # Получаем данные строки из базы
-        self.cursor.execute(f'SELECT * FROM file_name WHERE {COLUMN_0_ROW_ID} = ?', (row_id,))
-        row = self.cursor.fetchone()
-        if not row:
+        first_id = self.row_index.get_row_id(offset)
+        if first_id is None:
+            return []
+        # Поиск по индексу ключа порядка от первой строки страницы вместо пропуска offset строк
+        self.cursor.execute(f'''
+            SELECT * FROM file_name
+            WHERE {COLUMN_1_ROW_NUMBER} >= (SELECT {COLUMN_1_ROW_NUMBER} FROM file_name WHERE {COLUMN_0_ROW_ID} = ?)
+            ORDER BY {COLUMN_1_ROW_NUMBER} LIMIT ?
+        ''', (first_id, limit))
+        rows = self.cursor.fetchall()
+        return [self._row_data_formation(row, offset + position) for position, row in enumerate(rows)]
+
+    def get_field_hash(self, row_id: int, field: str) -> str | None:
+        """
+        Возвращает хэш содержимого поля строки или None, если поле пустое.
+        Для данных, записанных без set_data (до появления хэшей или пакетным импортом), хэш вычисляется
+        при первом запросе и сохраняется.
+        """
+        with self._lock:
+            self.cursor.execute('SELECT hash FROM field_hash WHERE row_id = ? AND field = ?', (row_id, field))
+            found = self.cursor.fetchone()
+        if found:
+            return found[0]
+        names = self.get_names_row(row_id)
+        file_name = getattr(names[2], field, None) if names is not None else None
+        if not file_name:
+            return None
+        data = self._read_field(self._get_row_directory(row_id), file_name, mmap=True)
+        if data is None:
             return None
+        content_hash = frame_hash(data)
+        with self._lock:
+            # OR IGNORE: если за время чтения поле перезаписал set_data, его хэш не затирается
+            self.cursor.execute(
+                'INSERT OR IGNORE INTO field_hash (row_id, field, hash) VALUES (?, ?, ?)', (row_id, field, content_hash)
+            )
+            self._commit()
+        return content_hash
 
-        # Формируем row_id, row_number и RowName
-        row_id, row_number, row_name = self._row_data_formation(row)
+    def _derived_inputs_hash(self, row_id: int, inputs: list[str]) -> str | None:
+        hashes = [self.get_field_hash(row_id, field) for field in inputs]
+        return None if None in hashes else combine_hash(*hashes)
+
+    def get_derived_data(
+            self, row_id: int, name: str, mmap: bool = False, compute: bool = True
+    ) -> pd.DataFrame | None:
+        """
+        Возвращает производный спектр строки (src.derived.DERIVED_SERIES) или None, если нет входных данных.
+        Спектр вычисляется при первом запросе и сохраняется в директории строки до изменения входных полей.
+        compute=False - только чтение уже сохраненного спектра (None, если он еще не вычислен).
+        """
+        inputs, compute_data = DERIVED_SERIES[name]
+        row_dir = self._get_row_directory(row_id)
+        file_name = DERIVED_FILE_PREFIX + name
+        if self.storage.exists(row_dir, file_name):
+            return self.storage.read(row_dir, file_name, mmap=mmap)
+        if not compute:
+            return None
+        inputs_hash = self._derived_inputs_hash(row_id, inputs)
+        names = self.get_names_row(row_id)
+        if inputs_hash is None or names is None:
+            return None
+        frames = [self._read_field(row_dir, getattr(names[2], field), mmap=True) for field in inputs]
+        if any(frame is None or frame.empty for frame in frames):
+            return None
+        data = compute_data(*frames)
+        temp_name = self._write_temporary(row_dir, data)
+        with self._lock:
+            # Не сохраняем, если входные поля изменились за время вычисления
+            if self._derived_inputs_hash(row_id, inputs) == inputs_hash:
+                self.storage.replace(row_dir, temp_name, file_name)
+            else:
+                self.storage.remove(row_dir, temp_name)
+        return data
+
+    @_synchronized
+    def get_job_hash(self, row_id: int, job: str) -> str | None:
+        """Хэш входных данных последней обработки строки заданием job или None"""
+        self.cursor.execute('SELECT input_hash FROM job_hash WHERE row_id = ? AND job = ?', (row_id, job))
+        found = self.cursor.fetchone()
+        return found[0] if found else None
+
+    def get_row_files(self, row_id: int) -> RowFiles | None:
+        """Возвращает расположение файлов строки (для обработки строки в другом процессе) или None"""
+        names = self.get_names_row(row_id)
+        if names is None:
+            return None
+        return RowFiles(
+            row_id=row_id,
+            row_dir=self._get_row_directory(row_id),
+            row_name=names[2],
+            storage_format=self.storage.name
+        )
+
+    @_synchronized
+    def get_row_count(self) -> int:
+        """Возвращает количество строк в таблице"""
+        return len(self.row_index)
+
+    def _read_field(self, row_dir: str, file_name: str, mmap: bool = False) -> pd.DataFrame | None:
+        """
+        Читает данные поля в формате хранения базы.
+        Если данные сохранены в старом формате CSV, переносит их в текущий формат и удаляет CSV.
+        """
+        if not self.storage.exists(row_dir, file_name):
+            if self.storage.name == self._legacy_storage.name:
+                return None
+            with self._lock:
+                # Повторная проверка: строку мог уже перенести другой поток
+                if not self.storage.exists(row_dir, file_name):
+                    if not self._legacy_storage.exists(row_dir, file_name):
+                        return None
+                    data = self._legacy_storage.read(row_dir, file_name)
+                    self.storage.write(row_dir, file_name, data)
+                    self._legacy_storage.remove(row_dir, file_name)
+                    if not mmap:
+                        return data
+        return self.storage.read(row_dir, file_name, mmap=mmap)
+
+    def get_data_row(self, row_id: int, mmap: bool = False) -> tuple[int, int, RowData] | None:
+        """
+        Возвращает данные строки по row_id в формате (row_id, row_number, RowData) или None, если строка не найдена.
+        Читает файлы из директории строки для заполнения полей RowData.
+        mmap=True - столбцы DataFrame являются отображенными в память массивами только для чтения:
+        данные не копируются в память, страницы файла читаются при первом обращении к ним.
+        """
+        # Получаем row_id, row_number и RowName из базы (файлы читаются без блокировки базы)
+        names = self.get_names_row(row_id)
+        if names is None:
+            return None
+        row_id, row_number, row_name = names
 
-        # Создаем объект RowData
-        row_data = RowData(data_change_call_function=self._db_data_change_call_function)
         row_dir = self._get_row_directory(row_id)
 
         # Маппинг полей RowName к RowData
@@ -220,16 +607,33 @@ class Database:
             'labeled_data': row_name.labeled_data
         }
 
-        # Заполняем поля RowData
+        # Читаем поля RowData
+        fields_data = {}
         for field, file_name in field_mapping.items():
-            if file_name and os.path.exists(file_path := os.path.join(row_dir, file_name)):
-                try:
-                    setattr(row_data, field, pd.read_csv(file_path))
-                except Exception as e:
-                    print(f"Error reading CSV file {file_path}: {e}")
-
+            if not file_name:
+                continue
+            try:
+                data = self._read_field(row_dir, file_name, mmap=mmap)
+                if data is not None:
+                    fields_data[field] = data
+            except Exception as e:
+                print(f"Error reading file {os.path.join(row_dir, file_name)}: {e}")
+
+        # Производные данные (разность спектров, кандидаты в линии) только читаются, если уже вычислены:
+        # вычисление занимает секунды и выполняется в фоне по запросу отображения (get_derived_data)
+        for name in DERIVED_SERIES:
+            try:
+                data = self.get_derived_data(row_id, name, mmap=mmap, compute=False)
+                if data is not None:
+                    fields_data[name] = data
+            except Exception as e:
+                print(f"Error reading derived data {name} of row {row_id}: {e}")
+
+        # Создаем объект RowData (массивы для отрисовки вычисляются один раз при создании)
+        row_data = RowData(data_change_call_function=self._db_data_change_call_function, **fields_data)
         return row_id, row_number, row_data
 
+    @_synchronized
     def clear_all_data(self) -> None:
         """Очистка таблицы и удаление всех директорий строк."""
         # Удаление всех строк из таблицы
@@ -240,7 +644,9 @@ class Database:
             item_path = os.path.join(FILE_DATA_PATH, item)
             shutil.rmtree(item_path)
 
-        self.conn.commit()
+        self._commit()
+        self.row_index.clear()
+        self._notify_row_changed(None)
 
     def __del__(self):
         """Закрытие соединения с базой данных при уничтожении объекта."""
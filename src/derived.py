@@ -0,0 +1,68 @@
+"""
+Производные данные строки (спектры и найденные по ним кандидаты в линии), вычисляемые из ее полей.
+Вычисляются один раз, хранятся в директории строки рядом с файлами полей и удаляются Database.set_data
+при изменении любого из входных полей.
+"""
+import numpy as np
+import pandas as pd
+from typing import Callable
+
+from src.constant import COLUMN_2_WITH_SUB, COLUMN_3_WITHOUT_SUB
+from src.matched_filter import find_line_candidates
+from src.resampling import median_step, resample_frames
+
+# Имя производного спектра разности с веществом и без вещества
+DIFFERENCE = "difference"
+# Имя производных данных кандидатов в линии поглощения (согласованный фильтр, см. src.matched_filter)
+LINE_CANDIDATES = "line_candidates"
+# Допустимое расхождение узлов совпадающих сеток частот в долях медианного шага
+ALIGNED_GRID_TOLERANCE: float = 1e-3
+
+
+def _is_aligned(first: np.ndarray, second: np.ndarray) -> bool:
+    """
+    Сетки совпадают поточечно. Допуск абсолютный (доля шага): относительный допуск на частотах ~1e5 МГц
+    пропустил бы сдвиг сетки на несколько шагов.
+    """
+    if len(first) != len(second):
+        return False
+    if np.array_equal(first, second, equal_nan=True):
+        return True
+    try:
+        tolerance = ALIGNED_GRID_TOLERANCE * median_step(first)
+    except ValueError:
+        return False
+    return np.allclose(first, second, rtol=0, atol=tolerance, equal_nan=True)
+
+
+def difference_spectrum(with_substance: pd.DataFrame, without_substance: pd.DataFrame) -> pd.DataFrame:
+    """
+    Разность (с веществом - без вещества) и отношение (с веществом / без вещества) спектров на общей сетке.
+    Если сетки спектров не совпадают, оба спектра передискретизируются на равномерную сетку
+    с шагом более редкого из них.
+    """
+    frequency = with_substance["frequency"].to_numpy(dtype=np.float64)
+    without_frequency = without_substance["frequency"].to_numpy(dtype=np.float64)
+    if _is_aligned(frequency, without_frequency):
+        gamma_with = with_substance["gamma"].to_numpy(dtype=np.float64)
+        gamma_without = without_substance["gamma"].to_numpy(dtype=np.float64)
+    else:
+        step = max(median_step(frequency), median_step(without_frequency))
+        aligned = resample_frames({"with": with_substance, "without": without_substance}, step)
+        frequency = aligned["with"]["frequency"].to_numpy()
+        gamma_with = aligned["with"]["gamma"].to_numpy()
+        gamma_without = aligned["without"]["gamma"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(gamma_without != 0, gamma_with / gamma_without, np.nan)
+    return pd.DataFrame({
+        "frequency": frequency,
+        "gamma": gamma_with - gamma_without,
+        "ratio": ratio
+    })
+
+
+# Производные спектры: имя -> (входные поля строки, функция вычисления по DataFrame входных полей)
+DERIVED_SERIES: dict[str, tuple[list[str], Callable[..., pd.DataFrame]]] = {
+    DIFFERENCE: ([COLUMN_2_WITH_SUB, COLUMN_3_WITHOUT_SUB], difference_spectrum),
+    LINE_CANDIDATES: ([COLUMN_2_WITH_SUB], find_line_candidates),
+}
@@ -0,0 +1,105 @@
+"""
+Автоматический поиск линий поглощения во всех строках базы (см. src.line_detection) в пуле процессов.
+Найденные линии записываются в absorption_lines с src=True, точки, проставленные вручную, сохраняются.
+Запуск: python -m src.detect_lines [--threshold T] [--baseline-width N] [--smooth-width N] [--min-distance N]
+                                   [--workers N] [--force]
+Строки, спектры которых не изменились с последнего поиска с теми же параметрами, пропускаются.
+"""
+import argparse
+from functools import partial
+from typing import Callable
+
+from src.constant import COLUMN_2_WITH_SUB, COLUMN_3_WITHOUT_SUB, COLUMN_4_ABSORPTION
+from src.content_hash import combine_hash
+from src.database import Database
+from src.line_detection import DetectionParams, detect_lines, merge_detected_lines
+from src.row_data import RowFiles
+from src.row_jobs import FieldUpdate, RowJobsReport, run_row_jobs
+
+# Имя задания поиска линий в таблице хэшей обработки строк
+LINE_DETECTION_JOB = "line_detection"
+# Имя поля absorption_lines для строк, у которых его еще нет
+DETECTED_LINES_FILE_NAME = "absorption_lines_auto"
+
+
+def detect_row_job(row_files: RowFiles, params: DetectionParams) -> list[FieldUpdate]:
+    """Выполняется в процессе пула: ищет линии в спектрах строки и объединяет их с точками строки"""
+    with_substance = row_files.read(COLUMN_2_WITH_SUB)
+    if with_substance is None or with_substance.empty:
+        return []
+    detected = detect_lines(with_substance, row_files.read(COLUMN_3_WITHOUT_SUB), params)
+    return [FieldUpdate(
+        field=COLUMN_4_ABSORPTION,
+        field_value=row_files.row_name.absorption_lines or DETECTED_LINES_FILE_NAME,
+        file_data=merge_detected_lines(row_files.read(COLUMN_4_ABSORPTION), detected)
+    )]
+
+
+def detection_input_hash(db: Database, row_id: int, params: DetectionParams) -> str:
+    return combine_hash(
+        db.get_field_hash(row_id, COLUMN_2_WITH_SUB), db.get_field_hash(row_id, COLUMN_3_WITHOUT_SUB), params.as_tuple()
+    )
+
+
+def rows_to_detect(db: Database, params: DetectionParams, force: bool = False) -> dict[int, str]:
+    """Строки со спектром, в которых поиск еще не выполнялся на текущих данных: id строки -> хэш входных данных"""
+    rows = {}
+    for row_id, _, row_name in db.get_names_all_rows():
+        if not row_name.with_substance:
+            continue
+        input_hash = detection_input_hash(db, row_id, params)
+        if force or db.get_job_hash(row_id, LINE_DETECTION_JOB) != input_hash:
+            rows[row_id] = input_hash
+    return rows
+
+
+def detect_all_rows(
+        db: Database,
+        params: DetectionParams = DetectionParams(),
+        workers: int | None = None,
+        force: bool = False,
+        progress_callback: Callable[[int, int], None] | None = None
+) -> RowJobsReport:
+    """Ищет линии во всех строках базы, возвращает итог обработки"""
+    rows = rows_to_detect(db, params, force=force)
+    return run_row_jobs(
+        db,
+        list(rows),
+        partial(detect_row_job, params=params),
+        workers=workers,
+        progress_callback=progress_callback,
+        on_row_done=lambda row_id, _: db.set_job_hash(row_id, LINE_DETECTION_JOB, rows[row_id])
+    )
+
+
+def main():
+    defaults = DetectionParams()
+    parser = argparse.ArgumentParser(description="Автоматический поиск линий поглощения во всех строках базы")
+    parser.add_argument("--threshold", type=float, default=defaults.threshold, help="порог в единицах шума")
+    parser.add_argument("--baseline-width", type=int, default=defaults.baseline_width, help="окно базовой линии")
+    parser.add_argument("--smooth-width", type=int, default=defaults.smooth_width, help="окно сглаживания")
+    parser.add_argument("--min-distance", type=int, default=defaults.min_distance, help="расстояние между линиями")
+    parser.add_argument("--workers", type=int, default=None, help="количество процессов")
+    parser.add_argument("--force", action="store_true", help="выполнить поиск заново во всех строках")
+    args = parser.parse_args()
+
+    params = DetectionParams(
+        baseline_width=args.baseline_width,
+        smooth_width=args.smooth_width,
+        threshold=args.threshold,
+        min_distance=args.min_distance
+    )
+    report = detect_all_rows(
+        Database(),
+        params=params,
+        workers=args.workers,
+        force=args.force,
+        progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True)
+    )
+    print(f"\nОбработано строк: {len(report.updated)}, пропущено: {len(report.skipped)}, ошибок: {len(report.failed)}")
+    for row_id, message in report.failed.items():
+        print(f"Строка {row_id}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import numpy as np
+
+# Количество точек в корзине нижнего уровня пирамиды
+BASE_BUCKET: int = 4
+# Кривые короче этого значения не прореживаются
+MIN_POINTS_FOR_PYRAMID: int = 10_000
+
+
+class MinMaxPyramid:
+    """
+    Пирамида огибающих min/max для отрисовки длинной кривой с разрешением экрана.
+    Уровень k делит кривую на корзины по BASE_BUCKET * 2**k точек и хранит индексы минимума и максимума каждой корзины,
+    поэтому огибающая состоит из исходных точек кривой и сохраняет все экстремумы видимого диапазона.
+    Строится один раз за O(N), выборка видимого диапазона - O(log N + количество пикселей).
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(x) > 1 and np.any(x[1:] < x[:-1]):
+            order = np.argsort(x, kind="stable")
+            x, y = x[order], y[order]
+        self.x = x
+        self.y = y
+        # Границы всей кривой (для автомасштабирования по полным данным, а не по прореженным)
+        finite = np.isfinite(y)
+        self.x_bounds = (float(x[0]), float(x[-1])) if len(x) else (np.nan, np.nan)
+        self.y_bounds = (float(y[finite].min()), float(y[finite].max())) if finite.any() else (np.nan, np.nan)
+        # Уровни: (индексы минимумов, индексы максимумов, размер корзины)
+        self.levels: list[tuple[np.ndarray, np.ndarray, int]] = []
+        if len(x) >= MIN_POINTS_FOR_PYRAMID:
+            self._build()
+
+    def _build(self) -> None:
+        n = len(self.y)
+        # NaN не должен становиться экстремумом корзины
+        y_low = np.where(np.isnan(self.y), np.inf, self.y)
+        y_high = np.where(np.isnan(self.y), -np.inf, self.y)
+        buckets = -(-n // BASE_BUCKET)
+        padded = buckets * BASE_BUCKET
+        low = np.full(padded, np.inf)
+        high = np.full(padded, -np.inf)
+        low[:n] = y_low
+        high[:n] = y_high
+        offsets = np.arange(buckets) * BASE_BUCKET
+        arg_min = offsets + np.argmin(low.reshape(buckets, BASE_BUCKET), axis=1)
+        arg_max = offsets + np.argmax(high.reshape(buckets, BASE_BUCKET), axis=1)
+        # Индексы дополнения за концом массива заменяются последней точкой
+        np.minimum(arg_min, n - 1, out=arg_min)
+        np.minimum(arg_max, n - 1, out=arg_max)
+        bucket_size = BASE_BUCKET
+        self.levels.append((arg_min, arg_max, bucket_size))
+        while len(arg_min) > 1:
+            if len(arg_min) % 2:
+                arg_min = np.append(arg_min, arg_min[-1])
+                arg_max = np.append(arg_max, arg_max[-1])
+            left_min, right_min = arg_min[0::2], arg_min[1::2]
+            left_max, right_max = arg_max[0::2], arg_max[1::2]
+            arg_min = np.where(y_low[right_min] < y_low[left_min], right_min, left_min)
+            arg_max = np.where(y_high[right_max] > y_high[left_max], right_max, left_max)
+            bucket_size *= 2
+            self.levels.append((arg_min, arg_max, bucket_size))
+
+    def nearest_indices(self, x_values: np.ndarray) -> np.ndarray:
+        """Индексы точек кривой, ближайших по x к x_values"""
+        x_values = np.asarray(x_values, dtype=np.float64)
+        if len(self.x) == 0 or len(x_values) == 0:
+            return np.empty(0, dtype=np.intp)
+        if len(self.x) == 1:
+            return np.zeros(len(x_values), dtype=np.intp)
+        right = np.clip(np.searchsorted(self.x, x_values), 1, len(self.x) - 1)
+        left = right - 1
+        return np.where(np.abs(self.x[left] - x_values) <= np.abs(self.x[right] - x_values), left, right)
+
+    def envelope(
+            self, x_min: float, x_max: float, pixels: int, keep: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Возвращает точки кривой для диапазона [x_min, x_max] при ширине pixels пикселей:
+        по одной паре min/max на пиксель. keep - индексы точек, которые попадают в результат всегда
+        (например, точки линий поглощения).
+        """
+        n = len(self.x)
+        start = max(int(np.searchsorted(self.x, x_min, side="left")) - 1, 0)
+        stop = min(int(np.searchsorted(self.x, x_max, side="right")) + 1, n)
+        if stop - start <= 2 * pixels or not self.levels:
+            indices = np.arange(start, stop)
+        else:
+            # Самый подробный уровень, на котором корзин не больше, чем пикселей
+            level = 0
+            while level + 1 < len(self.levels) and (stop - start) / self.levels[level][2] > pixels:
+                level += 1
+            arg_min, arg_max, bucket_size = self.levels[level]
+            first, last = start // bucket_size, (stop - 1) // bucket_size + 1
+            pairs = np.stack([arg_min[first:last], arg_max[first:last]], axis=1)
+            # Внутри корзины точки идут в порядке x, чтобы линия не возвращалась назад
+            pairs.sort(axis=1)
+            indices = pairs.ravel()
+            if keep is not None and len(keep):
+                keep = keep[(keep >= start) & (keep < stop)]
+                indices = np.union1d(indices, keep)
+        return self.x[indices], self.y[indices]
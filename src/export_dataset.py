@@ -0,0 +1,141 @@
+"""
+Потоковый экспорт размеченных окон всех строк базы в один обучающий набор данных.
+Набор - директория с файлами .npy, которые дописываются построчно, поэтому память не зависит от размера базы:
+    gamma.npy   (N, W) float64 - окна гаммы
+    label.npy   (N,)   bool    - True, если в окне есть точка поглощения
+    row_id.npy  (N,)   int64   - id строки базы, из которой взято окно
+Файлы читаются обычным np.load (в том числе с mmap_mode="r").
+Запуск: python -m src.export_dataset [директория]
+"""
+import os
+import sys
+import numpy as np
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Callable
+
+from src.constant import COLUMN_5_LABELED, PROJECT_DIR
+from src.database import Database
+from src.labeling import windows_from_frame
+
+# Размер заголовка .npy (версия 1.0), зарезервированный под итоговую форму массива
+NPY_HEADER_SIZE: int = 128
+NPY_MAGIC: bytes = b"\x93NUMPY\x01\x00"
+
+
+def _npy_header(shape: tuple, dtype: np.dtype) -> bytes:
+    """Заголовок .npy версии 1.0, дополненный пробелами до NPY_HEADER_SIZE байт"""
+    header = repr({
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": shape,
+    })
+    # magic + версия (8 байт), длина заголовка uint16 (2 байта), заголовок, завершающий перевод строки
+    padding = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2 - len(header) - 1
+    if padding < 0:
+        raise ValueError(f"Shape {shape} does not fit into the reserved .npy header")
+    header = (header + " " * padding + "\n").encode("latin1")
+    return NPY_MAGIC + len(header).to_bytes(2, "little") + header
+
+
+class NpyAppendWriter:
+    """
+    Дописываемый .npy файл: под заголовок резервируется место, данные добавляются блоками в конец,
+    итоговая форма массива записывается в заголовок при закрытии.
+    """
+
+    def __init__(self, path: str, dtype, row_shape: tuple = ()):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = 0
+        self._file = open(path, "wb")
+        self._file.write(_npy_header((0,) + self.row_shape, self.dtype))
+
+    def append(self, values: np.ndarray) -> None:
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        if values.shape[1:] != self.row_shape:
+            raise ValueError(f"Expected rows of shape {self.row_shape}, got {values.shape[1:]}")
+        self._file.write(values.tobytes())
+        self.rows += len(values)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(_npy_header((self.rows,) + self.row_shape, self.dtype))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+@dataclass
+class ExportReport:
+    """Итог экспорта: количество окон, id экспортированных строк и строк, пропущенных из-за другой ширины окна"""
+    windows: int = 0
+    exported: list[int] = field(default_factory=list)
+    skipped: list[int] = field(default_factory=list)
+
+
+def export_dataset(
+        db: Database,
+        output_dir: str,
+        progress_callback: Callable[[int, int], None] | None = None
+) -> ExportReport:
+    """
+    Экспортирует размеченные данные всех строк в директорию output_dir.
+    Ширина окна набора определяется первой размеченной строкой, строки с другой шириной пропускаются.
+    В памяти одновременно находятся данные только одной строки.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    report = ExportReport()
+    rows = [(row_id, row_name) for row_id, _, row_name in db.get_names_all_rows() if row_name.labeled_data]
+    writers: dict[str, NpyAppendWriter] = {}
+    try:
+        for done, (row_id, row_name) in enumerate(rows, start=1):
+            row_files = db.get_row_files(row_id)
+            labeled_data = row_files.read(COLUMN_5_LABELED, mmap=True) if row_files is not None else None
+            if labeled_data is not None and not labeled_data.empty:
+                windows = windows_from_frame(labeled_data)
+                if not writers:
+                    writers = {
+                        "gamma": NpyAppendWriter(os.path.join(output_dir, "gamma.npy"), np.float64, (windows.width,)),
+                        "label": NpyAppendWriter(os.path.join(output_dir, "label.npy"), np.bool_),
+                        "row_id": NpyAppendWriter(os.path.join(output_dir, "row_id.npy"), np.int64),
+                    }
+                if windows.width != writers["gamma"].row_shape[0]:
+                    report.skipped.append(row_id)
+                else:
+                    writers["gamma"].append(windows.gamma)
+                    writers["label"].append(windows.label)
+                    writers["row_id"].append(np.full(len(windows), row_id, dtype=np.int64))
+                    report.windows += len(windows)
+                    report.exported.append(row_id)
+            if progress_callback is not None:
+                progress_callback(done, len(rows))
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return report
+
+
+def main():
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        PROJECT_DIR, f"dataset_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    report = export_dataset(
+        Database(),
+        output_dir,
+        progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True)
+    )
+    print(f"\nЭкспортировано окон: {report.windows}, строк: {len(report.exported)}, "
+          f"пропущено строк с другой шириной окна: {len(report.skipped)}")
+    print(f"Результат сохранен в {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import os
+import threading
+import pandas as pd
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from src.batch_import import NamingRule, import_directory
+from src.database import Database
+from src.spectrum_parser import parse_spectrum_file, ParseCancelled
+
+
+class FileImportSignals(QObject):
+    """Сигналы задачи импорта (QRunnable не является QObject и не может испускать сигналы сам)"""
+    # row_id, field, процент выполнения
+    progress = Signal(int, str, int)
+    # row_id, field, имя файла
+    finished = Signal(int, str, str)
+    # row_id, field, текст ошибки
+    failed = Signal(int, str, str)
+    # row_id, field
+    cancelled = Signal(int, str)
+
+
+class FileImportTask(QRunnable):
+    """Разбор файла спектрометра и сохранение его в поле строки базы в рабочем потоке"""
+
+    def __init__(self, db: Database, row_id: int, field: str, file_path: str):
+        super().__init__()
+        self.db = db
+        self.row_id = row_id
+        self.field = field
+        self.file_path = file_path
+        self.signals = FileImportSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _report_progress(self, read_size: int, file_size: int) -> None:
+        percent = 100 if file_size == 0 else int(read_size * 100 / file_size)
+        self.signals.progress.emit(self.row_id, self.field, percent)
+
+    def run(self) -> None:
+        try:
+            frequency, gamma = parse_spectrum_file(
+                self.file_path, progress_callback=self._report_progress, is_cancelled=self.is_cancelled
+            )
+            if self.is_cancelled():
+                raise ParseCancelled(self.file_path)
+            df = pd.DataFrame({
+                'frequency': frequency,
+                'gamma': gamma
+            })
+            file_name = os.path.basename(self.file_path)
+            # Запись в базу сериализуется блокировкой Database
+            if not self.db.set_data(id=self.row_id, field=self.field, field_value=file_name, file_data=df):
+                raise ValueError(f"Row {self.row_id} not found")
+            self.signals.finished.emit(self.row_id, self.field, file_name)
+        except ParseCancelled:
+            self.signals.cancelled.emit(self.row_id, self.field)
+        except Exception as e:
+            print(f"Error loading file: {e}")
+            self.signals.failed.emit(self.row_id, self.field, str(e))
+
+
+class DirectoryImportSignals(QObject):
+    # обработано файлов, всего файлов
+    progress = Signal(int, int)
+    # id добавленных строк
+    finished = Signal(list)
+    # текст ошибки
+    failed = Signal(str)
+
+
+class DirectoryImportTask(QRunnable):
+    """Пакетный импорт директории (src.batch_import.import_directory) в рабочем потоке"""
+
+    def __init__(self, db: Database, directory: str, rule: NamingRule | None = None):
+        super().__init__()
+        self.db = db
+        self.directory = directory
+        self.rule = rule
+        self.signals = DirectoryImportSignals()
+
+    def run(self) -> None:
+        try:
+            row_ids = import_directory(
+                self.db, self.directory, rule=self.rule, progress_callback=self.signals.progress.emit
+            )
+            self.signals.finished.emit(row_ids)
+        except Exception as e:
+            print(f"Error importing directory: {e}")
+            self.signals.failed.emit(str(e))
+
+
+class FileImporter(QObject):
+    """
+    Очередь фонового импорта файлов в ячейки таблицы.
+    Для каждой ячейки (row_id, field) выполняется не более одного импорта: новый импорт отменяет предыдущий.
+    """
+    progress = Signal(int, str, int)
+    finished = Signal(int, str, str)
+    failed = Signal(int, str, str)
+    cancelled = Signal(int, str)
+    directory_progress = Signal(int, int)
+    directory_finished = Signal(list)
+    directory_failed = Signal(str)
+
+    def __init__(self, db: Database, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.thread_pool = QThreadPool(self)
+        self._tasks: dict[tuple[int, str], FileImportTask] = {}
+
+    def start_import(self, row_id: int, field: str, file_path: str) -> None:
+        self.cancel(row_id, field)
+        task = FileImportTask(db=self.db, row_id=row_id, field=field, file_path=file_path)
+        # Сигналы задачи приходят из рабочего потока и обрабатываются в потоке FileImporter
+        task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        self._tasks[(row_id, field)] = task
+        self.thread_pool.start(task)
+
+    def start_directory_import(self, directory: str, rule: NamingRule | None = None) -> None:
+        task = DirectoryImportTask(db=self.db, directory=directory, rule=rule)
+        task.signals.progress.connect(self.directory_progress)
+        task.signals.finished.connect(self.directory_finished)
+        task.signals.failed.connect(self.directory_failed)
+        self.thread_pool.start(task)
+
+    def _is_current(self, row_id: int, field: str) -> bool:
+        """Сигнал пришел от текущей (не отмененной и не замененной) задачи ячейки"""
+        task = self._tasks.get((row_id, field))
+        return task is not None and task.signals is self.sender()
+
+    def _on_progress(self, row_id: int, field: str, percent: int) -> None:
+        if self._is_current(row_id, field):
+            self.progress.emit(row_id, field, percent)
+
+    def _on_finished(self, row_id: int, field: str, file_name: str) -> None:
+        if self._is_current(row_id, field):
+            del self._tasks[(row_id, field)]
+        elif (row_id, field) in self._tasks:
+            # Данные уже перезаписываются более новым импортом этой ячейки
+            return
+        # Данные сохранены в базе, даже если задача была отменена после записи
+        self.finished.emit(row_id, field, file_name)
+
+    def _on_failed(self, row_id: int, field: str, message: str) -> None:
+        if self._is_current(row_id, field):
+            del self._tasks[(row_id, field)]
+            self.failed.emit(row_id, field, message)
+
+    def is_importing(self, row_id: int, field: str) -> bool:
+        return (row_id, field) in self._tasks
+
+    def cancel(self, row_id: int, field: str) -> None:
+        task = self._tasks.pop((row_id, field), None)
+        if task is not None:
+            task.cancel()
+            self.cancelled.emit(row_id, field)
+
+    def cancel_row(self, row_id: int) -> None:
+        for key in [key for key in self._tasks if key[0] == row_id]:
+            self.cancel(*key)
+
+    def cancel_all(self) -> None:
+        for key in list(self._tasks):
+            self.cancel(*key)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        return self.thread_pool.waitForDone(msecs)
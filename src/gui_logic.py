@@ -4,14 +4,27 @@ import shutil
 import numpy as np
 import pandas as pd
 from datetime import datetime
+from functools import partial
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import (
-    QMainWindow, QPushButton, QFileDialog, QTableWidgetItem, QVBoxLayout, QLineEdit, QLabel, QHeaderView, QInputDialog
+    QMainWindow, QPushButton, QCheckBox, QFileDialog, QTableWidgetItem, QVBoxLayout, QLineEdit, QLabel, QHeaderView,
+    QInputDialog, QSlider
 )
 from plotting import Plotter
 from gui import Ui_MainWindow
-from src.constant import PROJECT_DIR
+from src.animation import AnimationPlayer
+from src.background import BackgroundRunner
+from src.constant import PROJECT_DIR, COLUMN_4_ABSORPTION, COLUMN_5_LABELED
 from src.database import Database
+from src.derived import DIFFERENCE, LINE_CANDIDATES
+from src.detect_lines import DETECTED_LINES_FILE_NAME, LINE_DETECTION_JOB, detection_input_hash
+from src.infer_lines import INFERENCE_JOB, inference_input_hash
+from src.inference import InferenceParams, infer_lines, load_model
+from src.line_detection import DetectionParams, detect_lines, merge_detected_lines
+from src.labeling import label_row, labeled_file_name, windows_from_frame, windows_to_frame
+from src.label_all import LABELING_JOB, labeling_input_hash
+from src.resample_all import RESAMPLED_FIELDS, RESAMPLING_JOB, resampling_state_hash
+from src.resampling import DEFAULT_STEP, resample_frames, resampled_file_name
 from src.table import CustomTableWidget
 
 
@@ -21,6 +34,9 @@ class GuiProgram(QMainWindow, Ui_MainWindow):
         self.setupUi(self)
         self.window_width = 50
         self.animation_delay = 200
+        self.animation_row_id = None
+        # Активная строка в формате Database.get_data_row
+        self.active_row = None
         os.makedirs(PROJECT_DIR, exist_ok=True)
         self.init_ui()
 
@@ -30,11 +46,19 @@ class GuiProgram(QMainWindow, Ui_MainWindow):
         self.plotter = Plotter(self)
         self.layout_plot_1.addWidget(self.plotter)
 
+        # Долгие операции над строкой выполняются в рабочих потоках
+        self.background = BackgroundRunner(self)
+        # Производные данные строк, вычисляемые сейчас в фоне: (row_id, имя)
+        self._derived_loading: set[tuple[int, str]] = set()
+
+        # Проигрыватель размеченных интервалов (см. src.animation)
+        self.animation_player = AnimationPlayer(self.plotter.plot_widget, delay=self.animation_delay, parent=self)
+
         # Инициализация базы данных и таблицы
         self.database = Database()
         self.table = CustomTableWidget(
             db=self.database,
-            callback_change_active_row=self.plotter.plot_widget.plot_row
+            callback_change_active_row=self.change_active_row
         )
 
         # Добавляем таблицу в gridLayout слева (в позицию 0, 0)
@@ -49,6 +73,68 @@ class GuiProgram(QMainWindow, Ui_MainWindow):
             "Ширина окна [шт.]:", self.update_window_width, str(self.window_width)
         )
 
+        # Отображение разности спектров с веществом и без вещества
+        self.difference_checkbox = QCheckBox("Показать разность спектров")
+        self.difference_checkbox.toggled.connect(self.plotter.plot_widget.set_show_difference)
+        self.difference_checkbox.toggled.connect(self._load_derived_data)
+        self.control_layout.addWidget(self.difference_checkbox)
+
+        # Отображение кандидатов в линии поглощения (согласованный фильтр)
+        self.line_candidates_checkbox = QCheckBox("Показать кандидатов в линии")
+        self.line_candidates_checkbox.toggled.connect(self.plotter.plot_widget.set_show_line_candidates)
+        self.line_candidates_checkbox.toggled.connect(self._load_derived_data)
+        self.control_layout.addWidget(self.line_candidates_checkbox)
+
+        # Кнопка автоматического поиска линий поглощения в выбранной строке
+        self.detect_lines_button = QPushButton("Найти линии поглощения")
+        self.detect_lines_button.clicked.connect(self.detect_lines_selected_row)
+        self.control_layout.addWidget(self.detect_lines_button)
+
+        # Кнопка распознавания линий поглощения моделью в выбранной строке
+        self.infer_lines_button = QPushButton("Распознать линии (модель)")
+        self.infer_lines_button.clicked.connect(self.infer_lines_selected_row)
+        self.control_layout.addWidget(self.infer_lines_button)
+
+        # Кнопка разметки выбранной строки
+        self.mark_button = QPushButton("Разметить строку")
+        self.mark_button.clicked.connect(self.mark_data)
+        self.control_layout.addWidget(self.mark_button)
+
+        # Анимация размеченных интервалов выбранной строки: задержка, запуск/пауза, перемотка
+        self.delay_input = self._add_control(
+            "Задержка анимации [мс]:", self.update_animation_delay, str(self.animation_delay)
+        )
+        self.animation_button = QPushButton("Анимация разметки")
+        self.animation_button.clicked.connect(self.toggle_animation)
+        self.control_layout.addWidget(self.animation_button)
+        self.animation_slider = QSlider(Qt.Horizontal)
+        self.animation_slider.setEnabled(False)
+        self.animation_slider.valueChanged.connect(self.animation_player.seek)
+        self.control_layout.addWidget(self.animation_slider)
+        self.animation_label = QLabel()
+        self.control_layout.addWidget(self.animation_label)
+        self.animation_player.frame_changed.connect(self._show_animation_frame)
+        self.animation_player.finished.connect(lambda: self._show_status_message("Анимация завершена"))
+
+        # Кнопка интерполяции выбранной строки на равномерную сетку
+        self.interpolate_button = QPushButton("Интерполировать строку")
+        self.interpolate_button.clicked.connect(self.interpolate_selected_row)
+        self.control_layout.addWidget(self.interpolate_button)
+
+        # Кнопка пакетного импорта директории файлов
+        self.import_directory_button = QPushButton("Импорт директории")
+        self.import_directory_button.clicked.connect(self.import_directory)
+        self.control_layout.addWidget(self.import_directory_button)
+        self.table.file_importer.directory_progress.connect(
+            lambda done, total: self._show_status_message(f"Импорт файлов: {done}/{total}")
+        )
+        self.table.file_importer.directory_finished.connect(
+            lambda row_ids: self._show_status_message(f"Импортировано строк: {len(row_ids)}")
+        )
+        self.table.file_importer.directory_failed.connect(
+            lambda message: self._show_status_message(f"Ошибка импорта: {message}")
+        )
+
         # Настраиваем растяжение столбцов в gridLayout
         self.widget_menu.layout().setColumnStretch(0, 2)  # Таблица получает больше пространства
         self.widget_menu.layout().setColumnStretch(1, 1)  # Элементы управления меньше
@@ -61,6 +147,18 @@ class GuiProgram(QMainWindow, Ui_MainWindow):
         self.control_layout.addWidget(label)
         self.control_layout.addWidget(input_field)
         return input_field
+
+    def import_directory(self):
+        """Пакетный импорт директории с файлами спектрометра."""
+        directory = QFileDialog.getExistingDirectory(self, "Выберите директорию")
+        if not directory:
+            return
+        self._show_status_message("Импорт директории...")
+        self.table.import_directory(directory)
+
+    def _show_status_message(self, message: str):
+        """Отображает сообщение в статус-баре."""
+        self.statusbar.showMessage(message, 5000)
     #
     # def plot_selected_row(self):
     #     """Отрисовывает данные выбранной строки."""
@@ -221,131 +319,265 @@ class GuiProgram(QMainWindow, Ui_MainWindow):
         try:
             self.window_width = int(text)
             self._show_status_message(f"Ширина окна: {self.window_width}")
-            self.plot_selected_row()
         except ValueError:
             self._show_status_message("Ширина окна должна быть числом")
-    #
-    # def update_animation_delay(self, text: str):
-    #     """Обновляет задержку анимации."""
-    #     try:
-    #         self.animation_delay = int(text)
-    #         self._show_status_message(f"Задержка анимации: {self.animation_delay} мс")
-    #         if self.animation_timer.isActive():
-    #             self.animation_timer.stop()
-    #             self.animation_timer.start(self.animation_delay)
-    #     except ValueError:
-    #         self._show_status_message("Задержка анимации должна быть числом")
-    #
+
+    def update_animation_delay(self, text: str):
+        """Обновляет задержку анимации (применяется и к идущей анимации)."""
+        try:
+            self.animation_delay = int(text)
+            self.animation_player.set_delay(self.animation_delay)
+            self._show_status_message(f"Задержка анимации: {self.animation_delay} мс")
+        except ValueError:
+            self._show_status_message("Задержка анимации должна быть числом")
+
+    def change_active_row(self, row_data):
+        """Смена активной строки: анимация прежней строки сбрасывается, новая строка отрисовывается."""
+        self._reset_animation()
+        self.active_row = row_data
+        self.plotter.plot_widget.plot_row(row_data)
+        self._load_derived_data()
+
+    def _load_derived_data(self, *_):
+        """
+        Вычисляет в фоне производные данные активной строки, включенные для отображения и еще не вычисленные
+        (разность спектров, кандидаты в линии). По готовности строка перерисовывается.
+        """
+        if self.active_row is None:
+            return
+        row_id, _, row_data = self.active_row
+        shown = {
+            DIFFERENCE: self.difference_checkbox.isChecked() and row_data.has_without_substance(),
+            LINE_CANDIDATES: self.line_candidates_checkbox.isChecked(),
+        }
+        for name, show in shown.items():
+            if not show or not row_data.has_with_substance() or getattr(row_data, name) is not None:
+                continue
+            if (row_id, name) in self._derived_loading:
+                continue
+            self._derived_loading.add((row_id, name))
+            self.background.start(
+                partial(self.database.get_derived_data, row_id, name, mmap=True),
+                on_finished=partial(self._on_derived_data_loaded, row_id, name, row_data),
+                on_failed=partial(self._on_derived_data_failed, row_id, name)
+            )
+
+    def _on_derived_data_loaded(self, row_id: int, name: str, row_data, data) -> None:
+        self._derived_loading.discard((row_id, name))
+        if data is None:
+            return
+        # Данные сохраняются в RowData кэша строк и используются при следующем выборе строки
+        row_data.set_derived(name, data)
+        # Строку перерисовываем, только если она еще активна и не показывается анимация
+        if self.active_row is not None and self.active_row[2] is row_data and self.animation_row_id is None:
+            self.plotter.plot_widget.plot_row(self.active_row)
+
+    def _on_derived_data_failed(self, row_id: int, name: str, message: str) -> None:
+        self._derived_loading.discard((row_id, name))
+        self._show_status_message(f"Ошибка вычисления {name}: {message}")
+
+    def _reset_animation(self):
+        self.animation_player.stop()
+        self.animation_row_id = None
+        self.animation_slider.setEnabled(False)
+        self.animation_label.clear()
+
+    def toggle_animation(self):
+        """Запускает анимацию размеченных окон выбранной строки или ставит ее на паузу."""
+        if self.animation_row_id is None:
+            selected = self._selected_row_data()
+            if selected is None:
+                return
+            row_id, row_data = selected
+            if not row_data.has_labeled_data():
+                self._show_status_message("Нет размеченных интервалов для анимации, разметьте строку")
+                return
+            # Окна строки загружаются один раз, далее кадры только переключаются
+            self.animation_player.load(windows_from_frame(row_data.labeled_data))
+            self.animation_row_id = row_id
+            self.animation_slider.blockSignals(True)
+            self.animation_slider.setRange(0, max(len(self.animation_player) - 1, 0))
+            self.animation_slider.blockSignals(False)
+            self.animation_slider.setEnabled(True)
+        self.animation_player.toggle()
+
+    def _show_animation_frame(self, frame: int, total: int):
+        self.animation_slider.blockSignals(True)
+        self.animation_slider.setValue(frame)
+        self.animation_slider.blockSignals(False)
+        kind = "положительный" if self.animation_player.label[frame] else "отрицательный"
+        self.animation_label.setText(f"Интервал {frame + 1}/{total} ({kind})")
+    #
+    def _selected_row_data(self):
+        """Возвращает (row_id, RowData) выбранной строки или None с сообщением в статус-баре."""
+        selected_rows = self.table.selectedRows()
+        row_id = self.database.get_row_id_by_number(selected_rows[0]) if selected_rows else None
+        loaded = self.table.get_data_row(row_id) if row_id is not None else None
+        if loaded is None:
+            self._show_status_message("Выберите строку")
+            return None
+        return loaded[0], loaded[2]
+
+    def detect_lines_selected_row(self):
+        """Автоматический поиск линий поглощения в выбранной строке (см. src.line_detection)."""
+        selected = self._selected_row_data()
+        if selected is None:
+            return
+        row_id, row_data = selected
+        if not row_data.has_with_substance():
+            self._show_status_message("Для поиска линий нужны данные с веществом")
+            return
+        self._start_row_task(
+            self.detect_lines_button,
+            row_id,
+            "Поиск линий поглощения...",
+            partial(self._detect_lines, row_id, row_data, DetectionParams()),
+            lambda count: f"Найдено линий: {count}"
+        )
+
+    def _detect_lines(self, row_id: int, row_data, params: DetectionParams) -> int:
+        """Выполняется в рабочем потоке: поиск и сохранение линий, возвращает количество найденных линий"""
+        detected = detect_lines(row_data.with_substance, row_data.without_substance, params)
+        self._save_found_lines(row_id, row_data, detected)
+        self.database.set_job_hash(row_id, LINE_DETECTION_JOB, detection_input_hash(self.database, row_id, params))
+        return len(detected)
+
+    def infer_lines_selected_row(self):
+        """Распознавание линий поглощения моделью в выбранной строке (см. src.inference)."""
+        selected = self._selected_row_data()
+        if selected is None:
+            return
+        row_id, row_data = selected
+        if not row_data.has_with_substance():
+            self._show_status_message("Для распознавания линий нужны данные с веществом")
+            return
+        self._start_row_task(
+            self.infer_lines_button,
+            row_id,
+            "Распознавание линий поглощения...",
+            partial(self._infer_lines, row_id, row_data, self.window_width, InferenceParams()),
+            lambda count: f"Распознано линий: {count}"
+        )
+
+    def _infer_lines(self, row_id: int, row_data, window_width: int, params: InferenceParams) -> int:
+        """Выполняется в рабочем потоке: распознавание и сохранение линий, возвращает количество линий"""
+        model = load_model(window_width=window_width)
+        inferred = infer_lines(row_data.with_substance, model, params)
+        self._save_found_lines(row_id, row_data, inferred)
+        self.database.set_job_hash(row_id, INFERENCE_JOB, inference_input_hash(self.database, row_id, model, params))
+        return len(inferred)
+
+    def _save_found_lines(self, row_id: int, row_data, found: pd.DataFrame) -> None:
+        """Заменяет автоматические точки строки (src=True) найденными, точки, проставленные вручную, сохраняются"""
+        _, _, row_name = self.database.get_names_row(row_id)
+        self.database.set_data(
+            id=row_id,
+            field=COLUMN_4_ABSORPTION,
+            field_value=row_name.absorption_lines or DETECTED_LINES_FILE_NAME,
+            file_data=merge_detected_lines(row_data.absorption_lines, found)
+        )
+
     def mark_data(self):
-        pass
-    #     """Размечает данные выбранной строки."""
-    #     if not self.selected_row_number_valid():
-    #         return
-    #     row = self.selected_row_number
-    #     self._show_status_message("Разметка данных...")
-    #
-    #     # Получаем данные
-    #     with_substance = self.selected_row_data.get_with_substance()
-    #     result = self.selected_row_data.get_result()
-    #     if with_substance is None or result is None:
-    #         self._show_status_message("Для разметки нужны данные с веществом и результат")
-    #         log.error("Отсутствуют данные with_substance или result")
-    #         return
-    #
-    #     freq_with = with_substance['frequency']
-    #     gamma_with = with_substance['gamma']
-    #     result_freq = result['frequency']
-    #     if freq_with.empty or gamma_with.empty or result_freq.empty:
-    #         self._show_status_message("Данные пусты или некорректны")
-    #         log.error("Пустые столбцы frequency или gamma")
-    #         return
-    #
-    #     labeled_data = []
-    #     half_window = self.window_width // 2
-    #
-    #     # Позитивные интервалы (с точками поглощения)
-    #     for point_freq in result_freq:
-    #         idx = min(range(len(freq_with)), key=lambda i: abs(freq_with[i] - point_freq))
-    #         start = max(0, idx - half_window)
-    #         end = min(len(freq_with), idx + half_window + 1)
-    #         if start == 0:
-    #             prefix = [freq_with.iloc[0]] * (half_window - idx)
-    #             freq_segment = prefix + freq_with.iloc[:end].tolist()
-    #             gamma_segment = [gamma_with.iloc[0]] * (half_window - idx) + gamma_with.iloc[:end].tolist()
-    #         elif end == len(freq_with):
-    #             suffix = [freq_with.iloc[-1]] * (half_window - (len(freq_with) - idx - 1))
-    #             freq_segment = freq_with.iloc[start:].tolist() + suffix
-    #             gamma_segment = gamma_with.iloc[start:].tolist() + [gamma_with.iloc[-1]] * (
-    #                         half_window - (len(freq_with) - idx - 1))
-    #         else:
-    #             freq_segment = freq_with.iloc[start:end].tolist()
-    #             gamma_segment = gamma_with.iloc[start:end].tolist()
-    #         labeled_data.append((freq_segment, gamma_segment, True))
-    #
-    #     # Индексы, занятые позитивными интервалами
-    #     point_indices = [min(range(len(freq_with)), key=lambda i: abs(freq_with[i] - f)) for f in result_freq]
-    #     used_indices = set()
-    #     for idx in point_indices:
-    #         used_indices.update(range(max(0, idx - half_window), min(len(freq_with), idx + half_window + 1)))
-    #
-    #     # Негативные интервалы (без точек поглощения)
-    #     unmarked_count = len(labeled_data)
-    #     i = 0
-    #     while len(labeled_data) < unmarked_count * 2 and i < len(freq_with):
-    #         if i not in used_indices:
-    #             start = max(0, i - half_window)
-    #             end = min(len(freq_with), i + half_window + 1)
-    #             if not any(start <= idx < end for idx in used_indices):
-    #                 if start == 0:
-    #                     prefix = [freq_with.iloc[0]] * (half_window - i)
-    #                     freq_segment = prefix + freq_with.iloc[:end].tolist()
-    #                     gamma_segment = [gamma_with.iloc[0]] * (half_window - i) + gamma_with.iloc[:end].tolist()
-    #                 elif end == len(freq_with):
-    #                     suffix = [freq_with.iloc[-1]] * (half_window - (len(freq_with) - i - 1))
-    #                     freq_segment = freq_with.iloc[start:].tolist() + suffix
-    #                     gamma_segment = gamma_with.iloc[start:].tolist() + [gamma_with.iloc[-1]] * (
-    #                                 half_window - (len(freq_with) - i - 1))
-    #                 else:
-    #                     freq_segment = freq_with.iloc[start:end].tolist()
-    #                     gamma_segment = gamma_with.iloc[start:end].tolist()
-    #                 labeled_data.append((freq_segment, gamma_segment, False))
-    #                 used_indices.update(range(start, end))
-    #         i += 1
-    #
-    #     # Создаем DataFrame для размеченных данных
-    #     df = pd.DataFrame({
-    #         'frequency': [f for freq_segment, _, _ in labeled_data for f in freq_segment],
-    #         'gamma': [g for _, gamma_segment, _ in labeled_data for g in gamma_segment],
-    #         'label': [l for _, _, l in labeled_data for _ in range(len(labeled_data[0][0]))]
-    #     })
-    #
-    #     # Сохраняем в CSV
-    #     row_dir = self.ensure_row_dir(row)
-    #     output_file = os.path.join(row_dir, f"labeled_data_row_{row}.csv")
-    #     df.to_csv(output_file, index=False)
-    #
-    #     # Обновляем DataRow и таблицу
-    #     self.data_files.at[row, "labeled"] = os.path.basename(output_file)
-    #     self._update_table_cell(row, 4, "Размечено")
-    #     self.save_state()  # Сохраняем состояние после разметки
-    #     self._show_status_message(f"Разметка завершена, сохранено в {output_file}")
-    #     log.info(f"Разметка завершена для строки {row}, сохранено в {output_file}")
-    #
-    # def interpolate_selected_row(self):
-    #     """Интерполирует данные выбранной строки."""
-    #     if not self.selected_row_number_valid():
-    #         return
-    #     step, ok = QInputDialog.getDouble(self, "Шаг интерполяции", "Введите шаг:", 0.06, 0.01, 1.0, 2)
-    #     if not ok:
-    #         return
-    #     self.selected_row_data.interpolate_data(step)
-    #     row_dir = self.ensure_row_dir(self.selected_row_number)
-    #     for attr in ["with_substance_path", "without_substance_path", "result_path"]:
-    #         if getattr(self.selected_row_data, attr):
-    #             self.data_files.at[self.selected_row_number, attr.split("_path")[0]] = os.path.basename(
-    #                 getattr(self.selected_row_data, attr))
-    #     self.plot_selected_row()
-    #     self._show_status_message("Данные интерполированы")
+        """Размечает данные выбранной строки (см. src.labeling)."""
+        selected = self._selected_row_data()
+        if selected is None:
+            return
+        row_id, row_data = selected
+        if not row_data.has_with_substance() or not row_data.has_absorption_lines():
+            self._show_status_message("Для разметки нужны данные с веществом и линии поглощения")
+            return
+        self._start_row_task(
+            self.mark_button,
+            row_id,
+            "Разметка данных...",
+            partial(self._label_row, row_id, row_data, self.window_width),
+            lambda count: f"Разметка завершена, окон: {count}"
+        )
+
+    def _label_row(self, row_id: int, row_data, window_width: int) -> int:
+        """Выполняется в рабочем потоке: разметка и сохранение окон строки, возвращает количество окон"""
+        windows = label_row(row_data.with_substance, row_data.absorption_lines, window_width=window_width)
+        self.database.set_data(
+            id=row_id,
+            field=COLUMN_5_LABELED,
+            field_value=labeled_file_name(window_width),
+            file_data=windows_to_frame(windows)
+        )
+        # Пакетная разметка (src.label_all) не будет повторно размечать строку с теми же данными
+        input_hash = labeling_input_hash(self.database, row_id, window_width)
+        if input_hash is not None:
+            self.database.set_job_hash(row_id, LABELING_JOB, input_hash)
+        return len(windows)
+
+    def _start_row_task(self, button: QPushButton, row_id: int, status: str, function, done_message) -> None:
+        """
+        Выполняет долгую операцию над строкой в рабочем потоке (см. src.background).
+        Кнопка операции недоступна до ее окончания, по окончании строка таблицы и график обновляются.
+        """
+        button.setEnabled(False)
+        self._show_status_message(status)
+        self.background.start(
+            function,
+            on_finished=partial(self._on_row_task_finished, button, row_id, done_message),
+            on_failed=partial(self._on_row_task_failed, button)
+        )
+
+    def _on_row_task_finished(self, button: QPushButton, row_id: int, done_message, result) -> None:
+        button.setEnabled(True)
+        self.table.table_model.refresh_row(row_id)
+        # Пока шла операция, пользователь мог выбрать другую строку - тогда ее график не перерисовываем
+        # (для активной строки перерисовка сбрасывает и устаревшую анимацию разметки)
+        if self.active_row is not None and self.active_row[0] == row_id:
+            self.table.updated_data_in_row(row_id)
+        self._show_status_message(done_message(result))
+
+    def _on_row_task_failed(self, button: QPushButton, message: str) -> None:
+        button.setEnabled(True)
+        self._show_status_message(f"Ошибка: {message}")
+    #
+    def interpolate_selected_row(self):
+        """Передискретизирует спектры выбранной строки на равномерную сетку (см. src.resampling)."""
+        selected = self._selected_row_data()
+        if selected is None:
+            return
+        row_id, row_data = selected
+        if not row_data.has_with_substance() and not row_data.has_without_substance():
+            self._show_status_message("Нет спектров для интерполяции")
+            return
+        step, ok = QInputDialog.getDouble(self, "Шаг интерполяции", "Введите шаг:", DEFAULT_STEP, 0.01, 1.0, 2)
+        if not ok:
+            return
+        _, _, row_name = self.database.get_names_row(row_id)
+        # Передискретизируются копии: RowData строки общая с кэшем и графиком и меняется только после сохранения.
+        # Поля, файлы которых не загрузились, пропускаются
+        frames = {
+            field: getattr(row_data, field)
+            for field in RESAMPLED_FIELDS
+            if getattr(row_name, field) and getattr(row_data, field) is not None and not getattr(row_data, field).empty
+        }
+        self._start_row_task(
+            self.interpolate_button,
+            row_id,
+            "Интерполяция данных...",
+            partial(self._resample_row, row_id, row_name, frames, step),
+            lambda count: f"Данные интерполированы, спектров: {count}"
+        )
+
+    def _resample_row(self, row_id: int, row_name, frames: dict[str, pd.DataFrame], step: float) -> int:
+        """Выполняется в рабочем потоке: передискретизация и сохранение спектров, возвращает количество спектров"""
+        resampled = resample_frames(frames, step)
+        # Новые спектры сохраняются под новыми именами, исходные файлы остаются в директории строки.
+        # Без общего batch(): файлы пишутся вне блокировки базы, и поток интерфейса не ждет окончания записи.
+        # Хэш записывается последним, поэтому прерванная интерполяция не считается выполненной
+        for field, data in resampled.items():
+            self.database.set_data(
+                id=row_id,
+                field=field,
+                field_value=resampled_file_name(getattr(row_name, field), step),
+                file_data=data
+            )
+        self.database.set_job_hash(row_id, RESAMPLING_JOB, resampling_state_hash(self.database, row_id, step))
+        return len(resampled)
     #
     # def selected_row_number_valid(self) -> bool:
     #     """Проверяет, выбрана ли строка."""
@@ -490,7 +722,3 @@ class GuiProgram(QMainWindow, Ui_MainWindow):
     #         self.tableWidget.selectRow(0)
     #         self.plot_selected_row()
     #     log.info(f"Загружено строк: {self.tableWidget.rowCount()}")
-    #
-    # def _show_status_message(self, message: str):
-    #     """Отображает сообщение в статус-баре."""
-    #     self.statusbar.showMessage(message, 5000)
@@ -0,0 +1,139 @@
+"""
+Распознавание линий поглощения моделью во всех строках базы (см. src.inference) в пуле процессов.
+Найденные линии записываются в absorption_lines с src=True, точки, проставленные вручную, сохраняются.
+Запуск: python -m src.infer_lines [--model window_model.npz | --model модуль:функция] [--train DATASET_DIR]
+                                  [--window-width N] [--batch-size N] [--stride N] [--threshold P]
+                                  [--min-distance N] [--workers N] [--force]
+С --train модель LinearWindowModel обучается по набору src.export_dataset и сохраняется в --model
+(по умолчанию в DEFAULT_MODEL_PATH) перед распознаванием.
+Строки, спектры которых не изменились с последнего распознавания той же моделью, пропускаются.
+"""
+import os
+import argparse
+import numpy as np
+from functools import partial
+from typing import Callable
+
+from src.constant import COLUMN_2_WITH_SUB, COLUMN_4_ABSORPTION
+from src.content_hash import combine_hash
+from src.database import Database
+from src.detect_lines import DETECTED_LINES_FILE_NAME
+from src.inference import (
+    DEFAULT_MODEL_PATH, InferenceParams, LinearWindowModel, WindowModel, infer_lines, load_model, model_fingerprint
+)
+from src.labeling import DEFAULT_WINDOW_WIDTH
+from src.line_detection import merge_detected_lines
+from src.row_data import RowFiles
+from src.row_jobs import FieldUpdate, RowJobsReport, run_row_jobs
+
+# Имя задания распознавания в таблице хэшей обработки строк
+INFERENCE_JOB = "inference"
+
+
+def infer_row_job(row_files: RowFiles, model: WindowModel, params: InferenceParams) -> list[FieldUpdate]:
+    """Выполняется в процессе пула: распознает линии в спектре строки и объединяет их с точками строки"""
+    with_substance = row_files.read(COLUMN_2_WITH_SUB)
+    if with_substance is None or with_substance.empty:
+        return []
+    inferred = infer_lines(with_substance, model, params)
+    return [FieldUpdate(
+        field=COLUMN_4_ABSORPTION,
+        field_value=row_files.row_name.absorption_lines or DETECTED_LINES_FILE_NAME,
+        file_data=merge_detected_lines(row_files.read(COLUMN_4_ABSORPTION), inferred)
+    )]
+
+
+def inference_input_hash(db: Database, row_id: int, model: WindowModel, params: InferenceParams) -> str:
+    # Размер пакета на результат не влияет
+    return combine_hash(
+        db.get_field_hash(row_id, COLUMN_2_WITH_SUB), model_fingerprint(model),
+        params.stride, params.threshold, params.min_distance
+    )
+
+
+def rows_to_infer(db: Database, model: WindowModel, params: InferenceParams, force: bool = False) -> dict[int, str]:
+    """Строки со спектром, не обработанные моделью на текущих данных: id строки -> хэш входных данных"""
+    rows = {}
+    for row_id, _, row_name in db.get_names_all_rows():
+        if not row_name.with_substance:
+            continue
+        input_hash = inference_input_hash(db, row_id, model, params)
+        if force or db.get_job_hash(row_id, INFERENCE_JOB) != input_hash:
+            rows[row_id] = input_hash
+    return rows
+
+
+def infer_all_rows(
+        db: Database,
+        model: WindowModel,
+        params: InferenceParams = InferenceParams(),
+        workers: int | None = None,
+        force: bool = False,
+        progress_callback: Callable[[int, int], None] | None = None
+) -> RowJobsReport:
+    """Распознает линии во всех строках базы, возвращает итог обработки (модель передается в процессы пула)"""
+    rows = rows_to_infer(db, model, params, force=force)
+    return run_row_jobs(
+        db,
+        list(rows),
+        partial(infer_row_job, model=model, params=params),
+        workers=workers,
+        progress_callback=progress_callback,
+        on_row_done=lambda row_id, _: db.set_job_hash(row_id, INFERENCE_JOB, rows[row_id])
+    )
+
+
+def train_model(dataset_dir: str) -> LinearWindowModel:
+    """Обучает LinearWindowModel по набору данных src.export_dataset (файлы читаются отображением в память)"""
+    gamma = np.load(os.path.join(dataset_dir, "gamma.npy"), mmap_mode="r")
+    label = np.load(os.path.join(dataset_dir, "label.npy"), mmap_mode="r")
+    return LinearWindowModel.fit(gamma, label)
+
+
+def main():
+    defaults = InferenceParams()
+    parser = argparse.ArgumentParser(description="Распознавание линий поглощения моделью во всех строках базы")
+    parser.add_argument("--model", default=None, help="файл .npz или модуль:функция, создающая модель")
+    parser.add_argument("--train", default=None, help="обучить модель по директории набора данных")
+    parser.add_argument(
+        "--window-width", type=int, default=DEFAULT_WINDOW_WIDTH, help="ширина окна модели по умолчанию"
+    )
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size, help="окон в одном вызове модели")
+    parser.add_argument("--stride", type=int, default=defaults.stride, help="шаг между окнами")
+    parser.add_argument("--threshold", type=float, default=defaults.threshold, help="порог оценки модели")
+    parser.add_argument("--min-distance", type=int, default=defaults.min_distance, help="расстояние между линиями")
+    parser.add_argument("--workers", type=int, default=None, help="количество процессов")
+    parser.add_argument("--force", action="store_true", help="выполнить распознавание заново во всех строках")
+    args = parser.parse_args()
+
+    if args.train is not None and args.model is not None and not args.model.endswith(".npz"):
+        parser.error("--train saves a LinearWindowModel, --model must be a .npz path")
+    if args.train is not None:
+        model_path = args.model or DEFAULT_MODEL_PATH
+        model = train_model(args.train)
+        os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+        model.save(model_path)
+        print(f"Модель обучена и сохранена в {model_path}")
+    else:
+        model = load_model(args.model, window_width=args.window_width)
+    params = InferenceParams(
+        batch_size=args.batch_size,
+        stride=args.stride,
+        threshold=args.threshold,
+        min_distance=args.min_distance
+    )
+    report = infer_all_rows(
+        Database(),
+        model,
+        params=params,
+        workers=args.workers,
+        force=args.force,
+        progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True)
+    )
+    print(f"\nОбработано строк: {len(report.updated)}, пропущено: {len(report.skipped)}, ошибок: {len(report.failed)}")
+    for row_id, message in report.failed.items():
+        print(f"Строка {row_id}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Распознавание линий поглощения моделью по скользящим окнам спектра.
+Спектр с веществом нарезается на окна ширины модели (как при разметке, см. src.labeling) представлением
+без копирования, модель получает окна большими пакетами и возвращает оценку наличия линии в центре окна.
+Локальные максимумы оценок выше порога переводятся в частоты и сохраняются в absorption_lines с src=True.
+
+Модель - любой объект с атрибутом window_width и методом predict(windows (B, W)) -> (B,) оценок в [0, 1]
+(протокол WindowModel). Модель по умолчанию - логистическая регрессия на NumPy (LinearWindowModel),
+обучается по набору данных src.export_dataset.
+"""
+import hashlib
+import importlib
+import os
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Protocol, runtime_checkable
+
+from src.constant import PROJECT_DIR
+from src.labeling import window_size
+from src.matched_filter import LORENTZ, line_template
+from src.peaks import fill_nan, gamma_at, local_maxima
+
+# Файл обученной модели по умолчанию (если его нет, используется модель-шаблон LinearWindowModel.default)
+DEFAULT_MODEL_PATH: str = os.path.join(PROJECT_DIR, "window_model.npz")
+# Порог модели-шаблона. Веса шаблона единичной нормы, а норма нормированного окна - sqrt(W), поэтому
+# логит равен sqrt(W) * корреляция + bias, а корреляция окна шума с шаблоном имеет разброс 1 / sqrt(W).
+# Оценка 0.5 - при корреляции DEFAULT_NOISE_SIGMAS / sqrt(W) (превышение шума в 5 раз),
+# но не выше MAX_CORRELATION_THRESHOLD, чтобы порог был достижим и для узких окон (W < 25)
+DEFAULT_NOISE_SIGMAS: float = 5.0
+MAX_CORRELATION_THRESHOLD: float = 0.8
+
+
+@runtime_checkable
+class WindowModel(Protocol):
+    window_width: int
+
+    def predict(self, windows: np.ndarray) -> np.ndarray:
+        """Оценки (B,) наличия линии в центре окон (B, window_width)"""
+        ...
+
+
+@dataclass(frozen=True)
+class InferenceParams:
+    # Количество окон в одном вызове модели
+    batch_size: int = 65536
+    # Шаг между центрами окон [точек]
+    stride: int = 1
+    # Порог оценки модели
+    threshold: float = 0.5
+    # Минимальное расстояние между линиями [точек]
+    min_distance: int = 50
+
+
+@dataclass(frozen=True, eq=False)
+class LinearWindowModel:
+    """
+    Логистическая регрессия по нормированному окну: sigmoid(weights · z + bias),
+    z - окно за вычетом своего среднего, деленное на свое стандартное отклонение.
+    """
+    weights: np.ndarray
+    bias: float
+
+    @property
+    def window_width(self) -> int:
+        return len(self.weights)
+
+    def predict(self, windows: np.ndarray) -> np.ndarray:
+        return 1 / (1 + np.exp(-self._logits(windows)))
+
+    def _logits(self, windows: np.ndarray) -> np.ndarray:
+        # Нормировка окон не материализуется: w · (x - m) / s = (w · x - m * sum(w)) / s
+        width = windows.shape[1]
+        mean = windows.sum(axis=1) / width
+        variance = np.maximum(np.einsum("ij,ij->i", windows, windows) / width - mean ** 2, 0)
+        std = np.sqrt(variance)
+        std[std == 0] = 1
+        return (windows @ self.weights - mean * self.weights.sum()) / std + self.bias
+
+    def fingerprint(self) -> str:
+        """Хэш параметров модели (для пропуска строк, уже обработанных этой моделью)"""
+        digest = hashlib.blake2b(np.ascontiguousarray(self.weights, dtype=np.float64).tobytes(), digest_size=16)
+        digest.update(repr(float(self.bias)).encode())
+        return digest.hexdigest()
+
+    @classmethod
+    def default(cls, window_width: int) -> "LinearWindowModel":
+        """
+        Модель без обучения: веса - лоренцев шаблон (согласованный фильтр) с полушириной в 1/10 окна,
+        оценка 0.5 - при корреляции окна с шаблоном min(DEFAULT_NOISE_SIGMAS / sqrt(W), MAX_CORRELATION_THRESHOLD).
+        """
+        half = window_size(window_width) // 2
+        template = line_template(LORENTZ, max(window_size(window_width) / 10, 1.0))
+        # Шаблон обрезается или дополняется нулями до ширины окна и снова нормируется
+        template_half = len(template) // 2
+        weights = np.zeros(2 * half + 1)
+        shift = min(half, template_half)
+        weights[half - shift:half + shift + 1] = template[template_half - shift:template_half + shift + 1]
+        weights -= weights.mean()
+        weights /= np.linalg.norm(weights)
+        correlation = min(DEFAULT_NOISE_SIGMAS / np.sqrt(len(weights)), MAX_CORRELATION_THRESHOLD)
+        return cls(weights=weights, bias=-float(np.sqrt(len(weights)) * correlation))
+
+    @classmethod
+    def fit(
+            cls,
+            gamma: np.ndarray,
+            label: np.ndarray,
+            l2: float = 1.0,
+            iterations: int = 10,
+            batch_size: int = 65536
+    ) -> "LinearWindowModel":
+        """
+        Обучение методом Ньютона по размеченным окнам gamma (N, W) и меткам label (N,).
+        Градиент и гессиан накапливаются по пакетам, поэтому gamma может быть отображена в память (np.load mmap_mode).
+        """
+        width = gamma.shape[1]
+        # Параметры - веса и сдвиг, регуляризуются только веса
+        params = np.zeros(width + 1)
+        regularization = np.full(width + 1, l2)
+        regularization[-1] = 0
+        for _ in range(iterations):
+            model = cls(weights=params[:-1], bias=float(params[-1]))
+            gradient = regularization * params
+            hessian = np.diag(regularization)
+            for start in range(0, len(gamma), batch_size):
+                windows = np.asarray(gamma[start:start + batch_size], dtype=np.float64)
+                z = _normalize(windows)
+                features = np.hstack([z, np.ones((len(z), 1))])
+                probability = model.predict(windows)
+                gradient += features.T @ (probability - label[start:start + batch_size])
+                hessian += (features * (probability * (1 - probability))[:, None]).T @ features
+            step = np.linalg.solve(hessian, gradient)
+            params = params - step
+            if np.max(np.abs(step)) < 1e-6:
+                break
+        return cls(weights=params[:-1], bias=float(params[-1]))
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as file:
+            np.savez(file, weights=self.weights, bias=self.bias)
+
+    @classmethod
+    def load(cls, path: str) -> "LinearWindowModel":
+        with np.load(path) as data:
+            return cls(weights=data["weights"].astype(np.float64), bias=float(data["bias"]))
+
+
+def _normalize(windows: np.ndarray) -> np.ndarray:
+    std = windows.std(axis=1, keepdims=True)
+    std[std == 0] = 1
+    return (windows - windows.mean(axis=1, keepdims=True)) / std
+
+
+def load_model(spec: str | None = None, window_width: int | None = None) -> WindowModel:
+    """
+    Модель распознавания по описанию:
+    путь к .npz - LinearWindowModel.load, "модуль:функция" - результат вызова функции (подключаемая модель),
+    None - DEFAULT_MODEL_PATH, если файл есть, иначе LinearWindowModel.default(window_width).
+    """
+    if spec is None:
+        if os.path.exists(DEFAULT_MODEL_PATH):
+            return LinearWindowModel.load(DEFAULT_MODEL_PATH)
+        if window_width is None:
+            raise ValueError("Window width is required for the default model")
+        return LinearWindowModel.default(window_width)
+    if spec.endswith(".npz"):
+        return LinearWindowModel.load(spec)
+    module_name, _, factory_name = spec.partition(":")
+    if not factory_name:
+        raise ValueError(f"Model must be a .npz file or 'module:factory', got {spec!r}")
+    model = getattr(importlib.import_module(module_name), factory_name)()
+    if not isinstance(model, WindowModel):
+        raise TypeError(f"{spec} did not return a model with window_width and predict()")
+    return model
+
+
+def model_fingerprint(model: WindowModel) -> str:
+    """Хэш модели; для подключаемых моделей без fingerprint() - имя класса и ширина окна"""
+    fingerprint = getattr(model, "fingerprint", None)
+    if fingerprint is not None:
+        return fingerprint()
+    return f"{type(model).__module__}.{type(model).__qualname__}/{model.window_width}"
+
+
+def sliding_windows(gamma: np.ndarray, window_width: int, stride: int = 1) -> np.ndarray:
+    """
+    Окна (K, W) с центрами 0, stride, 2 * stride, ... - представление без копирования
+    (копируется только спектр при дополнении краев крайними значениями, как при разметке).
+    """
+    half = window_size(window_width) // 2
+    padded = np.pad(np.asarray(gamma, dtype=np.float64), half, mode="edge")
+    return sliding_window_view(padded, 2 * half + 1)[::stride]
+
+
+def window_scores(
+        gamma: np.ndarray,
+        model: WindowModel,
+        params: InferenceParams = InferenceParams()
+) -> tuple[np.ndarray, np.ndarray]:
+    """Индексы центров окон и оценки модели для них; модель вызывается пакетами по batch_size окон"""
+    windows = sliding_windows(gamma, model.window_width, params.stride)
+    scores = np.empty(len(windows), dtype=np.float64)
+    for start in range(0, len(windows), params.batch_size):
+        scores[start:start + params.batch_size] = model.predict(windows[start:start + params.batch_size])
+    return np.arange(0, len(gamma), params.stride)[:len(windows)], scores
+
+
+def infer_lines(
+        with_substance: pd.DataFrame,
+        model: WindowModel,
+        params: InferenceParams = InferenceParams()
+) -> pd.DataFrame:
+    """Линии поглощения спектра с веществом по оценкам модели: DataFrame frequency, gamma, src=True"""
+    frequency = with_substance["frequency"].to_numpy(dtype=np.float64)
+    gamma = with_substance["gamma"].to_numpy(dtype=np.float64)
+    if len(frequency) > 1 and np.any(frequency[1:] < frequency[:-1]):
+        order = np.argsort(frequency, kind="stable")
+        frequency, gamma = frequency[order], gamma[order]
+    if len(gamma) == 0 or np.isnan(gamma).all():
+        peaks = np.empty(0, dtype=np.intp)
+        centers = peaks
+    else:
+        centers, scores = window_scores(fill_nan(gamma), model, params)
+        peaks = local_maxima(scores, params.threshold, max(params.min_distance // params.stride, 1))
+    line_frequency = frequency[centers[peaks]]
+    return pd.DataFrame({
+        "frequency": line_frequency,
+        "gamma": gamma_at(with_substance, line_frequency),
+        "src": np.ones(len(line_frequency), dtype=bool)
+    })
@@ -0,0 +1,106 @@
+"""
+Разметка всех строк базы без GUI (см. src.labeling), строки размечаются параллельно в пуле процессов.
+Запуск: python -m src.label_all [--window-width N] [--workers N] [--force]
+Результат каждой строки сохраняется сразу по готовности, поэтому прерванный запуск можно повторить.
+Размечаются только строки, у которых с последней разметки изменились данные с веществом, линии поглощения
+или ширина окна (сравниваются хэши, хранимые в базе). --force - разметить заново все строки.
+"""
+import argparse
+from functools import partial
+from typing import Callable
+
+from src.content_hash import combine_hash
+from src.constant import COLUMN_2_WITH_SUB, COLUMN_4_ABSORPTION, COLUMN_5_LABELED
+from src.database import Database
+from src.labeling import DEFAULT_WINDOW_WIDTH, label_row, labeled_file_name, windows_to_frame
+from src.row_data import RowFiles
+from src.row_jobs import FieldUpdate, RowJobsReport, run_row_jobs
+
+# Имя задания разметки в таблице хэшей обработки строк
+LABELING_JOB = "labeling"
+
+
+def label_row_job(row_files: RowFiles, window_width: int) -> list[FieldUpdate]:
+    """Выполняется в процессе пула: размечает строку по данным с веществом и линиям поглощения"""
+    with_substance = row_files.read(COLUMN_2_WITH_SUB)
+    absorption_lines = row_files.read(COLUMN_4_ABSORPTION)
+    if with_substance is None or absorption_lines is None or with_substance.empty or absorption_lines.empty:
+        return []
+    windows = label_row(with_substance, absorption_lines, window_width=window_width)
+    return [FieldUpdate(
+        field=COLUMN_5_LABELED,
+        field_value=labeled_file_name(window_width),
+        file_data=windows_to_frame(windows)
+    )]
+
+
+def labeling_input_hash(db: Database, row_id: int, window_width: int) -> str | None:
+    """Хэш входных данных разметки строки или None, если размечать нечего"""
+    with_substance_hash = db.get_field_hash(row_id, COLUMN_2_WITH_SUB)
+    absorption_lines_hash = db.get_field_hash(row_id, COLUMN_4_ABSORPTION)
+    if with_substance_hash is None or absorption_lines_hash is None:
+        return None
+    return combine_hash(with_substance_hash, absorption_lines_hash, window_width)
+
+
+def rows_to_label(db: Database, window_width: int, force: bool = False) -> dict[int, str]:
+    """
+    Строки, разметка которых устарела: id строки -> хэш входных данных разметки.
+    Строка пропускается, если она уже размечена с теми же данными и шириной окна.
+    """
+    rows = {}
+    for row_id, _, row_name in db.get_names_all_rows():
+        if not (row_name.with_substance and row_name.absorption_lines):
+            continue
+        input_hash = labeling_input_hash(db, row_id, window_width)
+        if input_hash is None:
+            continue
+        # Пропускаются и строки без файла разметки, если разметка на тех же данных уже выполнялась и не дала окон
+        if force or db.get_job_hash(row_id, LABELING_JOB) != input_hash:
+            rows[row_id] = input_hash
+    return rows
+
+
+def label_all_rows(
+        db: Database,
+        window_width: int = DEFAULT_WINDOW_WIDTH,
+        workers: int | None = None,
+        force: bool = False,
+        progress_callback: Callable[[int, int], None] | None = None
+) -> RowJobsReport:
+    """Размечает строки базы с устаревшей разметкой, возвращает итог обработки"""
+    rows = rows_to_label(db, window_width, force=force)
+    return run_row_jobs(
+        db,
+        list(rows),
+        partial(label_row_job, window_width=window_width),
+        workers=workers,
+        progress_callback=progress_callback,
+        # Хэш запоминается после записи разметки (или строки без разметки):
+        # прерванная строка будет размечена при следующем запуске
+        on_row_done=lambda row_id, _: db.set_job_hash(row_id, LABELING_JOB, rows[row_id])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Разметка всех строк базы")
+    parser.add_argument("--window-width", type=int, default=DEFAULT_WINDOW_WIDTH, help="ширина окна [шт.]")
+    parser.add_argument("--workers", type=int, default=None, help="количество процессов разметки")
+    parser.add_argument("--force", action="store_true", help="разметить заново уже размеченные строки")
+    args = parser.parse_args()
+
+    db = Database()
+    report = label_all_rows(
+        db,
+        window_width=args.window_width,
+        workers=args.workers,
+        force=args.force,
+        progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True)
+    )
+    print(f"\nРазмечено строк: {len(report.updated)}, пропущено: {len(report.skipped)}, ошибок: {len(report.failed)}")
+    for row_id, message in report.failed.items():
+        print(f"Строка {row_id}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Разметка спектра: окна фиксированной ширины вокруг точек поглощения (положительные)
+и столько же непересекающихся с ними окон без точек поглощения (отрицательные).
+"""
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Ширина окна по умолчанию (как в GuiProgram)
+DEFAULT_WINDOW_WIDTH: int = 50
+
+
+@dataclass
+class LabeledWindows:
+    """
+    Размеченные окна спектра, K окон шириной W = 2 * (window_width // 2) + 1 точек.
+    Сначала идут положительные окна (в порядке точек поглощения), затем отрицательные (в порядке частоты).
+    """
+    # (K, W) частота и гамма точек окна, у краев спектра дополнены крайними значениями
+    frequency: np.ndarray
+    gamma: np.ndarray
+    # (K, W) 1 в позициях точек поглощения внутри окна
+    line_index: np.ndarray
+    # (K,) True - окно с точкой поглощения
+    label: np.ndarray
+    # (K,) индекс центра окна в спектре
+    center: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.label)
+
+    @property
+    def width(self) -> int:
+        return self.gamma.shape[1]
+
+    @property
+    def positive(self) -> "LabeledWindows":
+        return self._select(self.label)
+
+    @property
+    def negative(self) -> "LabeledWindows":
+        return self._select(~self.label)
+
+    def _select(self, mask: np.ndarray) -> "LabeledWindows":
+        return LabeledWindows(
+            frequency=self.frequency[mask],
+            gamma=self.gamma[mask],
+            line_index=self.line_index[mask],
+            label=self.label[mask],
+            center=self.center[mask]
+        )
+
+    @classmethod
+    def empty(cls, width: int) -> "LabeledWindows":
+        return cls(
+            frequency=np.empty((0, width)),
+            gamma=np.empty((0, width)),
+            line_index=np.empty((0, width), dtype=np.int8),
+            label=np.empty(0, dtype=bool),
+            center=np.empty(0, dtype=np.intp)
+        )
+
+
+def labeled_file_name(window_width: int) -> str:
+    """Имя поля labeled_data строки, размеченной с шириной окна window_width"""
+    return f"labeled_data_w{window_width}"
+
+
+def window_size(window_width: int) -> int:
+    """Количество точек в окне: центр и по window_width // 2 точек с каждой стороны"""
+    return 2 * (window_width // 2) + 1
+
+
+def nearest_indices(frequency: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Индексы ближайших к points значений отсортированного массива frequency, O(M log N)"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(frequency) == 1:
+        return np.zeros(len(points), dtype=np.intp)
+    right = np.clip(np.searchsorted(frequency, points), 1, len(frequency) - 1)
+    left = right - 1
+    return np.where(np.abs(frequency[left] - points) <= np.abs(frequency[right] - points), left, right)
+
+
+def extract_windows(values: np.ndarray, centers: np.ndarray, half_window: int, mode: str = "edge") -> np.ndarray:
+    """
+    Окна values[center - half_window : center + half_window + 1] в виде массива (K, 2 * half_window + 1).
+    За краями массива values дополняется по правилу np.pad (mode="edge" - крайними значениями).
+    """
+    padded = np.pad(values, half_window, mode=mode)
+    # Представление без копирования, копируются только выбранные окна
+    return sliding_window_view(padded, 2 * half_window + 1)[centers]
+
+
+def negative_centers(size: int, positive_centers: np.ndarray, half_window: int, count: int) -> np.ndarray:
+    """
+    Центры не более count окон, не пересекающихся ни с положительными окнами, ни друг с другом.
+    Выбираются жадно по возрастанию индекса, как в исходном алгоритме разметки.
+    """
+    if count <= 0 or size == 0:
+        return np.empty(0, dtype=np.intp)
+    # Занятость точек положительными окнами (обрезанными по краям спектра) через разностный массив
+    starts = np.clip(positive_centers - half_window, 0, size)
+    stops = np.clip(positive_centers + half_window + 1, 0, size)
+    delta = np.zeros(size + 1, dtype=np.int64)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, stops, -1)
+    used = np.cumsum(delta[:-1]) > 0
+    # Количество занятых точек в окне каждого кандидата - разность префиксных сумм
+    used_prefix = np.concatenate([[0], np.cumsum(used)])
+    candidates = np.arange(size)
+    window_used = (
+            used_prefix[np.minimum(candidates + half_window + 1, size)]
+            - used_prefix[np.maximum(candidates - half_window, 0)]
+    )
+    free = candidates[window_used == 0]
+    # Жадный выбор: следующее окно начинается после конца предыдущего, O(count * log N)
+    selected = []
+    position = 0
+    while len(selected) < count and position < len(free):
+        center = free[position]
+        selected.append(center)
+        position = int(np.searchsorted(free, center + 2 * half_window + 1))
+    return np.asarray(selected, dtype=np.intp)
+
+
+def label_spectrum(
+        frequency: np.ndarray,
+        gamma: np.ndarray,
+        line_frequency: np.ndarray,
+        window_width: int = DEFAULT_WINDOW_WIDTH
+) -> LabeledWindows:
+    """
+    Размечает спектр (frequency, gamma) по частотам точек поглощения line_frequency.
+    Для каждой точки поглощения - окно с центром в ближайшей точке спектра,
+    затем столько же отрицательных окон без точек поглощения.
+    """
+    half_window = window_width // 2
+    width = 2 * half_window + 1
+    frequency = np.asarray(frequency, dtype=np.float64)
+    gamma = np.asarray(gamma, dtype=np.float64)
+    line_frequency = np.asarray(line_frequency, dtype=np.float64)
+    line_frequency = line_frequency[~np.isnan(line_frequency)]
+    if len(frequency) == 0 or len(line_frequency) == 0:
+        return LabeledWindows.empty(width)
+    if np.any(frequency[1:] < frequency[:-1]):
+        order = np.argsort(frequency, kind="stable")
+        frequency, gamma = frequency[order], gamma[order]
+
+    positive = nearest_indices(frequency, line_frequency)
+    negative = negative_centers(len(frequency), positive, half_window, count=len(positive))
+    centers = np.concatenate([positive, negative])
+
+    # Отметки точек поглощения в спектре, за краями спектра отметок нет
+    marks = np.zeros(len(frequency), dtype=np.int8)
+    marks[positive] = 1
+    return LabeledWindows(
+        frequency=extract_windows(frequency, centers, half_window),
+        gamma=extract_windows(gamma, centers, half_window),
+        line_index=extract_windows(marks, centers, half_window, mode="constant"),
+        label=np.concatenate([np.ones(len(positive), dtype=bool), np.zeros(len(negative), dtype=bool)]),
+        center=centers
+    )
+
+
+def label_row(
+        with_substance: pd.DataFrame,
+        absorption_lines: pd.DataFrame,
+        window_width: int = DEFAULT_WINDOW_WIDTH
+) -> LabeledWindows:
+    """Размечает данные строки: спектр с веществом и все точки поглощения (независимо от src)"""
+    return label_spectrum(
+        with_substance["frequency"].to_numpy(dtype=np.float64),
+        with_substance["gamma"].to_numpy(dtype=np.float64),
+        absorption_lines["frequency"].to_numpy(dtype=np.float64),
+        window_width=window_width
+    )
+
+
+def windows_to_frame(windows: LabeledWindows) -> pd.DataFrame:
+    """
+    Таблица размеченных данных (поле labeled_data строки), одна строка на окно:
+    label, center, frequency (частота центра окна), gamma_0..gamma_{W-1}, line_0..line_{W-1}
+    """
+    half_window = windows.width // 2
+    columns = {
+        "label": windows.label,
+        "center": windows.center,
+        "frequency": windows.frequency[:, half_window] if len(windows) else np.empty(0)
+    }
+    columns.update({f"gamma_{i}": windows.gamma[:, i] for i in range(windows.width)})
+    columns.update({f"line_{i}": windows.line_index[:, i] for i in range(windows.width)})
+    return pd.DataFrame(columns)
+
+
+def windows_from_frame(data: pd.DataFrame) -> LabeledWindows:
+    """Обратное преобразование windows_to_frame (частоты точек окна, кроме центральной, не хранятся - NaN)"""
+    gamma_columns = [column for column in data.columns if column.startswith("gamma_")]
+    line_columns = [column for column in data.columns if column.startswith("line_")]
+    gamma = data[gamma_columns].to_numpy(dtype=np.float64)
+    frequency = np.full_like(gamma, np.nan)
+    if len(gamma_columns):
+        frequency[:, len(gamma_columns) // 2] = data["frequency"].to_numpy(dtype=np.float64)
+    return LabeledWindows(
+        frequency=frequency,
+        gamma=gamma,
+        line_index=data[line_columns].to_numpy(dtype=np.int8),
+        label=data["label"].to_numpy(dtype=bool),
+        center=data["center"].to_numpy(dtype=np.intp)
+    )
@@ -0,0 +1,101 @@
+"""
+Автоматический поиск линий поглощения в спектре строки.
+Все этапы работают над целыми массивами без циклов по точкам:
+вычитание базовой линии (широкое скользящее среднее), сглаживание (узкое скользящее среднее),
+поиск локальных максимумов выше порога шума и подавление соседних максимумов в окне min_distance.
+Найденные точки сохраняются в absorption_lines с src=True, точки, проставленные вручную (src=False), сохраняются.
+"""
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, astuple
+
+from src.derived import difference_spectrum
+from src.peaks import fill_nan, gamma_at, local_maxima, robust_noise
+
+
+@dataclass(frozen=True)
+class DetectionParams:
+    # Ширина окна базовой линии [точек], должна быть много больше ширины линии
+    baseline_width: int = 2001
+    # Ширина окна сглаживания [точек]
+    smooth_width: int = 11
+    # Порог высоты линии над базовой линией в единицах стандартного отклонения шума
+    threshold: float = 5.0
+    # Минимальное расстояние между линиями [точек]
+    min_distance: int = 50
+
+    def as_tuple(self) -> tuple:
+        return astuple(self)
+
+
+def moving_average(values: np.ndarray, width: int) -> np.ndarray:
+    """Скользящее среднее с окном width (нечетным) через кумулятивную сумму, края дополняются крайними значениями"""
+    half = max(width, 1) // 2
+    if half == 0 or len(values) == 0:
+        return values.copy()
+    padded = np.pad(values, half, mode="edge")
+    cumsum = np.concatenate([[0.0], np.cumsum(padded)])
+    return (cumsum[2 * half + 1:] - cumsum[:-2 * half - 1]) / (2 * half + 1)
+
+
+def detect_peaks(signal: np.ndarray, params: DetectionParams = DetectionParams()) -> np.ndarray:
+    """
+    Индексы линий (максимумов) в сигнале.
+    Возвращает индексы точек, где сглаженный сигнал за вычетом базовой линии превышает порог шума
+    и является максимумом в окне ±min_distance.
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    if len(signal) < 3:
+        return np.empty(0, dtype=np.intp)
+    if np.isnan(signal).all():
+        return np.empty(0, dtype=np.intp)
+    signal = fill_nan(signal)
+    detrended = moving_average(signal, params.smooth_width) - moving_average(signal, params.baseline_width)
+    noise = robust_noise(detrended, float(np.max(np.abs(signal))))
+    return local_maxima(detrended, params.threshold * noise, params.min_distance)
+
+
+def detect_lines(
+        with_substance: pd.DataFrame,
+        without_substance: pd.DataFrame | None = None,
+        params: DetectionParams = DetectionParams()
+) -> pd.DataFrame:
+    """
+    Линии поглощения спектра с веществом. Если есть спектр без вещества, поиск выполняется по их разности
+    (на общей сетке), что убирает общий для обоих спектров фон. Возвращает DataFrame frequency, gamma, src=True,
+    gamma - значение спектра с веществом в точке линии.
+    """
+    if without_substance is not None and not without_substance.empty:
+        difference = difference_spectrum(with_substance, without_substance)
+        frequency = difference["frequency"].to_numpy()
+        signal = difference["gamma"].to_numpy()
+    else:
+        frequency = with_substance["frequency"].to_numpy(dtype=np.float64)
+        signal = with_substance["gamma"].to_numpy(dtype=np.float64)
+        if len(frequency) > 1 and np.any(frequency[1:] < frequency[:-1]):
+            order = np.argsort(frequency, kind="stable")
+            frequency, signal = frequency[order], signal[order]
+    line_frequency = frequency[detect_peaks(signal, params)]
+    return pd.DataFrame({
+        "frequency": line_frequency,
+        # Значение гаммы линии берется из исходного спектра с веществом
+        "gamma": gamma_at(with_substance, line_frequency),
+        "src": np.ones(len(line_frequency), dtype=bool)
+    })
+
+
+def merge_detected_lines(existing: pd.DataFrame | None, detected: pd.DataFrame) -> pd.DataFrame:
+    """
+    Объединяет найденные автоматически точки (src=True) с точками строки:
+    прежние автоматические точки заменяются, проставленные вручную (src=False) сохраняются.
+    """
+    if existing is None or existing.empty:
+        return detected.reset_index(drop=True)
+    if "src" in existing.columns:
+        manual = existing[existing["src"].to_numpy() == False]  # noqa: E712
+    else:
+        # Без столбца src все прежние точки считаются автоматическими (так их отображает plot_row)
+        manual = existing.iloc[0:0]
+    manual = manual[["frequency", "gamma"]].assign(src=False)
+    merged = pd.concat([manual, detected[["frequency", "gamma", "src"]]], ignore_index=True)
+    return merged.sort_values("frequency", kind="stable", ignore_index=True)
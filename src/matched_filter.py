@@ -0,0 +1,139 @@
+"""
+Поиск кандидатов в линии поглощения согласованным фильтром.
+Спектр на равномерной сетке коррелируется с набором шаблонов формы линии (лоренцев и гауссов контур
+разной ширины) через БПФ за O(N log N): спектр преобразуется один раз, на каждый шаблон - одно обратное
+преобразование. Шаблоны с нулевым средним не реагируют на постоянный и линейный фон, поэтому вычитать
+базовую линию не нужно. Отклик каждого шаблона нормируется на свой шум, кандидаты - локальные максимумы
+наибольшего по шаблонам отношения сигнал/шум.
+"""
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+from src.peaks import gamma_at, local_maxima, robust_noise
+from src.resampling import median_step, resample_frames
+
+# Формы линий шаблонов (столбец shape кандидатов - индекс в LINE_SHAPES)
+LORENTZ = "lorentz"
+GAUSS = "gauss"
+LINE_SHAPES: tuple[str, ...] = (LORENTZ, GAUSS)
+# Протяженность шаблона в полуширинах: крылья лоренцева контура спадают медленно
+TEMPLATE_EXTENT: dict[str, float] = {LORENTZ: 10.0, GAUSS: 3.0}
+# Допустимое относительное отклонение шагов сетки, при котором она считается равномерной
+UNIFORM_GRID_TOLERANCE: float = 1e-3
+
+
+@dataclass(frozen=True)
+class MatchedFilterParams:
+    # Полуширины линий шаблонов на полувысоте [точек сетки]
+    widths: tuple[float, ...] = (2.0, 4.0, 8.0, 16.0, 32.0)
+    shapes: tuple[str, ...] = LINE_SHAPES
+    # Порог отношения сигнал/шум отклика
+    threshold: float = 5.0
+    # Минимальное расстояние между кандидатами [точек сетки]
+    min_distance: int = 50
+
+
+def line_template(shape: str, width: float) -> np.ndarray:
+    """Шаблон линии с полушириной width [точек]: нулевое среднее, единичная норма, нечетная длина"""
+    if width <= 0:
+        raise ValueError(f"Template width must be positive, got {width}")
+    half = max(int(np.ceil(TEMPLATE_EXTENT[shape] * width)), 1)
+    x = np.arange(-half, half + 1, dtype=np.float64)
+    if shape == LORENTZ:
+        template = 1 / (1 + (x / width) ** 2)
+    elif shape == GAUSS:
+        template = np.exp(-np.log(2) * (x / width) ** 2)
+    else:
+        raise ValueError(f"Unknown line shape {shape!r}, expected one of {LINE_SHAPES}")
+    template -= template.mean()
+    return template / np.linalg.norm(template)
+
+
+def template_bank(params: MatchedFilterParams = MatchedFilterParams()) -> list[tuple[int, float, np.ndarray]]:
+    """Шаблоны (индекс формы в LINE_SHAPES, полуширина [точек], шаблон) для всех сочетаний формы и ширины"""
+    return [
+        (LINE_SHAPES.index(shape), float(width), line_template(shape, width))
+        for shape in params.shapes
+        for width in params.widths
+    ]
+
+
+def _fft_size(size: int) -> int:
+    return 1 << max(size - 1, 1).bit_length()
+
+
+def match_templates(signal: np.ndarray, bank: list[tuple[int, float, np.ndarray]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Наибольшее по шаблонам отношение сигнал/шум корреляции signal с шаблоном в каждой точке
+    и номер шаблона bank, на котором оно достигнуто. Память O(N) независимо от числа шаблонов.
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    score = np.full(len(signal), -np.inf)
+    best = np.zeros(len(signal), dtype=np.intp)
+    if not len(signal) or not bank:
+        return score, best
+    # Края дополняются крайними значениями, чтобы скачок к нулю не давал ложных откликов
+    pad = max(len(template) for _, _, template in bank) // 2
+    padded = np.pad(signal, pad, mode="edge")
+    # Длина БПФ без циклического наложения для самого длинного шаблона
+    size = _fft_size(len(padded) + 2 * pad)
+    spectrum = np.fft.rfft(padded, size)
+    # Шаблоны единичной нормы: отклик не больше масштаба сигнала, ошибки округления БПФ - на много порядков меньше
+    scale = float(np.max(np.abs(padded)))
+    for index, (_, _, template) in enumerate(bank):
+        half = len(template) // 2
+        # Шаблон симметричен, поэтому корреляция совпадает со сверткой
+        response = np.fft.irfft(spectrum * np.fft.rfft(template, size), size)[pad + half:pad + half + len(signal)]
+        noise = robust_noise(response, scale)
+        # Нулевой сигнал: откликов нет
+        if noise == 0:
+            continue
+        response /= noise
+        better = response > score
+        score[better] = response[better]
+        best[better] = index
+    return score, best
+
+
+def _uniform_signal(data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Частота и гамма спектра на равномерной сетке (неравномерная сетка передискретизируется с медианным шагом)"""
+    frequency = data["frequency"].to_numpy(dtype=np.float64)
+    gamma = data["gamma"].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(frequency) & ~np.isnan(gamma)
+    steps = np.diff(frequency[valid])
+    if len(steps) and np.all(steps > 0):
+        step = float(np.median(steps))
+        if np.max(np.abs(steps - step)) <= UNIFORM_GRID_TOLERANCE * step:
+            return frequency[valid], gamma[valid]
+    resampled = resample_frames({"data": data}, median_step(frequency))["data"]
+    return resampled["frequency"].to_numpy(), resampled["gamma"].to_numpy()
+
+
+def find_line_candidates(
+        with_substance: pd.DataFrame,
+        params: MatchedFilterParams = MatchedFilterParams()
+) -> pd.DataFrame:
+    """
+    Кандидаты в линии поглощения спектра с веществом. Возвращает DataFrame:
+    frequency, gamma (значение спектра в ближайшей точке), score (отношение сигнал/шум),
+    width (полуширина лучшего шаблона [МГц]), shape (индекс формы в LINE_SHAPES).
+    """
+    frequency, signal = _uniform_signal(with_substance)
+    bank = template_bank(params)
+    if len(signal) < 3:
+        peaks = np.empty(0, dtype=np.intp)
+        score = best = np.empty(0)
+    else:
+        score, best = match_templates(signal, bank)
+        peaks = local_maxima(score, params.threshold, params.min_distance)
+    step = float(frequency[1] - frequency[0]) if len(frequency) > 1 else 0.0
+    line_frequency = frequency[peaks]
+    templates = best[peaks].astype(np.intp)
+    return pd.DataFrame({
+        "frequency": line_frequency,
+        "gamma": gamma_at(with_substance, line_frequency),
+        "score": score[peaks].astype(np.float64),
+        "width": np.array([bank[index][1] for index in templates], dtype=np.float64) * step,
+        "shape": np.array([bank[index][0] for index in templates], dtype=np.int64)
+    })
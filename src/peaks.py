@@ -0,0 +1,62 @@
+"""
+Общие для детекторов линий операции над сигналом: устойчивая оценка шума, поиск локальных максимумов
+и значения спектра в найденных точках.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.labeling import nearest_indices
+
+# Коэффициент перевода медианного абсолютного отклонения в стандартное отклонение нормального шума
+MAD_TO_SIGMA: float = 1.4826
+# Нижняя граница оценки шума относительно масштаба сигнала: ошибки округления (БПФ, кумулятивные суммы)
+# сигнала без шума не должны превышать порог
+NOISE_FLOOR: float = 1e-8
+
+
+def fill_nan(values: np.ndarray) -> np.ndarray:
+    """Значения NaN заменяются линейной интерполяцией по индексу между соседними значениями"""
+    nan = np.isnan(values)
+    if not nan.any() or nan.all():
+        return values
+    index = np.arange(len(values))
+    return np.interp(index, index[~nan], values[~nan])
+
+
+def robust_noise(values: np.ndarray, scale: float = 0.0) -> float:
+    """
+    Стандартное отклонение шума по медианному абсолютному отклонению: большинство точек - фон без линий,
+    поэтому линии на оценку почти не влияют. Не меньше NOISE_FLOOR * scale (scale - масштаб исходного сигнала),
+    ноль только для нулевого сигнала.
+    """
+    noise = MAD_TO_SIGMA * float(np.median(np.abs(values - np.median(values))))
+    return max(noise, NOISE_FLOOR * scale)
+
+
+def sliding_max(values: np.ndarray, half: int) -> np.ndarray:
+    """Максимум в окне [i - half, i + half] для каждой точки"""
+    if half == 0:
+        return values
+    padded = np.pad(values, half, mode="constant", constant_values=-np.inf)
+    return sliding_window_view(padded, 2 * half + 1).max(axis=1)
+
+
+def local_maxima(values: np.ndarray, threshold: float, min_distance: int) -> np.ndarray:
+    """Индексы точек выше threshold, являющихся максимумом в окне ±min_distance"""
+    is_peak = (values > threshold) & (values >= sliding_max(values, min_distance))
+    # Плато: из нескольких равных максимумов в окне остается первый
+    peaks = np.flatnonzero(is_peak)
+    if len(peaks) > 1:
+        peaks = peaks[np.concatenate([[True], np.diff(peaks) > min_distance])]
+    return peaks
+
+
+def gamma_at(data: pd.DataFrame, frequency: np.ndarray) -> np.ndarray:
+    """Гамма спектра data в ближайших к frequency точках (чтобы отметки линий лежали на кривой спектра)"""
+    if not len(frequency):
+        return np.empty(0, dtype=np.float64)
+    source_frequency = data["frequency"].to_numpy(dtype=np.float64)
+    source_gamma = data["gamma"].to_numpy(dtype=np.float64)
+    order = np.argsort(source_frequency, kind="stable")
+    return source_gamma[order[nearest_indices(source_frequency[order], frequency)]]
@@ -11,7 +11,8 @@ from PySide6.QtGui import QColor, QPixmap, Qt
 from PySide6.QtWidgets import QHBoxLayout, QLabel, QVBoxLayout, QWidget, QApplication
 from pyqtgraph.Qt.QtCore import Signal
 
-from src.row_data import RowData
+from src.downsampling import MinMaxPyramid
+from src.row_data import PlotSeries, RowData
 
 
 def clearer_layout(layout) -> None:
@@ -24,6 +25,67 @@ def clearer_layout(layout) -> None:
             clearer_layout(item.layout())
 
 
+class LodCurveItem(pg.PlotDataItem):
+    """
+    Кривая, отображающая прореженную по пирамиде min/max выборку видимого диапазона.
+    Автомасштабирование использует границы полной кривой, а не текущей выборки.
+    """
+
+    def __init__(self, pyramid: MinMaxPyramid | None = None, keep: np.ndarray | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.pyramid = pyramid
+        self.keep = keep
+
+    def set_pyramid(self, pyramid: MinMaxPyramid | None, keep: np.ndarray | None = None) -> None:
+        self.pyramid = pyramid
+        self.keep = keep
+        if pyramid is None:
+            self.clear()
+
+    def update_view(self, x_min: float, x_max: float, pixels: int) -> None:
+        if self.pyramid is None:
+            return
+        x, y = self.pyramid.envelope(x_min, x_max, pixels, keep=self.keep)
+        self.setData(x, y)
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        if self.pyramid is None:
+            return [None, None]
+        return list(self.pyramid.x_bounds if ax == 0 else self.pyramid.y_bounds)
+
+
+class CenterLinesItem(pg.PlotDataItem):
+    """
+    Все вертикальные линии центров одним элементом: отрезки (x, y_min)-(x, y_max) соединяются попарно
+    (connect="pairs") и по вертикали занимают весь видимый диапазон, как InfiniteLine.
+    По вертикали в автомасштабировании не участвует.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(connect="pairs", **kwargs)
+        self.centers = np.empty(0, dtype=np.float64)
+        self._y_range = (0.0, 1.0)
+
+    def set_centers(self, centers: np.ndarray) -> None:
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self._redraw()
+
+    def update_view(self, y_min: float, y_max: float) -> None:
+        self._y_range = (y_min, y_max)
+        if len(self.centers):
+            self._redraw()
+
+    def _redraw(self) -> None:
+        x = np.repeat(self.centers, 2)
+        y = np.tile(np.asarray(self._y_range, dtype=np.float64), len(self.centers))
+        self.setData(x, y, connect="pairs")
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        if ax == 1 or not len(self.centers):
+            return [None, None]
+        return [float(self.centers.min()), float(self.centers.max())]
+
+
 class SpectrometerPlotWidget(pg.PlotWidget):
     title_data = "Данные с веществом и без вещества"
     horizontal_axis_name_data = "Частота [МГц]"
@@ -32,6 +94,10 @@ class SpectrometerPlotWidget(pg.PlotWidget):
     color_without_gas = "#515151"
     name_with_gas = "С веществом"
     color_with_gas = "#DC7C02"
+    name_difference = "Разность (с веществом - без вещества)"
+    color_difference = "#8A2BE2"  # Фиолетовый
+    line_candidates_text = "Кандидаты в линии (согласованный фильтр)"
+    line_candidates_color = "#FF00FF"  # Пурпурный
     absorption_line_center_text = "Центры линий поглощения"
     absorption_line_center_color = "#FF0000"
     absorption_line_text_true = "Точки поглощения (от нейронной сети)"
@@ -44,6 +110,8 @@ class SpectrometerPlotWidget(pg.PlotWidget):
     labeled_negative_color = "#FFA500"  # Желтый
     # Объявляем сигнал обновления легенды (для кастомной легенды)
     dataUpdated = Signal(list)
+    # Минимальная ширина в пикселях, для которой строится выборка (пока виджет не показан)
+    min_lod_pixels = 1000
 
     def __init__(self, parent=None):
         pg.setConfigOptions(background="w", foreground="k")
@@ -54,162 +122,225 @@ class SpectrometerPlotWidget(pg.PlotWidget):
         self.setTitle(self.title_data)
         self.setMinimumSize(400, 300)
         self.enableAutoRange(x=True, y=True)
+        # Элементы графика создаются один раз, при смене строки или кадра обновляются только их данные
+        self.curve_without_gas = LodCurveItem(
+            pen=pg.mkPen(color=self.color_without_gas, width=2), name=self.name_without_gas
+        )
+        self.curve_with_gas = LodCurveItem(pen=pg.mkPen(color=self.color_with_gas, width=2), name=self.name_with_gas)
+        self.curve_difference = LodCurveItem(
+            pen=pg.mkPen(color=self.color_difference, width=2), name=self.name_difference
+        )
+        # Отображение разности спектров (переключается из интерфейса)
+        self.show_difference = False
+        # Последняя отрисованная строка, для перерисовки при переключении отображения разности
+        self._row = None
+        # Цвет и подпись отображаемого интервала (None - интервал не отображается).
+        # Следующий интервал заменяет только данные кривой и линий центров (кадры анимации)
+        self._interval_style: tuple[str, str, bool] | None = None
+        self.scatter_true = pg.ScatterPlotItem(
+            symbol="o", pen=pg.mkPen("k"), brush=self.absorption_line_color_true, size=8
+        )
+        self.scatter_false = pg.ScatterPlotItem(
+            symbol="o", pen=pg.mkPen("k"), brush=self.absorption_line_color_false, size=8
+        )
+        # Кандидаты в линии поглощения (переключаются из интерфейса)
+        self.show_line_candidates = False
+        self.scatter_candidates = pg.ScatterPlotItem(
+            symbol="t", pen=pg.mkPen("k"), brush=self.line_candidates_color, size=10
+        )
+        self.interval_curve = pg.PlotDataItem()
+        self.center_lines = CenterLinesItem(pen=pg.mkPen(color=self.absorption_line_center_color, width=3))
+        for item in self._items():
+            item.setVisible(False)
+            self.addItem(item)
+        # Кривые с прореживанием, пересчитываемые при изменении видимого диапазона
+        self.getViewBox().sigXRangeChanged.connect(self._update_lod_curves)
+        # Линии центров растягиваются на видимый диапазон по вертикали
+        self.getViewBox().sigYRangeChanged.connect(self._update_center_lines)
+
+    def _items(self) -> list:
+        return [
+            self.curve_without_gas, self.curve_with_gas, self.curve_difference, self.scatter_true, self.scatter_false,
+            self.interval_curve, self.scatter_candidates, self.center_lines
+        ]
+
+    def hide_data(self) -> None:
+        """
+        Скрывает все данные графика, не удаляя элементы со сцены.
+        Для сброса графика используется этот метод, а не clear(): PlotWidget перенаправляет clear() в PlotItem.clear(),
+        который удаляет и постоянные элементы
+        """
+        self.curve_without_gas.set_pyramid(None)
+        self.curve_with_gas.set_pyramid(None)
+        self.curve_difference.set_pyramid(None)
+        self.scatter_true.clear()
+        self.scatter_false.clear()
+        self.scatter_candidates.clear()
+        self.interval_curve.clear()
+        self.center_lines.set_centers(np.empty(0))
+        for item in self._items():
+            item.setVisible(False)
+        self._interval_style = None
+
+    def _lod_pixels(self) -> int:
+        return max(int(self.getViewBox().width()), self.min_lod_pixels)
+
+    def _update_lod_curves(self, *_) -> None:
+        x_min, x_max = self.getViewBox().viewRange()[0]
+        pixels = self._lod_pixels()
+        for curve in (self.curve_without_gas, self.curve_with_gas, self.curve_difference):
+            if curve.isVisible():
+                curve.update_view(x_min, x_max, pixels)
+
+    @staticmethod
+    def _row_pyramid(data_row: RowData, name: str, series: PlotSeries) -> tuple[MinMaxPyramid, np.ndarray | None]:
+        """
+        Пирамида прореживания кривой строки и индексы точек линий поглощения на ней.
+        Строятся один раз и хранятся в RowData (сбрасываются при изменении данных строки).
+        """
+        key = ("lod", name)
+        if key not in data_row.derived_cache:
+            pyramid = MinMaxPyramid(series.frequency, series.gamma)
+            keep = None
+            lines_frequency = np.concatenate(
+                [data_row.plot_absorption_true.frequency, data_row.plot_absorption_false.frequency]
+            )
+            lines_frequency = lines_frequency[~np.isnan(lines_frequency)]
+            if len(lines_frequency):
+                # Точки кривой у линий поглощения не должны пропадать при прореживании
+                keep = pyramid.nearest_indices(lines_frequency)
+            data_row.derived_cache[key] = (pyramid, keep)
+        return data_row.derived_cache[key]
+
+    def _plot_lod_curve(self, curve: LodCurveItem, data_row: RowData, series: PlotSeries) -> None:
+        pyramid, keep = self._row_pyramid(data_row, curve.name(), series)
+        curve.set_pyramid(pyramid, keep=keep)
+        # Первая выборка - по всей кривой, после автомасштабирования пересчитывается по видимому диапазону
+        curve.update_view(pyramid.x_bounds[0], pyramid.x_bounds[1], self._lod_pixels())
+        curve.setVisible(True)
+
+    @staticmethod
+    def _plot_points(scatter: pg.ScatterPlotItem, series: PlotSeries) -> None:
+        scatter.setData(x=series.frequency, y=series.gamma)
+        scatter.setVisible(True)
+
+    def _update_center_lines(self, *_) -> None:
+        y_min, y_max = self.getViewBox().viewRange()[1]
+        self.center_lines.update_view(y_min, y_max)
+
+    def _plot_centers(self, line_index: ndarray) -> None:
+        """Вертикальные линии в точках line_index == 1 (один элемент на все линии)"""
+        y_min, y_max = self.getViewBox().viewRange()[1]
+        self.center_lines.update_view(y_min, y_max)
+        self.center_lines.set_centers(where(line_index == 1)[0])
+        self.center_lines.setVisible(True)
+
+    def set_show_difference(self, show: bool) -> None:
+        """Включает отображение разности спектров и перерисовывает текущую строку"""
+        self.show_difference = show
+        if self._row is not None:
+            self.plot_row(self._row)
+
+    def set_show_line_candidates(self, show: bool) -> None:
+        """Включает отображение кандидатов в линии поглощения и перерисовывает текущую строку"""
+        self.show_line_candidates = show
+        if self._row is not None:
+            self.plot_row(self._row)
 
     def plot_row(self, data_row: RowData):
+        self._row = data_row
         _, _, data_row = data_row
         """Отрисовывает данные из RowData и возвращает данные для легенды."""
-        # Очищаем предыдущие данные
-        self.clear()
+        # Скрываем предыдущие данные
+        self.hide_data()
         legend_data = []
         logging.info("Отрисовка данных для строки")
 
-        # Получаем данные через методы
-        with_substance = data_row.with_substance
-        without_substance = data_row.without_substance
-        result = data_row.absorption_lines
-
-        has_data = any([
-            isinstance(with_substance, DataFrame) and not with_substance.empty,
-            isinstance(without_substance, DataFrame) and not without_substance.empty,
-            isinstance(result, DataFrame) and not result.empty
-        ])
+        # Массивы и признаки наличия данных подготовлены в RowData при загрузке строки
+        without_substance = data_row.plot_without_substance
+        with_substance = data_row.plot_with_substance
+        points_true = data_row.plot_absorption_true
+        points_false = data_row.plot_absorption_false
 
         # Нет данных
-        if not has_data:
+        if not (with_substance.valid or without_substance.valid or points_true.valid or points_false.valid):
             logging.info("Нет данных для отрисовки")
+            self.dataUpdated.emit(legend_data)
             return legend_data
 
         # Отрисовка данных без вещества
-        if (
-                isinstance(without_substance, DataFrame)
-                and not without_substance.empty
-                and not without_substance[["frequency", "gamma"]].dropna().empty
-        ):
-            self.plot(
-                without_substance["frequency"],
-                without_substance["gamma"],
-                pen=pg.mkPen(color=self.color_without_gas, width=2),
-                name=self.name_without_gas,
-            )
+        if without_substance.valid:
+            self._plot_lod_curve(self.curve_without_gas, data_row, without_substance)
             legend_data.append((self.color_without_gas, self.name_without_gas))
 
         # Отрисовка данных с веществом
-        if (
-                isinstance(with_substance, DataFrame)
-                and not with_substance.empty
-                and not with_substance[["frequency", "gamma"]].dropna().empty
-        ):
-            self.plot(
-                with_substance["frequency"],
-                with_substance["gamma"],
-                pen=pg.mkPen(color=self.color_with_gas, width=2),
-                name=self.name_with_gas,
-            )
+        if with_substance.valid:
+            self._plot_lod_curve(self.curve_with_gas, data_row, with_substance)
             legend_data.append((self.color_with_gas, self.name_with_gas))
 
+        # Отрисовка разности спектров (вычисляется в фоне при включении отображения и хранится в RowData)
+        if self.show_difference and data_row.plot_difference.valid:
+            self._plot_lod_curve(self.curve_difference, data_row, data_row.plot_difference)
+            legend_data.append((self.color_difference, self.name_difference))
+
+        # Отрисовка кандидатов в линии (вычисляются в фоне при включении отображения и хранятся в RowData)
+        if self.show_line_candidates and data_row.plot_line_candidates.valid:
+            self._plot_points(self.scatter_candidates, data_row.plot_line_candidates)
+            legend_data.append((self.line_candidates_color, self.line_candidates_text))
+
         # Отрисовка результатов
-        if (
-                isinstance(result, DataFrame)
-                and not result.empty
-                and not result[["frequency", "gamma"]].dropna().empty
-        ):
-            if "src" in result.columns:
-                df_true = result[result["src"] == True]
-                if not df_true.empty:
-                    scatter_true = pg.ScatterPlotItem(
-                        x=df_true["frequency"],
-                        y=df_true["gamma"],
-                        symbol="o",
-                        pen=pg.mkPen("k"),
-                        brush=self.absorption_line_color_true,
-                        size=8,
-                    )
-                    self.addItem(scatter_true)
-                    legend_data.append((self.absorption_line_color_true, self.absorption_line_text_true))
-                    logging.info(f"Отрисованы точки src=True: {len(df_true)} точек")
-
-                df_false = result[result["src"] == False]
-                if not df_false.empty:
-                    scatter_false = pg.ScatterPlotItem(
-                        x=df_false["frequency"],
-                        y=df_false["gamma"],
-                        symbol="o",
-                        pen=pg.mkPen("k"),
-                        brush=self.absorption_line_color_false,
-                        size=8,
-                    )
-                    self.addItem(scatter_false)
-                    legend_data.append((self.absorption_line_color_false, self.absorption_line_text_false))
-                    logging.info(f"Отрисованы точки src=False: {len(df_false)} точек")
-            else:
-                logging.warning("Колонка 'src' отсутствует в result")
-                scatter = pg.ScatterPlotItem(
-                    x=result["frequency"],
-                    y=result["gamma"],
-                    symbol="o",
-                    pen=pg.mkPen("k"),
-                    brush=self.absorption_line_color_true,
-                    size=8,
-                )
-                self.addItem(scatter)
+        if points_true.valid or points_false.valid:
+            if len(points_true.frequency):
+                self._plot_points(self.scatter_true, points_true)
                 legend_data.append((self.absorption_line_color_true, self.absorption_line_text_true))
-                logging.info("Отрисованы точки поглощения")
+                logging.info(f"Отрисованы точки src=True: {len(points_true.frequency)} точек")
+            if len(points_false.frequency):
+                self._plot_points(self.scatter_false, points_false)
+                legend_data.append((self.absorption_line_color_false, self.absorption_line_text_false))
+                logging.info(f"Отрисованы точки src=False: {len(points_false.frequency)} точек")
 
         # Испускаем сигнал с обновленными данными для легенды
         self.dataUpdated.emit(legend_data)
         return legend_data
 
-    def plot_positive_interval(self, gamma_segment: ndarray, line_index: ndarray | None = None):
-        """Отрисовывает положительный интервал (с линией поглощения)."""
-        # Очищаем предыдущие данные
-        self.clear()
-        legend_data = []
-        logging.info(f"Отрисовка линии поглощения")
+    def _plot_interval(self, gamma_segment: ndarray, line_index: ndarray | None, color: str, text: str) -> None:
+        """
+        Отрисовывает размеченный интервал и центры линий поглощения в нем.
+        Если интервал уже отображается, в постоянных элементах заменяются только данные,
+        перо и легенда обновляются только при смене вида интервала.
+        """
+        style = (color, text, line_index is not None)
+        if self._interval_style is None:
+            self._row = None
+            self.hide_data()
+            self.interval_curve.setVisible(True)
+            self.enableAutoRange(x=True, y=True)
         # Отрисовка интервала
-        self.plot(
-            y=gamma_segment,
-            pen=pg.mkPen(color=self.labeled_positive_color, width=2),
-            name=self.labeled_positive_text,
-        )
+        if self._interval_style is None or self._interval_style[0] != color:
+            self.interval_curve.setPen(pg.mkPen(color=color, width=2))
+        self.interval_curve.setData(y=gamma_segment)
         # Отрисовка вертикальных линий - центров линий поглощения
         if line_index is not None:
-            for idx in where(line_index == 1)[0]:
-                vline = pg.InfiniteLine(
-                    pos=idx, angle=90, pen=pg.mkPen(color=self.absorption_line_center_color, width=3)
-                )
-                self.addItem(vline)
-            legend_data.append((self.absorption_line_center_color, self.absorption_line_center_text))
-        legend_data.append((self.labeled_positive_color, self.labeled_positive_text))
-        self.enableAutoRange(x=True, y=True)
-        logging.info(f"Успешно отрисована линия поглощения")
-        # Испускаем сигнал с обновленными данными для легенды
-        self.dataUpdated.emit(legend_data)
+            self._plot_centers(line_index)
+        elif self.center_lines.isVisible():
+            self.center_lines.set_centers(np.empty(0))
+            self.center_lines.setVisible(False)
+        if style != self._interval_style:
+            self._interval_style = style
+            legend_data = []
+            if line_index is not None:
+                legend_data.append((self.absorption_line_center_color, self.absorption_line_center_text))
+            legend_data.append((color, text))
+            # Испускаем сигнал с обновленными данными для легенды
+            self.dataUpdated.emit(legend_data)
+
+    def plot_positive_interval(self, gamma_segment: ndarray, line_index: ndarray | None = None):
+        """Отрисовывает положительный интервал (с линией поглощения)."""
+        self._plot_interval(gamma_segment, line_index, self.labeled_positive_color, self.labeled_positive_text)
 
     def plot_negative(self, gamma_segment: np.ndarray, line_index: np.ndarray | None = None):
         """Отрисовывает отрицательный интервал (без линии поглощения)."""
-        # Очищаем предыдущие данные
-        self.clear()
-        legend_data = []
-        logging.info(f"Отрисовка без линии поглощения")
-        # Отрисовка интервала
-        self.plot(
-            y=gamma_segment,
-            pen=pg.mkPen(color=self.labeled_negative_color, width=2),
-            name=self.labeled_negative_text,
-        )
-        # Отрисовка вертикальных линий - центров линий поглощения
-        if line_index is not None:
-            for idx in np.where(line_index == 1)[0]:
-                vline = pg.InfiniteLine(
-                    pos=idx, angle=90, pen=pg.mkPen(color=self.absorption_line_center_color, width=3)
-                )
-                self.addItem(vline)
-            legend_data.append((self.absorption_line_center_color, self.absorption_line_center_text))
-        legend_data.append((self.labeled_negative_color, self.labeled_negative_text))
-        self.enableAutoRange(x=True, y=True)
-        logging.info(f"Успешно отрисован интервал без поглощения")
-        # Испускаем сигнал с обновленными данными для легенды
-        self.dataUpdated.emit(legend_data)
+        self._plot_interval(gamma_segment, line_index, self.labeled_negative_color, self.labeled_negative_text)
 
 
 class LegendWidget(QWidget):
@@ -218,8 +349,14 @@ class LegendWidget(QWidget):
         self.layout = QHBoxLayout()
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(self.layout)
+        self._legend_items: list[tuple[str, str]] | None = None
 
     def update_legend(self, legend_items):
+        # Подписи пересоздаются только при изменении состава легенды
+        legend_items = [tuple(item) for item in legend_items]
+        if legend_items == self._legend_items:
+            return
+        self._legend_items = legend_items
         clearer_layout(self.layout)
         for color, label in legend_items:
             item_layout = QHBoxLayout()
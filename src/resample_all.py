@@ -0,0 +1,95 @@
+"""
+Передискретизация спектров всех строк базы на общую равномерную сетку (см. src.resampling)
+в пуле процессов. Результат записывается в поля строки под новыми именами, исходные файлы остаются в директории строки.
+Запуск: python -m src.resample_all [--step STEP] [--workers N] [--force]
+Строки, уже передискретизированные с тем же шагом и не изменившиеся с тех пор, пропускаются.
+"""
+import argparse
+from functools import partial
+from typing import Callable
+
+from src.constant import COLUMN_2_WITH_SUB, COLUMN_3_WITHOUT_SUB
+from src.content_hash import combine_hash
+from src.database import Database
+from src.resampling import DEFAULT_STEP, resample_frames, resampled_file_name
+from src.row_data import RowFiles
+from src.row_jobs import FieldUpdate, RowJobsReport, run_row_jobs
+
+# Имя задания передискретизации в таблице хэшей обработки строк
+RESAMPLING_JOB = "resampling"
+# Передискретизируемые поля строки
+RESAMPLED_FIELDS = [COLUMN_2_WITH_SUB, COLUMN_3_WITHOUT_SUB]
+
+
+def resample_row_job(row_files: RowFiles, step: float) -> list[FieldUpdate]:
+    """Выполняется в процессе пула: передискретизирует спектры строки на общую сетку"""
+    frames = {}
+    for field in RESAMPLED_FIELDS:
+        data = row_files.read(field)
+        if data is not None and not data.empty:
+            frames[field] = data
+    if not frames:
+        return []
+    return [
+        FieldUpdate(
+            field=field,
+            field_value=resampled_file_name(getattr(row_files.row_name, field), step),
+            file_data=data
+        )
+        for field, data in resample_frames(frames, step).items()
+    ]
+
+
+def resampling_state_hash(db: Database, row_id: int, step: float) -> str:
+    """Хэш текущих спектров строки и шага: совпадает с сохраненным, если строка уже передискретизирована"""
+    return combine_hash(*(db.get_field_hash(row_id, field) for field in RESAMPLED_FIELDS), step)
+
+
+def rows_to_resample(db: Database, step: float, force: bool = False) -> list[int]:
+    return [
+        row_id for row_id, _, row_name in db.get_names_all_rows()
+        if any(getattr(row_name, field) for field in RESAMPLED_FIELDS)
+        and (force or db.get_job_hash(row_id, RESAMPLING_JOB) != resampling_state_hash(db, row_id, step))
+    ]
+
+
+def resample_all_rows(
+        db: Database,
+        step: float = DEFAULT_STEP,
+        workers: int | None = None,
+        force: bool = False,
+        progress_callback: Callable[[int, int], None] | None = None
+) -> RowJobsReport:
+    """Передискретизирует строки базы, возвращает итог обработки"""
+    return run_row_jobs(
+        db,
+        rows_to_resample(db, step, force=force),
+        partial(resample_row_job, step=step),
+        workers=workers,
+        progress_callback=progress_callback,
+        # Запоминается хэш уже записанных (передискретизированных) спектров
+        on_row_done=lambda row_id, _: db.set_job_hash(row_id, RESAMPLING_JOB, resampling_state_hash(db, row_id, step))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Передискретизация спектров всех строк базы на равномерную сетку")
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP, help="шаг сетки частот [МГц]")
+    parser.add_argument("--workers", type=int, default=None, help="количество процессов")
+    parser.add_argument("--force", action="store_true", help="передискретизировать заново все строки")
+    args = parser.parse_args()
+
+    report = resample_all_rows(
+        Database(),
+        step=args.step,
+        workers=args.workers,
+        force=args.force,
+        progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True)
+    )
+    print(f"\nОбработано строк: {len(report.updated)}, пропущено: {len(report.skipped)}, ошибок: {len(report.failed)}")
+    for row_id, message in report.failed.items():
+        print(f"Строка {row_id}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Передискретизация спектров строки на общую равномерную сетку частот.
+Спектры с веществом и без вещества сняты на разных неравномерных сетках,
+после передискретизации их значения можно сравнивать поточечно (разметка, разность спектров).
+"""
+import re
+import numpy as np
+import pandas as pd
+
+# Шаг сетки по умолчанию [МГц] (как в исходном диалоге интерполяции)
+DEFAULT_STEP: float = 0.06
+# Суффикс имени файла передискретизированных данных
+_RESAMPLED_SUFFIX = re.compile(r"_interp[^_]*$")
+
+
+def _clean_series(frequency: np.ndarray, gamma: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Точки без NaN, отсортированные по частоте (np.interp требует возрастающую сетку)"""
+    frequency = np.asarray(frequency, dtype=np.float64)
+    gamma = np.asarray(gamma, dtype=np.float64)
+    valid = ~np.isnan(frequency) & ~np.isnan(gamma)
+    if not valid.all():
+        frequency, gamma = frequency[valid], gamma[valid]
+    if len(frequency) > 1 and np.any(frequency[1:] < frequency[:-1]):
+        order = np.argsort(frequency, kind="stable")
+        frequency, gamma = frequency[order], gamma[order]
+    return frequency, gamma
+
+
+def median_step(frequency: np.ndarray) -> float:
+    """Медианный шаг сетки частот спектра"""
+    steps = np.diff(np.sort(frequency[~np.isnan(frequency)]))
+    steps = steps[steps > 0]
+    if not len(steps):
+        raise ValueError("Spectrum frequency grid has less than two distinct points")
+    return float(np.median(steps))
+
+
+def uniform_grid(frequencies: list[np.ndarray], step: float) -> np.ndarray:
+    """
+    Равномерная сетка с шагом step на общем для всех спектров диапазоне частот (без экстраполяции).
+    Узлы кратны step, поэтому сетки разных строк с одним шагом совпадают в общих точках.
+    """
+    if step <= 0:
+        raise ValueError(f"Step must be positive, got {step}")
+    frequencies = [frequency for frequency in frequencies if len(frequency)]
+    if not frequencies:
+        return np.empty(0, dtype=np.float64)
+    start = max(float(np.nanmin(frequency)) for frequency in frequencies)
+    stop = min(float(np.nanmax(frequency)) for frequency in frequencies)
+    if start > stop:
+        raise ValueError("Spectra frequency ranges do not overlap")
+    first, last = int(np.ceil(start / step)), int(np.floor(stop / step))
+    return np.arange(first, last + 1, dtype=np.float64) * step
+
+
+def resample_frames(frames: dict[str, pd.DataFrame], step: float = DEFAULT_STEP) -> dict[str, pd.DataFrame]:
+    """Передискретизирует спектры (DataFrame с frequency и gamma) на общую сетку, ключи frames сохраняются"""
+    series = {
+        name: _clean_series(frame["frequency"].to_numpy(), frame["gamma"].to_numpy())
+        for name, frame in frames.items()
+    }
+    grid = uniform_grid([frequency for frequency, _ in series.values()], step)
+    return {
+        name: pd.DataFrame({
+            "frequency": grid,
+            "gamma": np.interp(grid, frequency, gamma) if len(frequency) else np.full(len(grid), np.nan)
+        })
+        for name, (frequency, gamma) in series.items()
+    }
+
+
+def resampled_file_name(file_name: str, step: float) -> str:
+    """Имя поля с передискретизированными данными: исходное имя с суффиксом шага (исходный файл не заменяется)"""
+    return f"{_RESAMPLED_SUFFIX.sub('', file_name)}_interp{step:g}"
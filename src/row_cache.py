@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from dataclasses import astuple
+
+from src.row_data import RowData, RowName
+
+# Бюджет памяти кэша строк по умолчанию
+DEFAULT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+
+def row_data_size(row_data: RowData) -> int:
+    """Оценка занимаемой строкой памяти в байтах (сумма размеров всех DataFrame и копий массивов для отрисовки)"""
+    size = 0
+    for data in (
+            row_data.with_substance, row_data.without_substance, row_data.absorption_lines, row_data.labeled_data,
+            row_data.difference, row_data.line_candidates
+    ):
+        if data is not None:
+            size += int(data.memory_usage(index=True).sum())
+    for series in (
+            row_data.plot_with_substance, row_data.plot_without_substance, row_data.plot_difference,
+            row_data.plot_line_candidates, row_data.plot_absorption_true, row_data.plot_absorption_false
+    ):
+        size += series.nbytes
+    return size
+
+
+class RowDataCache:
+    """
+    LRU-кэш загруженных RowData с ограничением по суммарному объему данных.
+    Ключ - id строки и имена файлов ее полей, поэтому замена файла в поле автоматически приводит к промаху.
+    Потокобезопасен. Для загрузки в фоновом потоке есть версии строк: данные, прочитанные до сброса строки,
+    не попадут в кэш (см. row_version и put).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[tuple, tuple[RowData, int]] = OrderedDict()
+        # Счетчики сбросов: всего кэша и отдельных строк
+        self._clear_count = 0
+        self._row_versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(row_id: int, row_name: RowName) -> tuple:
+        return (row_id, *astuple(row_name))
+
+    def get(self, key: tuple, record_stats: bool = True) -> RowData | None:
+        """
+        Возвращает RowData по ключу и отмечает ее как последнюю использованную, None при промахе.
+        record_stats=False - обращение не учитывается в счетчиках (упреждающая загрузка, повторная проверка)
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                if record_stats:
+                    self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            if record_stats:
+                self.hits += 1
+            return item[0]
+
+    def row_version(self, row_id: int) -> tuple[int, int]:
+        """Версия строки: меняется при каждом сбросе строки или всего кэша"""
+        with self._lock:
+            return self._clear_count, self._row_versions.get(row_id, 0)
+
+    def put(self, key: tuple, row_data: RowData, version: tuple[int, int] | None = None) -> None:
+        """
+        Добавляет RowData в кэш, вытесняя давно не использованные строки при превышении бюджета.
+        version - версия строки до начала чтения ее данных: если строка с тех пор сброшена, данные не кэшируются.
+        """
+        size = row_data_size(row_data)
+        with self._lock:
+            if version is not None and version != (self._clear_count, self._row_versions.get(key[0], 0)):
+                return
+            self._remove(key)
+            # Строка больше всего бюджета не кэшируется
+            if size > self.max_bytes:
+                return
+            self._items[key] = (row_data, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def _remove(self, key: tuple) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.current_bytes -= item[1]
+
+    def invalidate_row(self, row_id: int) -> None:
+        """Удаляет из кэша все записи строки row_id"""
+        with self._lock:
+            self._row_versions[row_id] = self._row_versions.get(row_id, 0) + 1
+            for key in [key for key in self._items if key[0] == row_id]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear_count += 1
+            self._items.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Счетчики попаданий/промахов и заполненность кэша для подбора бюджета"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "items": len(self._items),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
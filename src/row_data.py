@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
-from dataclasses import dataclass
+from typing import Callable
+from dataclasses import dataclass, field
+
+from src.storage import CsvStorage, get_storage
 
 
 @dataclass
@@ -10,6 +14,28 @@ class RowName:
     labeled_data: str | None = None
 
 
+@dataclass(frozen=True)
+class RowFiles:
+    """
+    Расположение файлов строки на диске. Передается в процессы пула вместо базы:
+    процесс читает файлы сам, а записывает результат только процесс, владеющий базой.
+    """
+    row_id: int
+    row_dir: str
+    row_name: RowName
+    storage_format: str
+
+    def read(self, field: str, mmap: bool = True) -> pd.DataFrame | None:
+        """Читает поле строки (данные в старом формате CSV читаются без переноса в текущий формат)"""
+        file_name = getattr(self.row_name, field)
+        if not file_name:
+            return None
+        for storage in (get_storage(self.storage_format), CsvStorage()):
+            if storage.exists(self.row_dir, file_name):
+                return storage.read(self.row_dir, file_name, mmap=mmap)
+        return None
+
+
 def _data_changed(func):
     def wrapper(self, *args, **kwargs):
         result = func(self, *args, **kwargs)
@@ -20,12 +46,84 @@ def _data_changed(func):
     return wrapper
 
 
+@dataclass
+class PlotSeries:
+    """Непрерывные массивы частоты и гаммы для отрисовки, извлекаются из DataFrame один раз"""
+    frequency: np.ndarray
+    gamma: np.ndarray
+    # Кэш свойства valid, вычисляется при первой отрисовке
+    _valid: bool | None = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame | None, mask: np.ndarray | None = None) -> "PlotSeries":
+        if data is None or data.empty or "frequency" not in data.columns or "gamma" not in data.columns:
+            empty = np.empty(0, dtype=np.float64)
+            return cls(frequency=empty, gamma=empty, _valid=False)
+        # Для непрерывных столбцов (в том числе отображенных в память) копирования нет
+        frequency = np.ascontiguousarray(data["frequency"].to_numpy(dtype=np.float64))
+        gamma = np.ascontiguousarray(data["gamma"].to_numpy(dtype=np.float64))
+        if mask is not None:
+            frequency, gamma = frequency[mask], gamma[mask]
+        return cls(frequency=frequency, gamma=gamma)
+
+    @property
+    def valid(self) -> bool:
+        """
+        Есть хотя бы одна точка, в которой частота и гамма не NaN.
+        Проверка читает массивы целиком, поэтому выполняется не при загрузке строки, а при первом обращении
+        (для данных, отображенных в память, страницы файла читаются только при отрисовке)
+        """
+        if self._valid is None:
+            self._valid = bool(np.any(~np.isnan(self.frequency) & ~np.isnan(self.gamma)))
+        return self._valid
+
+    @property
+    def nbytes(self) -> int:
+        """Память, выделенная под собственные копии массивов (представления данных DataFrame не учитываются)"""
+        return sum(array.nbytes for array in (self.frequency, self.gamma) if array.flags.owndata)
+
+
 @dataclass
 class RowData:
     with_substance: pd.DataFrame | None = None
     without_substance: pd.DataFrame | None = None
     absorption_lines: pd.DataFrame | None = None
     labeled_data: pd.DataFrame | None = None
+    # Разность спектров с веществом и без вещества (производные данные, см. src.derived)
+    difference: pd.DataFrame | None = None
+    # Кандидаты в линии поглощения, найденные согласованным фильтром (производные данные, см. src.matched_filter)
+    line_candidates: pd.DataFrame | None = None
+    data_change_call_function: Callable[[], None] | None = field(default=None, repr=False, compare=False)
+    # Производные данные строки, вычисляемые один раз (например, пирамиды прореживания графиков).
+    # Сбрасываются при изменении данных строки
+    derived_cache: dict = field(default_factory=dict, repr=False, compare=False)
+    # Массивы для отрисовки, извлекаются без чтения данных при загрузке строки и при изменении ее данных
+    plot_with_substance: PlotSeries = field(init=False, repr=False, compare=False)
+    plot_without_substance: PlotSeries = field(init=False, repr=False, compare=False)
+    plot_difference: PlotSeries = field(init=False, repr=False, compare=False)
+    plot_line_candidates: PlotSeries = field(init=False, repr=False, compare=False)
+    # Точки поглощения, разделенные по src (без столбца src все точки считаются src=True)
+    plot_absorption_true: PlotSeries = field(init=False, repr=False, compare=False)
+    plot_absorption_false: PlotSeries = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._prepare_plot_data()
+
+    def _prepare_plot_data(self) -> None:
+        self.derived_cache.clear()
+        self.plot_with_substance = PlotSeries.from_frame(self.with_substance)
+        self.plot_without_substance = PlotSeries.from_frame(self.without_substance)
+        self.plot_difference = PlotSeries.from_frame(self.difference)
+        self.plot_line_candidates = PlotSeries.from_frame(self.line_candidates)
+        lines = self.absorption_lines
+        if lines is not None and "src" in lines.columns:
+            # Одно извлечение столбца src, разбиение точек булевыми масками без копий DataFrame
+            src = lines["src"].to_numpy()
+            self.plot_absorption_true = PlotSeries.from_frame(lines, mask=src == True)  # noqa: E712
+            self.plot_absorption_false = PlotSeries.from_frame(lines, mask=src == False)  # noqa: E712
+        else:
+            self.plot_absorption_true = PlotSeries.from_frame(lines)
+            self.plot_absorption_false = PlotSeries.from_frame(None)
 
     @_data_changed
     def reset_data(self) -> None:
@@ -33,6 +131,9 @@ class RowData:
         self.without_substance = None
         self.absorption_lines = None
         self.labeled_data = None
+        self.difference = None
+        self.line_candidates = None
+        self._prepare_plot_data()
 
     def has_with_substance(self) -> bool:
         return self.with_substance is not None and not self.with_substance.empty
@@ -67,3 +168,14 @@ class RowData:
         self.without_substance = self.without_substance if without_substance is None else without_substance
         self.absorption_lines = self.absorption_lines if absorption_lines is None else absorption_lines
         self.labeled_data = self.labeled_data if labeled_data is None else labeled_data
+        # Разность и кандидаты в линии, вычисленные из прежних спектров, больше не действительны
+        if with_substance is not None or without_substance is not None:
+            self.difference = None
+        if with_substance is not None:
+            self.line_candidates = None
+        self._prepare_plot_data()
+
+    def set_derived(self, name: str, data: pd.DataFrame | None) -> None:
+        """Сохраняет производные данные name (src.derived), вычисленные после загрузки строки, и их массивы отрисовки"""
+        setattr(self, name, data)
+        setattr(self, f"plot_{name}", PlotSeries.from_frame(data))
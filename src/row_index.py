@@ -0,0 +1,96 @@
+class RowIndex:
+    """
+    Двунаправленный индекс в памяти: номер строки <-> id строки.
+    Строки занимают слоты в порядке добавления. Удаленная строка только помечает свой слот пустым
+    в дереве Фенвика, поэтому номер строки (количество занятых слотов перед ней) и поиск строки по номеру
+    выполняются за O(log N) без перенумерации следующих строк.
+    Пустые слоты убираются перестроением индекса, когда их становится больше, чем занятых.
+    """
+
+    def __init__(self, row_ids: list[int] | None = None):
+        self._slot_ids: list[int | None] = []
+        self._slots: dict[int, int] = {}
+        # Дерево Фенвика по занятости слотов (индексация с 1)
+        self._tree: list[int] = [0]
+        if row_ids:
+            self.load(row_ids)
+
+    def load(self, row_ids: list[int]) -> None:
+        """Заполняет индекс id строк, упорядоченными по номеру строки"""
+        self._slot_ids = list(row_ids)
+        self._slots = {row_id: slot for slot, row_id in enumerate(self._slot_ids)}
+        # Построение дерева за O(N)
+        tree = [0] + [1] * len(self._slot_ids)
+        for position in range(1, len(tree)):
+            parent = position + (position & -position)
+            if parent < len(tree):
+                tree[parent] += tree[position]
+        self._tree = tree
+
+    def _prefix(self, position: int) -> int:
+        """Количество занятых слотов среди первых position слотов"""
+        total = 0
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def append(self, row_id: int) -> int:
+        """Добавляет строку в конец и возвращает ее номер"""
+        slot = len(self._slot_ids)
+        self._slot_ids.append(row_id)
+        self._slots[row_id] = slot
+        position = slot + 1
+        # Новый узел хранит сумму слотов (position - lowbit, position]
+        lowest = position & -position
+        self._tree.append(1 + self._prefix(position - 1) - self._prefix(position - lowest))
+        return len(self._slots) - 1
+
+    def remove(self, row_id: int) -> int | None:
+        """Удаляет строку, номера следующих строк уменьшаются на 1. Возвращает номер удаленной строки или None"""
+        slot = self._slots.pop(row_id, None)
+        if slot is None:
+            return None
+        row_number = self._prefix(slot)
+        self._slot_ids[slot] = None
+        position = slot + 1
+        while position < len(self._tree):
+            self._tree[position] -= 1
+            position += position & -position
+        # Ленивое уплотнение: перестроение за O(N) не чаще, чем раз на N удалений
+        if len(self._slot_ids) > 2 * len(self._slots):
+            self.load([slot_id for slot_id in self._slot_ids if slot_id is not None])
+        return row_number
+
+    def clear(self) -> None:
+        self._slot_ids = []
+        self._slots = {}
+        self._tree = [0]
+
+    def get_row_id(self, row_number: int) -> int | None:
+        """Поиск слота с заданным количеством занятых слотов перед ним (спуск по дереву Фенвика)"""
+        if not 0 <= row_number < len(self._slots):
+            return None
+        position = 0
+        remaining = row_number + 1
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            next_position = position + step
+            if next_position < len(self._tree) and self._tree[next_position] < remaining:
+                position = next_position
+                remaining -= self._tree[next_position]
+            step >>= 1
+        return self._slot_ids[position]
+
+    def get_row_number(self, row_id: int) -> int | None:
+        slot = self._slots.get(row_id)
+        if slot is None:
+            return None
+        return self._prefix(slot)
+
+    def row_ids(self) -> list[int]:
+        """id всех строк в порядке номеров"""
+        return [row_id for row_id in self._slot_ids if row_id is not None]
+
+    def __len__(self) -> int:
+        return len(self._slots)
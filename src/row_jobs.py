@@ -0,0 +1,83 @@
+"""
+Параллельная обработка строк базы в пуле процессов.
+Задача строки выполняется в процессе пула над RowFiles и возвращает новые данные полей,
+которые записываются в базу процессом, владеющим базой, сразу по готовности строки.
+Поэтому прерванный запуск не теряет уже обработанные строки.
+"""
+import multiprocessing
+import pandas as pd
+from typing import Callable
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.database import Database
+from src.row_data import RowFiles
+
+
+@dataclass
+class FieldUpdate:
+    """Новые данные поля строки: записываются через Database.set_data"""
+    field: str
+    field_value: str
+    file_data: pd.DataFrame
+
+
+@dataclass
+class RowJobsReport:
+    """Итог обработки: id обновленных строк, строк без изменений и ошибки по строкам"""
+    updated: list[int] = field(default_factory=list)
+    skipped: list[int] = field(default_factory=list)
+    failed: dict[int, str] = field(default_factory=dict)
+
+
+def run_row_jobs(
+        db: Database,
+        row_ids: list[int],
+        job: Callable[[RowFiles], list[FieldUpdate]],
+        workers: int | None = None,
+        progress_callback: Callable[[int, int], None] | None = None,
+        on_row_done: Callable[[int, list[FieldUpdate]], None] | None = None
+) -> RowJobsReport:
+    """
+    Выполняет job для каждой строки row_ids в пуле процессов.
+    job должна быть функцией модуля (или functools.partial от нее), чтобы ее можно было передать в процесс.
+    Пустой список обновлений - строку менять не нужно. Ошибка строки не прерывает обработку остальных.
+    progress_callback(обработано строк, всего строк), on_row_done(row_id, обновления) - после записи строки,
+    в том числе строки без обновлений.
+    """
+    report = RowJobsReport()
+    files = [row_files for row_files in map(db.get_row_files, row_ids) if row_files is not None]
+    if not files:
+        return report
+    # spawn: процессы пула не наследуют соединение с базой, потоки и состояние GUI
+    context = multiprocessing.get_context("spawn")
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    try:
+        futures = {executor.submit(job, row_files): row_files.row_id for row_files in files}
+        for done, future in enumerate(as_completed(futures), start=1):
+            row_id = futures[future]
+            try:
+                updates = future.result()
+                # Запись выполняется сразу, чтобы повторный запуск продолжил с необработанных строк
+                written = all(
+                    db.set_data(id=row_id, field=update.field, field_value=update.field_value,
+                                file_data=update.file_data)
+                    for update in updates
+                )
+                if not written or (not updates and db.get_names_row(row_id) is None):
+                    # Строка удалена во время обработки
+                    report.skipped.append(row_id)
+                else:
+                    # Строка без обновлений (например, без данных) тоже обработана: on_row_done запоминает
+                    # ее входные данные, чтобы следующий запуск ее пропустил
+                    (report.updated if updates else report.skipped).append(row_id)
+                    if on_row_done is not None:
+                        on_row_done(row_id, updates)
+            except Exception as e:
+                report.failed[row_id] = str(e)
+            if progress_callback is not None:
+                progress_callback(done, len(files))
+    finally:
+        # При прерывании (например, Ctrl+C) не запускаем оставшиеся задачи
+        executor.shutdown(wait=True, cancel_futures=True)
+    return report
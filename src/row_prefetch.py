@@ -0,0 +1,107 @@
+import threading
+from PySide6.QtCore import QObject, QRunnable, QThreadPool
+
+from src.database import Database
+from src.row_cache import RowDataCache
+from src.row_data import RowData
+
+# Количество строк выше и ниже выбранной, загружаемых заранее
+DEFAULT_PREFETCH_DEPTH: int = 2
+
+
+class RowPrefetchTask(QRunnable):
+    """Загрузка соседних строк в кэш в рабочем потоке; прекращается, как только выбрана другая строка"""
+
+    def __init__(self, prefetcher: "RowPrefetcher", generation: int, row_numbers: list[int]):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.generation = generation
+        self.row_numbers = row_numbers
+
+    def run(self) -> None:
+        for row_number in self.row_numbers:
+            # Загрузка одной строки не прерывается, проверка - перед каждой следующей
+            if self.prefetcher.generation != self.generation:
+                return
+            try:
+                row_id = self.prefetcher.db.get_row_id_by_number(row_number)
+                if row_id is not None:
+                    self.prefetcher.load(row_id, record_stats=False)
+            except Exception as e:
+                print(f"Error prefetching row {row_number}: {e}")
+
+
+class RowPrefetcher(QObject):
+    """
+    Загрузка строк в общий кэш RowDataCache: по запросу (load) и заранее для соседей выбранной строки (prefetch).
+    Каждая строка читается не более одного раза одновременно: запрос строки, которая уже загружается
+    в фоне, ждет окончания этой загрузки. Каждый вызов prefetch увеличивает номер поколения,
+    задачи прежних поколений, еще не начатые, снимаются, а выполняемая останавливается перед следующей строкой.
+    """
+
+    def __init__(self, db: Database, cache: RowDataCache, depth: int = DEFAULT_PREFETCH_DEPTH, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.cache = cache
+        self.depth = depth
+        self.generation = 0
+        # Один рабочий поток: соседние строки загружаются по очереди, ближайшие первыми
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self._loading: dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def load(self, row_id: int, record_stats: bool = True) -> tuple[int, int, RowData] | None:
+        """Данные строки в формате Database.get_data_row из кэша или с диска (с сохранением в кэш)"""
+        while True:
+            # Версия берется до чтения имен файлов: сброс строки во время чтения отменяет сохранение в кэш
+            version = self.cache.row_version(row_id)
+            names = self.db.get_names_row(row_id)
+            if names is None:
+                return None
+            row_id, row_number, row_name = names
+            key = RowDataCache.make_key(row_id, row_name)
+            row_data = self.cache.get(key, record_stats=record_stats)
+            if row_data is not None:
+                return row_id, row_number, row_data
+            with self._lock:
+                loading = self._loading.get(row_id)
+                if loading is None:
+                    self._loading[row_id] = threading.Event()
+            if loading is None:
+                break
+            # Строка уже загружается в другом потоке - ждем и проверяем кэш снова
+            loading.wait()
+            record_stats = False
+        try:
+            loaded = self.db.get_data_row(row_id, mmap=True)
+            if loaded is not None:
+                self.cache.put(key, loaded[2], version=version)
+            return loaded
+        finally:
+            with self._lock:
+                self._loading.pop(row_id).set()
+
+    def prefetch(self, row_number: int) -> None:
+        """Отменяет незавершенную упреждающую загрузку и загружает строки вокруг row_number, ближайшие первыми"""
+        self.generation += 1
+        self.thread_pool.clear()
+        if self.depth <= 0:
+            return
+        row_count = self.db.get_row_count()
+        row_numbers = [
+            neighbour
+            for distance in range(1, self.depth + 1)
+            for neighbour in (row_number + distance, row_number - distance)
+            if 0 <= neighbour < row_count
+        ]
+        if row_numbers:
+            self.thread_pool.start(RowPrefetchTask(self, self.generation, row_numbers))
+
+    def cancel(self) -> None:
+        """Отменяет упреждающую загрузку (например, при закрытии окна)"""
+        self.generation += 1
+        self.thread_pool.clear()
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        return self.thread_pool.waitForDone(msecs)
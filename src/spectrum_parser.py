@@ -0,0 +1,131 @@
+import io
+import os
+import numpy as np
+from typing import Callable
+
+# Размер блока чтения файла
+DEFAULT_CHUNK_BYTES: int = 16 * 1024 * 1024
+# Номера столбцов частоты и гаммы в строке файла спектрометра
+FREQUENCY_COLUMN = 1
+GAMMA_COLUMN = 4
+# Признак конца данных в начале строки
+END_OF_DATA = "*"
+
+
+def _parser_all_data(string_list):
+    """Построчный разбор файла спектрометра (исходная реализация, используется для сравнения в bench_parser)"""
+    frequency_list = list()
+    gamma_list = list()
+    skipping_first_line = True
+
+    for line in string_list:
+        if skipping_first_line:
+            skipping_first_line = False
+            continue
+        if line[0] == "*":
+            break
+        row = line.split()
+        frequency_list.append(float(row[1]))
+        gamma_list.append(float(row[4]))
+
+    return frequency_list, gamma_list
+
+
+class ParseCancelled(Exception):
+    """Разбор файла прерван по запросу отмены"""
+
+
+class _ColumnBuffer:
+    """Предвыделенные массивы float64 под столбцы частоты и гаммы с увеличением емкости при заполнении"""
+
+    def __init__(self, capacity: int):
+        self.frequency = np.empty(max(capacity, 1), dtype=np.float64)
+        self.gamma = np.empty(max(capacity, 1), dtype=np.float64)
+        self.size = 0
+
+    def extend(self, block: np.ndarray) -> None:
+        required = self.size + len(block)
+        if required > len(self.frequency):
+            capacity = max(required, 2 * len(self.frequency))
+            self.frequency = np.resize(self.frequency, capacity)
+            self.gamma = np.resize(self.gamma, capacity)
+        self.frequency[self.size:required] = block[:, 0]
+        self.gamma[self.size:required] = block[:, 1]
+        self.size = required
+
+    def columns(self) -> tuple[np.ndarray, np.ndarray]:
+        # Освобождаем неиспользованный запас емкости без копирования данных
+        self.frequency.resize(self.size, refcheck=False)
+        self.gamma.resize(self.size, refcheck=False)
+        return self.frequency, self.gamma
+
+
+def _parse_block(text: str) -> np.ndarray:
+    """
+    Разбор блока целых строк: столбцы частоты и гаммы токенизируются в C-коде np.loadtxt.
+    Как и в _parser_all_data, символ "#" не начинает комментарий, а прочие столбцы строки не проверяются.
+    Отличие: пустые строки пропускаются (построчный разбор на них завершается с IndexError)
+    """
+    if not text.strip():
+        return np.empty((0, 2), dtype=np.float64)
+    return np.loadtxt(
+        io.StringIO(text), usecols=(FREQUENCY_COLUMN, GAMMA_COLUMN), dtype=np.float64, ndmin=2, comments=None
+    )
+
+
+def parse_spectrum_file(
+        file_path: str,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        progress_callback: Callable[[int, int], None] | None = None,
+        is_cancelled: Callable[[], bool] | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Потоковый разбор файла спектрометра.
+    Пропускает первую строку (заголовок), читает файл блоками по chunk_bytes и останавливается на строке,
+    начинающейся с "*". Возвращает массивы float64 (frequency, gamma).
+    progress_callback(прочитано, размер файла) вызывается после каждого блока.
+    Если is_cancelled() возвращает True, разбор прерывается исключением ParseCancelled.
+    """
+    buffer = None
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'r') as file:
+        header = file.readline()
+        read_size = len(header)
+        tail = ""
+        finished = False
+        while not finished:
+            if is_cancelled is not None and is_cancelled():
+                raise ParseCancelled(file_path)
+            chunk = file.read(chunk_bytes)
+            read_size += len(chunk)
+            if chunk:
+                text = tail + chunk
+                # Блок обрезается по последнему переводу строки, остаток переносится в следующий блок
+                cut = text.rfind("\n") + 1
+                if cut == 0:
+                    tail = text
+                    continue
+                text, tail = text[:cut], text[cut:]
+            else:
+                text, tail = tail, ""
+                finished = True
+            # Блок всегда начинается с начала строки, поэтому признак конца ищется в начале блока или после "\n"
+            if text.startswith(END_OF_DATA):
+                break
+            stop = text.find("\n" + END_OF_DATA)
+            if stop != -1:
+                text = text[:stop + 1]
+                finished = True
+            block = _parse_block(text)
+            if buffer is None:
+                # Емкость оценивается по средней длине строки первого блока и размеру файла
+                lines_in_text = max(text.count("\n"), 1)
+                estimated_lines = file_size * lines_in_text // max(len(text), 1) + 1
+                buffer = _ColumnBuffer(max(estimated_lines - (1 if header else 0), len(block)))
+            buffer.extend(block)
+            if progress_callback is not None:
+                progress_callback(file_size if finished else min(read_size, file_size), file_size)
+
+    if buffer is None:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+    return buffer.columns()
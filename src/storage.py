@@ -0,0 +1,158 @@
+import os
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+from abc import ABC, abstractmethod
+
+
+class Storage(ABC):
+    """
+    Формат хранения DataFrame строки на диске.
+    Каждое поле строки хранится под именем файла, записанным в базе (field_value), внутри директории строки.
+    """
+    name: str = ""
+
+    @abstractmethod
+    def get_path(self, row_dir: str, file_name: str) -> str:
+        """Возвращает путь к данным поля на диске"""
+
+    def exists(self, row_dir: str, file_name: str) -> bool:
+        return os.path.exists(self.get_path(row_dir, file_name))
+
+    @abstractmethod
+    def write(self, row_dir: str, file_name: str, data: pd.DataFrame) -> None:
+        """Сохраняет данные поля, заменяя прежние"""
+
+    @abstractmethod
+    def read(self, row_dir: str, file_name: str, mmap: bool = False) -> pd.DataFrame:
+        """
+        Читает данные поля.
+        mmap=True - вернуть столбцы как отображенные в память массивы только для чтения (если формат это позволяет).
+        """
+
+    def remove(self, row_dir: str, file_name: str) -> None:
+        path = self.get_path(row_dir, file_name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def replace(self, row_dir: str, source_name: str, file_name: str) -> None:
+        """Переименовывает записанные под именем source_name данные в file_name, заменяя прежние данные"""
+        source, target = self.get_path(row_dir, source_name), self.get_path(row_dir, file_name)
+        if not os.path.isdir(source):
+            os.replace(source, target)
+            return
+        # Непустую директорию os.replace не заменяет: прежняя директория сначала убирается под другое имя
+        if os.path.exists(target):
+            previous = f"{target}.old-{uuid.uuid4().hex}"
+            os.replace(target, previous)
+            os.replace(source, target)
+            shutil.rmtree(previous)
+        else:
+            os.replace(source, target)
+
+
+class CsvStorage(Storage):
+    """Текстовый формат: один CSV-файл на поле (исходный формат приложения)"""
+    name = "csv"
+
+    def get_path(self, row_dir: str, file_name: str) -> str:
+        return os.path.join(row_dir, file_name)
+
+    def write(self, row_dir: str, file_name: str, data: pd.DataFrame) -> None:
+        data.to_csv(self.get_path(row_dir, file_name), index=False)
+
+    def read(self, row_dir: str, file_name: str, mmap: bool = False) -> pd.DataFrame:
+        # Текстовый формат нельзя отобразить в память, всегда выполняется полный разбор
+        return pd.read_csv(self.get_path(row_dir, file_name))
+
+
+class NpyStorage(Storage):
+    """
+    Бинарный колоночный формат: директория <file_name>.npyd, в которой каждый столбец лежит отдельным .npy файлом,
+    а порядок и имена столбцов - в columns.npy. Чтение столбца - это чтение заголовка и непрерывного блока данных.
+    """
+    name = "npy"
+    suffix = ".npyd"
+    columns_file = "columns.npy"
+
+    def get_path(self, row_dir: str, file_name: str) -> str:
+        return os.path.join(row_dir, file_name + self.suffix)
+
+    @staticmethod
+    def _column_file(index: int) -> str:
+        return f"{index}.npy"
+
+    @staticmethod
+    def _missing_file(index: int) -> str:
+        return f"{index}.missing.npy"
+
+    @staticmethod
+    def _column_values(values: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        """
+        Массив столбца для сохранения без pickle и маска пропусков (None, если маска не нужна). Объектные столбцы:
+        логические значения - bool (с пропусками - float, 1.0/0.0/NaN, сравнения src == True сохраняются),
+        остальные - unicode, как в CSV; пропуски в них сохраняются маской и читаются как NaN.
+        """
+        if values.dtype != object:
+            return values, None
+        missing = pd.isna(values)
+        present = values[~missing]
+        if all(isinstance(value, (bool, np.bool_)) for value in present):
+            if not missing.any():
+                return values.astype(bool), None
+            result = np.full(len(values), np.nan)
+            result[~missing] = present.astype(bool)
+            return result, None
+        if not missing.any():
+            return values.astype(str), None
+        return np.where(missing, "", values).astype(str), missing
+
+    def write(self, row_dir: str, file_name: str, data: pd.DataFrame) -> None:
+        path = self.get_path(row_dir, file_name)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        for index, column in enumerate(data.columns):
+            values, missing = self._column_values(data[column].to_numpy())
+            np.save(os.path.join(path, self._column_file(index)), np.ascontiguousarray(values))
+            if missing is not None:
+                np.save(os.path.join(path, self._missing_file(index)), missing)
+        np.save(os.path.join(path, self.columns_file), np.array([str(column) for column in data.columns], dtype=str))
+
+    def _read_column(self, path: str, index: int, mmap_mode: str | None) -> np.ndarray:
+        values = np.load(os.path.join(path, self._column_file(index)), mmap_mode=mmap_mode)
+        missing_path = os.path.join(path, self._missing_file(index))
+        if not os.path.exists(missing_path):
+            return values
+        # Столбец с пропусками восстанавливается объектным, как его читает pd.read_csv
+        values = values.astype(object)
+        values[np.load(missing_path)] = np.nan
+        return values
+
+    def read(self, row_dir: str, file_name: str, mmap: bool = False) -> pd.DataFrame:
+        path = self.get_path(row_dir, file_name)
+        mmap_mode = "r" if mmap else None
+        columns = np.load(os.path.join(path, self.columns_file))
+        # copy=False - DataFrame ссылается на загруженные (или отображенные в память) массивы без копирования
+        return pd.DataFrame(
+            {str(column): self._read_column(path, index, mmap_mode) for index, column in enumerate(columns)},
+            copy=False
+        )
+
+
+# Зарегистрированные форматы хранения
+STORAGE_FORMATS: dict[str, type[Storage]] = {
+    CsvStorage.name: CsvStorage,
+    NpyStorage.name: NpyStorage,
+}
+DEFAULT_STORAGE_FORMAT = NpyStorage.name
+
+
+def get_storage(storage_format: str) -> Storage:
+    """Возвращает объект формата хранения по его имени"""
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(f"Unknown storage format: {storage_format}")
+    return STORAGE_FORMATS[storage_format]()
@@ -1,135 +1,227 @@
-import os
-import pandas as pd
-from typing import Callable
-from PySide6.QtCore import QSize
-from PySide6.QtGui import QPixmap, Qt, QPainter, QPen, QIcon
+from PySide6.QtCore import QSize, Qt, QAbstractTableModel, QModelIndex, QEvent, Signal
+from PySide6.QtGui import QPixmap, QPainter, QPen, QIcon, QColor
 from PySide6.QtWidgets import (
-    QTableWidget, QTableWidgetItem, QAbstractItemView, QPushButton, QFrame, QHeaderView, QFileDialog
+    QTableView, QAbstractItemView, QFrame, QHeaderView, QFileDialog, QStyledItemDelegate, QStyle, QStyleOptionButton,
+    QApplication
 )
 
 from src.constant import COLUMN_TO_FIELD
 from src.database import Database
-from src.row_data import RowName
+from src.file_import import FileImporter
+from src.row_cache import RowDataCache, DEFAULT_CACHE_MAX_BYTES
+from src.row_data import RowName, RowData
+from src.row_prefetch import RowPrefetcher, DEFAULT_PREFETCH_DEPTH
 
 
 # ----------------------------------------------------------------------------------------------------------------------
-#                                                 КНОПКИ ТАБЛИЦЫ
+#                                                 МОДЕЛЬ ТАБЛИЦЫ
 # ----------------------------------------------------------------------------------------------------------------------
-class RedCrossButton(QPushButton):
-    def __init__(self, parent=None):
+COLUMN_NAMES = ["Удалить", "Данные с веществом", "Данные без вещества", "Линии поглощения", "Размеченные данные"]
+# Текст кнопки пустой ячейки
+LOAD_DATA_TEXT = "Load Data"
+# Текст кнопки ячейки во время фонового импорта (нажатие отменяет импорт)
+LOADING_TEXT = "Loading {percent}%... (cancel)"
+# Количество строк, подгружаемых из базы за один вызов fetchMore
+FETCH_BATCH_SIZE = 100
+
+
+class RowTableModel(QAbstractTableModel):
+    """
+    Модель таблицы строк базы. Имена файлов строк подгружаются из Database порциями по мере прокрутки (fetchMore),
+    поэтому открытие таблицы не зависит от количества строк в базе.
+    Номер строки модели совпадает с номером строки в базе.
+    """
+
+    def __init__(self, db: Database, parent=None):
         super().__init__(parent)
+        self.db = db
+        self._rows: list[tuple[int, RowName]] = []
+        # Прогресс фонового импорта по ячейкам (row_id, field)
+        self._progress: dict[tuple[int, str], int] = {}
 
-        # Создаем пиксельную карту для иконки (24x24)
-        pixmap = QPixmap(24, 24)
-        pixmap.fill(Qt.transparent)
+    def reload(self) -> None:
+        """Сбрасывает загруженные строки и загружает первую порцию, остальные загружаются через fetchMore"""
+        self.beginResetModel()
+        self._rows = []
+        self.endResetModel()
+        self.fetchMore()
 
-        # Рисуем красный крестик
-        painter = QPainter(pixmap)
-        pen = QPen(Qt.red, 2)
-        painter.setPen(pen)
-        painter.drawLine(6, 6, 18, 18)
-        painter.drawLine(6, 18, 18, 6)
-        painter.end()
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
 
-        # Устанавливаем иконку
-        self.setIcon(QIcon(pixmap))
-        self.setIconSize(QSize(24, 24))
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMN_NAMES)
 
-        # Настраиваем кнопку
-        self.setFixedSize(32, 32)
-        self.setStyleSheet("QPushButton { border: none; }")
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and len(self._rows) < self.db.get_row_count()
 
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid():
+            return
+        rows = self.db.get_names_rows(offset=len(self._rows), limit=FETCH_BATCH_SIZE)
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+        self._rows.extend((row_id, row_name) for row_id, _, row_name in rows)
+        self.endInsertRows()
 
-def _parser_all_data(string_list):
-    frequency_list = list()
-    gamma_list = list()
-    skipping_first_line = True
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return COLUMN_NAMES[section]
+        return str(section + 1)
 
-    for line in string_list:
-        if skipping_first_line:
-            skipping_first_line = False
-            continue
-        if line[0] == "*":
-            break
-        row = line.split()
-        frequency_list.append(float(row[1]))
-        gamma_list.append(float(row[4]))
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole or index.column() not in COLUMN_TO_FIELD:
+            return None
+        row_id, row_name = self._rows[index.row()]
+        field = COLUMN_TO_FIELD[index.column()]
+        if (row_id, field) in self._progress:
+            return LOADING_TEXT.format(percent=self._progress[(row_id, field)])
+        return getattr(row_name, field) or LOAD_DATA_TEXT
 
-    return frequency_list, gamma_list
+    def row_id(self, row_number: int) -> int | None:
+        """Возвращает id строки по номеру строки модели"""
+        if 0 <= row_number < len(self._rows):
+            return self._rows[row_number][0]
+        return None
 
+    def append_row(self, row_id: int, row_name: RowName | None = None) -> None:
+        """Добавляет строку в конец модели, если предыдущие строки уже загружены"""
+        row_number = len(self._rows)
+        if row_number != self.db.get_row_number_by_id(row_id):
+            # Строка окажется в еще не загруженной части и будет получена через fetchMore
+            return
+        self.beginInsertRows(QModelIndex(), row_number, row_number)
+        self._rows.append((row_id, row_name or RowName()))
+        self.endInsertRows()
 
-class LoadDataButton(QPushButton):
-    def __init__(
-            self,
-            db: Database,
-            db_field_name: str,
-            row_id: int,
-            file_name: str | None = None,
-            updated_data_in_row: Callable[[int], None] = None,
-            parent=None
-    ):
-        super().__init__("Load Data", parent)
-        self.db = db
-        self.row_id = row_id
-        self.field = db_field_name
-        self.file_name = file_name
-        self.setStyleSheet("QPushButton { text-align: center; }")
-        self.clicked.connect(self.load_and_parse_file)
-        if self.file_name:
-            self.setText(self.file_name)
-        self.updated_data_in_row = updated_data_in_row
-
-    def load_and_parse_file(self):
-        # Открываем диалог выбора файла
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "All Files (*)")
-        if not file_path:
+    def remove_row(self, row_number: int) -> None:
+        if 0 <= row_number < len(self._rows):
+            self.beginRemoveRows(QModelIndex(), row_number, row_number)
+            del self._rows[row_number]
+            self.endRemoveRows()
+
+    def set_progress(self, row_id: int, field: str, percent: int | None) -> None:
+        """Устанавливает прогресс импорта ячейки, None - импорт завершен"""
+        if percent is None:
+            self._progress.pop((row_id, field), None)
+        else:
+            self._progress[(row_id, field)] = percent
+        self.refresh_row(row_id)
+
+    def refresh_row(self, row_id: int) -> None:
+        """Перечитывает имена файлов строки из базы и обновляет ее отображение"""
+        row_number = self.db.get_row_number_by_id(row_id)
+        if row_number is None or row_number >= len(self._rows):
+            return
+        names = self.db.get_names_row(row_id)
+        if names is None:
             return
-        try:
-            # Читаем файл
-            with open(file_path, 'r') as file:
-                lines = file.readlines()
-            # Парсим данные
-            frequency, gamma = _parser_all_data(lines)
-            # Создаем DataFrame
-            df = pd.DataFrame({
-                'frequency': frequency,
-                'gamma': gamma
-            })
-            # Извлекаем имя файла
-            file_name = os.path.basename(file_path)
-            # Сохраняем данные
-            self.db.set_data(id=self.row_id, field=self.field, field_value=file_name, file_data=df)
-            # Сохраняем имя файла и обновляем текст кнопки
-            self.file_name = file_name
-            self.setText(file_name)
-            # Вызываем сообщение, что данные обновились
-            self.updated_data_in_row(self.row_id)
-        except Exception as e:
-            print(f"Error loading file: {e}")
+        self._rows[row_number] = (row_id, names[2])
+        self.dataChanged.emit(self.index(row_number, 0), self.index(row_number, len(COLUMN_NAMES) - 1))
 
 
 # ----------------------------------------------------------------------------------------------------------------------
-#                                                 ТАБЛИЦА
+#                                                 КНОПКИ ТАБЛИЦЫ
 # ----------------------------------------------------------------------------------------------------------------------
-COLUMN_NAMES = ["Удалить", "Данные с веществом", "Данные без вещества", "Линии поглощения", "Размеченные данные"]
+def _red_cross_icon() -> QIcon:
+    """Иконка красного крестика (24x24) для кнопки удаления строки"""
+    pixmap = QPixmap(24, 24)
+    pixmap.fill(Qt.transparent)
+    painter = QPainter(pixmap)
+    pen = QPen(Qt.red, 2)
+    painter.setPen(pen)
+    painter.drawLine(6, 6, 18, 18)
+    painter.drawLine(6, 18, 18, 6)
+    painter.end()
+    return QIcon(pixmap)
+
 
+class ButtonDelegate(QStyledItemDelegate):
+    """
+    Рисует кнопки ячеек таблицы вместо отдельных виджетов QPushButton:
+    столбец 0 - кнопка удаления строки (красный крестик), остальные - кнопка загрузки данных с именем файла.
+    Нажатие на ячейку испускает сигнал clicked с индексом ячейки.
+    """
+    clicked = Signal(QModelIndex)
+    selected_color = QColor("#b3d9ff")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cross_icon = _red_cross_icon()
+        self._pressed: QModelIndex | None = None
 
-class CustomTableWidget(QTableWidget):
+    def paint(self, painter: QPainter, option, index: QModelIndex) -> None:
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, self.selected_color)
+        if index.column() == 0:
+            self._cross_icon.paint(painter, option.rect, Qt.AlignCenter)
+            return
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data()
+        button.state = QStyle.State_Enabled
+        if self._pressed is not None and self._pressed == index:
+            button.state |= QStyle.State_Sunken
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        if index.column() == 0:
+            return QSize(32, 32)
+        return super().sizeHint(option, index).expandedTo(QSize(0, 32))
+
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self._pressed = QModelIndex(index)
+        elif event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            pressed, self._pressed = self._pressed, None
+            if pressed == index and option.rect.contains(event.position().toPoint()):
+                self.clicked.emit(QModelIndex(index))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+#                                                 ТАБЛИЦА
+# ----------------------------------------------------------------------------------------------------------------------
+class CustomTableWidget(QTableView):
     def __init__(
             self,
             db: Database,
             callback_change_active_row=None,
+            cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+            prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
             parent=None
     ):
         super().__init__(parent)
         self.db = db
         self.callback_change_active_row = callback_change_active_row
-        # Добавить кэширование при работе с одной строкой
+        # Кэш загруженных строк, сбрасывается при изменении данных строки в базе
+        self.row_cache = RowDataCache(max_bytes=cache_max_bytes)
+        self.db.add_row_change_listener(self._on_row_changed)
+        # Загрузка строк в кэш, в том числе упреждающая загрузка соседей выбранной строки в рабочем потоке
+        self.prefetcher = RowPrefetcher(db=self.db, cache=self.row_cache, depth=prefetch_depth, parent=self)
+        # Модель и отрисовка кнопок ячеек
+        self.table_model = RowTableModel(db=self.db, parent=self)
+        self.setModel(self.table_model)
+        self.button_delegate = ButtonDelegate(self)
+        self.button_delegate.clicked.connect(self.handle_cell_clicked)
+        self.setItemDelegate(self.button_delegate)
+        # Фоновый импорт файлов
+        self.file_importer = FileImporter(db=self.db, parent=self)
+        self.file_importer.progress.connect(self.table_model.set_progress)
+        self.file_importer.finished.connect(self._on_import_finished)
+        self.file_importer.failed.connect(self._on_import_stopped)
+        self.file_importer.cancelled.connect(self._on_import_stopped)
+        self.file_importer.directory_finished.connect(self._on_directory_import_finished)
         # Настройка таблицы и создание первой строки
         self.setup_table()
         self._load_table_data()
         # Подключаем сигнал изменения выделения
-        self.itemSelectionChanged.connect(self.handle_selection_changed)
+        self.selectionModel().selectionChanged.connect(self.handle_selection_changed)
 
     def setup_table(self) -> None:
         # Настройка стиля и поведения
@@ -149,14 +241,10 @@ class CustomTableWidget(QTableWidget):
         self.horizontalHeader().setHighlightSections(False)
         # - Отключает кнопку выбора всей таблицы (левый верхний угол)
         self.setCornerButtonEnabled(False)
-        self.setStyleSheet("QTableWidget::item:selected { background-color: #b3d9ff; }")
-
-        # Настройка основных свойств таблицы
-        # - Устанавливает количество столбцов
-        self.setColumnCount(len(COLUMN_NAMES))
-        # - Задает названия столбцов
-        for i, name in enumerate(COLUMN_NAMES):
-            self.setHorizontalHeaderItem(i, QTableWidgetItem(name))
+        # - Все строки одной высоты, представлению не нужно измерять содержимое каждой строки
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(34)
+
         # Настройка ширины столбцов
         # - Первый столбец подстраивается под ширину заголовка
         self.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
@@ -164,65 +252,115 @@ class CustomTableWidget(QTableWidget):
         for col in range(1, len(COLUMN_NAMES)):
             self.horizontalHeader().setSectionResizeMode(col, QHeaderView.Stretch)
 
-    def _fill_row(self, row_id: int, row_number: int, row_name: RowName | None = None) -> None:
-        delete_button = RedCrossButton()
-        delete_button.clicked.connect(lambda: self.delete_row(row_id))
-        self.setCellWidget(row_number, 0, delete_button)
-        # Проходим по полям, связанным с кнопками
-        for col, field in COLUMN_TO_FIELD.items():
-            # Получаем имя файла для текущего поля
-            file_name = None if row_name is None else getattr(row_name, field)
-            # Создаем кнопку
-            button = LoadDataButton(
-                db=self.db,
-                row_id=row_id,
-                db_field_name=field,
-                file_name=file_name,
-                updated_data_in_row=self.updated_data_in_row
-            )
-            # Устанавливаем кнопку в ячейку
-            self.setCellWidget(row_number, col, button)
-
     def _load_table_data(self):
         """Загружает данные из базы и обновляет таблицу."""
-        # Очищаем таблицу
-        self.setRowCount(0)
-        # Получаем данные из базы
-        rows = self.db.get_names_all_rows()
-        # Если данных нет, добавляем пустую строку и выходим
-        if not rows:
-            self.add_row_to_end()
+        # Если данных нет, добавляем пустую строку
+        if self.db.get_row_count() == 0:
+            self.db.add_row_to_end()
+        # Строки подгружаются моделью порциями при отображении
+        self.table_model.reload()
+
+    def rowCount(self) -> int:
+        """Количество строк в базе (включая еще не загруженные в модель)"""
+        return self.db.get_row_count()
+
+    def handle_cell_clicked(self, index: QModelIndex) -> None:
+        """Обработчик нажатия на кнопку ячейки"""
+        row_id = self.table_model.row_id(index.row())
+        if row_id is None:
             return
-        # Устанавливаем количество строк в таблице
-        self.setRowCount(len(rows))
-        # Заполняем таблицу данными
-        for row_id, row_number, row_names in rows:
-            self._fill_row(row_id, row_number, row_names)
+        if index.column() == 0:
+            self.delete_row(row_id)
+        elif index.column() in COLUMN_TO_FIELD:
+            self.load_and_parse_file(row_id, COLUMN_TO_FIELD[index.column()])
+
+    def load_and_parse_file(self, row_id: int, field: str) -> None:
+        # Повторное нажатие на ячейку во время импорта отменяет его
+        if self.file_importer.is_importing(row_id, field):
+            self.file_importer.cancel(row_id, field)
+            return
+        # Открываем диалог выбора файла
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "All Files (*)")
+        if not file_path:
+            return
+        # Разбор и сохранение выполняются в пуле потоков
+        self.table_model.set_progress(row_id, field, 0)
+        self.file_importer.start_import(row_id, field, file_path)
+
+    def _on_import_finished(self, row_id: int, field: str, file_name: str) -> None:
+        self.table_model.set_progress(row_id, field, None)
+        row_number = self.db.get_row_number_by_id(row_id)
+        if row_number is None:
+            return
+        # Пока шел импорт, пользователь мог выбрать другую строку - тогда ее график не перерисовываем
+        selected_rows = self.selectedRows()
+        if selected_rows and selected_rows[0] != row_number:
+            if self.rowCount() - 1 == row_number:
+                self.add_row_to_end()
+            return
+        # Вызываем сообщение, что данные обновились
+        self.updated_data_in_row(row_id)
+
+    def _on_import_stopped(self, row_id: int, field: str, *_) -> None:
+        self.table_model.set_progress(row_id, field, None)
+
+    def import_directory(self, directory: str) -> None:
+        """Пакетный импорт директории файлов в новые строки (см. src.batch_import)"""
+        self.file_importer.start_directory_import(directory)
+
+    def _on_directory_import_finished(self, row_ids: list) -> None:
+        if not row_ids:
+            return
+        # Пустая строка, бывшая последней до импорта, остается перед импортированными строками - удаляем ее
+        first_number = self.db.get_row_number_by_id(row_ids[0])
+        previous_id = self.db.get_row_id_by_number(first_number - 1)
+        if previous_id is not None:
+            _, _, previous_name = self.db.get_names_row(previous_id)
+            if not any(getattr(previous_name, field) for field in COLUMN_TO_FIELD.values()):
+                self.file_importer.cancel_row(previous_id)
+                self.db.delete_row(previous_id)
+        # Последняя строка таблицы всегда пустая
+        self.db.add_row_to_end()
+        self.table_model.reload()
+
+    def _on_row_changed(self, row_id: int | None) -> None:
+        """Сброс кэша при изменении данных строки (None - изменены все строки)"""
+        if row_id is None:
+            self.row_cache.clear()
+        else:
+            self.row_cache.invalidate_row(row_id)
+
+    def get_data_row(self, row_id: int) -> tuple[int, int, RowData] | None:
+        """
+        Возвращает данные строки в формате Database.get_data_row, используя кэш строк
+        (если строка как раз загружается заранее в рабочем потоке, ждет окончания этой загрузки)
+        """
+        return self.prefetcher.load(row_id)
 
     def updated_data_in_row(self, row_id: int) -> None:
         # Если это последняя строка, добавляем одну в конец
         if self.rowCount() - 1 == self.db.get_row_number_by_id(row_id):
             self.add_row_to_end()
 
-        row_data = self.db.get_data_row(row_id)
+        row_data = self.get_data_row(row_id)
         self.callback_change_active_row(row_data)
 
     def add_row_to_end(self) -> None:
         """Добавляет новую пустую строку в конец таблицы."""
-        # Увеличиваем количество строк
-        self.setRowCount(self.rowCount() + 1)
         # Создаем новую запись в базе данных и получаем её ID
-        row_id, row_number = self.db.add_row_to_end()
-        # Заполняем строку
-        self._fill_row(row_id, row_number)
+        row_id, _ = self.db.add_row_to_end()
+        # Добавляем строку в модель
+        self.table_model.append_row(row_id)
 
     def delete_row(self, row_id: int) -> None:
         """Удаление строки выбранной в таблице"""
         # Если это последняя строка, добавляем одну в конец, а выбранную удаляем
         if self.rowCount() - 1 == self.db.get_row_number_by_id(row_id):
             self.add_row_to_end()
+        # Отменяем незавершенный импорт файлов строки
+        self.file_importer.cancel_row(row_id)
         # Удаляем строку из таблицы
-        self.removeRow(self.db.get_row_number_by_id(row_id))
+        self.table_model.remove_row(self.db.get_row_number_by_id(row_id))
         self.db.delete_row(row_id)
 
     def handle_selection_changed(self):
@@ -233,12 +371,13 @@ class CustomTableWidget(QTableWidget):
             if selected_rows:
                 row_number = selected_rows[0]
                 # Получаем row_id для строки
-                for row_id, rn, _ in self.db.get_names_all_rows():
-                    if rn == row_number:
-                        row_data = self.db.get_data_row(row_id)
-                        self.callback_change_active_row(row_data)
-                        break
+                row_id = self.db.get_row_id_by_number(row_number)
+                if row_id is not None:
+                    row_data = self.get_data_row(row_id)
+                    self.callback_change_active_row(row_data)
+                    # Соседние строки загружаются заранее, чтобы переход стрелками отрисовывался сразу
+                    self.prefetcher.prefetch(row_number)
 
     def selectedRows(self):
         """Возвращает список индексов выделенных строк."""
-        return [index.row() for index in self.selectionModel().selectedRows()]
\ No newline at end of file
+        return [index.row() for index in self.selectionModel().selectedRows()]
@@ -0,0 +1,80 @@
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database import COLUMN_2_WITH_SUB, Database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # Пути базы относительные: каждая проверка работает в своей директории
+    monkeypatch.chdir(tmp_path)
+    return Database()
+
+
+def _frame(size: int = 100) -> pd.DataFrame:
+    return pd.DataFrame({"frequency": np.arange(size, dtype=np.float64), "gamma": np.linspace(0, 1, size)})
+
+
+def test_set_data_round_trip(db):
+    row_id, _ = db.add_row_to_end()
+    assert db.set_data(row_id, COLUMN_2_WITH_SUB, "spectrum", _frame())
+    assert db.set_data(row_id, COLUMN_2_WITH_SUB, "spectrum", _frame(50))
+    _, _, row_data = db.get_data_row(row_id)
+    pd.testing.assert_frame_equal(row_data.with_substance, _frame(50))
+
+
+def test_set_data_missing_row_or_field(db):
+    row_id, _ = db.add_row_to_end()
+    assert not db.set_data(row_id + 100, COLUMN_2_WITH_SUB, "spectrum", _frame())
+    assert not db.set_data(row_id, "unknown", "spectrum", _frame())
+
+
+def test_set_data_does_not_hold_lock_while_writing(db):
+    row_id, _ = db.add_row_to_end()
+    writing, release = threading.Event(), threading.Event()
+    write = db.storage.write
+
+    def slow_write(*args, **kwargs):
+        writing.set()
+        release.wait(5)
+        write(*args, **kwargs)
+
+    db.storage.write = slow_write
+    writer = threading.Thread(target=db.set_data, args=(row_id, COLUMN_2_WITH_SUB, "spectrum", _frame()))
+    writer.start()
+    try:
+        assert writing.wait(5)
+        # Пока файл записывается, база отвечает другим потокам без ожидания
+        acquired = db._lock.acquire(timeout=1)
+        assert acquired
+        db._lock.release()
+        assert db.get_row_count() == 1
+    finally:
+        # Запись завершается до выхода из проверки, пока рабочая директория еще tmp_path
+        release.set()
+        writer.join()
+    assert db.get_names_row(row_id)[2].with_substance == "spectrum"
+
+
+def _is_memory_mapped(array: np.ndarray) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base if isinstance(array.base, np.ndarray) else None
+    return False
+
+
+def test_mmap_load_does_not_read_plot_arrays(db):
+    row_id, _ = db.add_row_to_end()
+    frame = _frame()
+    frame.loc[:49, "gamma"] = np.nan
+    db.set_data(row_id, COLUMN_2_WITH_SUB, "spectrum", frame)
+    _, _, row_data = db.get_data_row(row_id, mmap=True)
+    series = row_data.plot_with_substance
+    assert _is_memory_mapped(series.frequency) and _is_memory_mapped(series.gamma)
+    # Проверка NaN читает все страницы файла и откладывается до отрисовки
+    assert series._valid is None
+    assert series.valid and series._valid
+    assert not row_data.plot_without_substance.valid
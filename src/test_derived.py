@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from src.derived import difference_spectrum
+from src.line_detection import detect_lines
+
+STEP = 0.06
+START = 1e5
+
+
+def _spectrum(first: int, size: int, gamma) -> pd.DataFrame:
+    frequency = START + np.arange(first, first + size) * STEP
+    return pd.DataFrame({"frequency": frequency, "gamma": gamma(frequency)})
+
+
+def test_difference_on_equal_grids_is_pointwise():
+    with_substance = _spectrum(0, 1000, lambda f: np.sin(f))
+    without_substance = _spectrum(0, 1000, lambda f: np.cos(f))
+    difference = difference_spectrum(with_substance, without_substance)
+    np.testing.assert_array_equal(difference["frequency"], with_substance["frequency"])
+    np.testing.assert_allclose(difference["gamma"], with_substance["gamma"] - without_substance["gamma"])
+
+
+def test_difference_on_shifted_equal_length_grids_is_resampled():
+    # Сетки одинаковой длины, сдвинутые на 3 шага: относительно 1e5 МГц сдвиг ~2e-6, но это разные точки
+    background = lambda f: (f - START) ** 2
+    with_substance = _spectrum(0, 1000, background)
+    without_substance = _spectrum(3, 1000, background)
+    difference = difference_spectrum(with_substance, without_substance)
+    assert len(difference) < 1000
+    assert difference["frequency"].min() >= without_substance["frequency"].min() - 1e-9
+    # Одинаковый фон на общей сетке вычитается почти полностью
+    assert np.max(np.abs(difference["gamma"])) < 1e-3
+
+
+def test_detect_lines_on_shifted_grids_finds_only_real_line():
+    background = lambda f: np.sin((f - START) / 5)
+    line_frequency = START + 500 * STEP
+
+    def with_line(f):
+        return background(f) + 5 / (1 + ((f - line_frequency) / (4 * STEP)) ** 2)
+
+    detected = detect_lines(_spectrum(0, 5000, with_line), _spectrum(3, 5000, background))
+    assert len(detected) == 1
+    assert abs(detected["frequency"].iloc[0] - line_frequency) <= 2 * STEP
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from src.constant import COLUMN_5_LABELED
+from src.database import Database
+from src.export_dataset import NpyAppendWriter, export_dataset
+from src.labeling import label_spectrum, windows_to_frame
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return Database()
+
+
+@pytest.mark.parametrize("dtype, row_shape", [(np.float64, (5,)), (np.bool_, ()), (np.int64, ()), (np.float32, (2, 3))])
+def test_append_writer_output_loads_with_np_load(tmp_path, dtype, row_shape):
+    rng = np.random.default_rng(0)
+    blocks = [rng.normal(size=(size, *row_shape)).astype(dtype) for size in (3, 0, 17, 1)]
+    path = str(tmp_path / "data.npy")
+    with NpyAppendWriter(path, dtype, row_shape) as writer:
+        for block in blocks:
+            writer.append(block)
+
+    expected = np.concatenate(blocks)
+    np.testing.assert_array_equal(np.load(path), expected)
+    loaded = np.load(path, mmap_mode="r")
+    assert loaded.dtype == np.dtype(dtype) and loaded.shape == expected.shape
+
+
+def test_empty_writer_gives_empty_array(tmp_path):
+    path = str(tmp_path / "data.npy")
+    NpyAppendWriter(path, np.float64, (4,)).close()
+    assert np.load(path).shape == (0, 4)
+
+
+def test_append_rejects_other_row_shape(tmp_path):
+    with NpyAppendWriter(str(tmp_path / "data.npy"), np.float64, (4,)) as writer:
+        with pytest.raises(ValueError):
+            writer.append(np.zeros((2, 5)))
+
+
+def _labeled_frame(seed: int, window_width: int):
+    rng = np.random.default_rng(seed)
+    frequency = np.arange(500, dtype=np.float64)
+    return windows_to_frame(label_spectrum(frequency, rng.normal(size=500), rng.uniform(0, 500, 4), window_width))
+
+
+def test_export_dataset(db, tmp_path):
+    frames = {}
+    for seed in range(3):
+        row_id, _ = db.add_row_to_end()
+        frames[row_id] = _labeled_frame(seed, window_width=10)
+        db.set_data(row_id, COLUMN_5_LABELED, "labeled", frames[row_id])
+    # Строка с другой шириной окна пропускается, строка без разметки не рассматривается
+    other_id, _ = db.add_row_to_end()
+    db.set_data(other_id, COLUMN_5_LABELED, "labeled", _labeled_frame(5, window_width=20))
+    db.add_row_to_end()
+
+    output_dir = str(tmp_path / "dataset")
+    report = export_dataset(db, output_dir)
+
+    assert report.exported == list(frames)
+    assert report.skipped == [other_id]
+    gamma = np.load(f"{output_dir}/gamma.npy")
+    label = np.load(f"{output_dir}/label.npy")
+    row_id = np.load(f"{output_dir}/row_id.npy")
+    assert report.windows == len(gamma) == len(label) == len(row_id)
+    for exported_id, frame in frames.items():
+        rows = row_id == exported_id
+        np.testing.assert_array_equal(label[rows], frame["label"].to_numpy())
+        np.testing.assert_array_equal(gamma[rows], frame[[f"gamma_{i}" for i in range(11)]].to_numpy())
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.inference import (
+    InferenceParams, LinearWindowModel, _normalize, infer_lines, load_model, sliding_windows, window_scores
+)
+
+STEP = 0.06
+
+
+def _spectrum_with_lines(points: int = 40000, noise: float = 0.01) -> tuple[pd.DataFrame, np.ndarray]:
+    rng = np.random.default_rng(0)
+    x = np.arange(points)
+    centers = np.arange(1000, points, 2000)
+    gamma = 1 + 0.1 * np.sin(x / points * 6) + rng.normal(0, noise, points)
+    gamma += sum(0.3 / (1 + ((x - center) / 3) ** 2) for center in centers)
+    return pd.DataFrame({"frequency": 1e5 + x * STEP, "gamma": gamma}), centers
+
+
+def test_sliding_windows_are_edge_padded_views():
+    gamma = np.arange(10, dtype=np.float64)
+    windows = sliding_windows(gamma, 5, stride=3)
+    np.testing.assert_array_equal(windows[0], [0, 0, 0, 1, 2])
+    np.testing.assert_array_equal(windows[1], [1, 2, 3, 4, 5])
+    assert len(windows) == 4
+
+
+def test_logits_match_explicit_normalization():
+    rng = np.random.default_rng(1)
+    model = LinearWindowModel(weights=rng.normal(size=21), bias=0.3)
+    windows = rng.normal(size=(100, 21)) * 5 + 3
+    expected = 1 / (1 + np.exp(-(_normalize(windows) @ model.weights + model.bias)))
+    np.testing.assert_allclose(model.predict(windows), expected, rtol=1e-10)
+
+
+def test_window_scores_do_not_depend_on_batch_size():
+    spectrum, _ = _spectrum_with_lines(5000)
+    gamma = spectrum["gamma"].to_numpy()
+    model = LinearWindowModel.default(50)
+    _, single = window_scores(gamma, model, InferenceParams(batch_size=len(gamma)))
+    _, batched = window_scores(gamma, model, InferenceParams(batch_size=37))
+    np.testing.assert_array_equal(single, batched)
+
+
+@pytest.mark.parametrize("window_width", [20, 50, 100])
+def test_default_model_finds_lines_for_any_window_width(window_width):
+    # Порог модели-шаблона достижим и для узких окон
+    spectrum, centers = _spectrum_with_lines()
+    found = infer_lines(spectrum, LinearWindowModel.default(window_width))
+    assert len(found) == len(centers)
+    np.testing.assert_allclose(np.sort(found["frequency"]), 1e5 + centers * STEP, atol=5 * STEP)
+    assert found["src"].all()
+
+
+def test_model_save_load_round_trip(tmp_path):
+    model = LinearWindowModel.default(30)
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = load_model(path)
+    np.testing.assert_array_equal(loaded.weights, model.weights)
+    assert loaded.bias == model.bias
+    assert loaded.fingerprint() == model.fingerprint()
+
+
+def test_fit_separates_lines_from_noise():
+    rng = np.random.default_rng(2)
+    x = np.arange(-10, 11)
+    line = 1 / (1 + (x / 2) ** 2)
+    positive = line + rng.normal(0, 0.2, (500, len(x)))
+    negative = rng.normal(0, 0.2, (500, len(x)))
+    gamma = np.vstack([positive, negative])
+    label = np.concatenate([np.ones(500), np.zeros(500)])
+    model = LinearWindowModel.fit(gamma, label, batch_size=128)
+    accuracy = np.mean((model.predict(gamma) > 0.5) == label)
+    assert accuracy > 0.95
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.labeling import label_spectrum, nearest_indices, windows_from_frame, windows_to_frame
+
+
+def _original_labeling(frequency: list, gamma: list, line_frequency: list, window_width: int) -> list:
+    """Исходный алгоритм разметки из GuiProgram.mark_data (списки вместо pandas, без сохранения в файл)"""
+    labeled_data = []
+    half_window = window_width // 2
+    size = len(frequency)
+
+    def segment(values, idx):
+        start = max(0, idx - half_window)
+        end = min(size, idx + half_window + 1)
+        if start == 0:
+            return [values[0]] * (half_window - idx) + values[:end]
+        if end == size:
+            return values[start:] + [values[-1]] * (half_window - (size - idx - 1))
+        return values[start:end]
+
+    point_indices = [min(range(size), key=lambda i: abs(frequency[i] - f)) for f in line_frequency]
+    for idx in point_indices:
+        labeled_data.append((segment(frequency, idx), segment(gamma, idx), True, idx))
+
+    used_indices = set()
+    for idx in point_indices:
+        used_indices.update(range(max(0, idx - half_window), min(size, idx + half_window + 1)))
+
+    unmarked_count = len(labeled_data)
+    i = 0
+    while len(labeled_data) < unmarked_count * 2 and i < size:
+        if i not in used_indices:
+            start = max(0, i - half_window)
+            end = min(size, i + half_window + 1)
+            if not any(start <= idx < end for idx in used_indices):
+                labeled_data.append((segment(frequency, i), segment(gamma, i), False, i))
+                used_indices.update(range(start, end))
+        i += 1
+    return labeled_data
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_label_spectrum_matches_original_algorithm(seed):
+    rng = np.random.default_rng(seed)
+    size = int(rng.integers(60, 400))
+    window_width = int(rng.integers(2, 30))
+    frequency = np.cumsum(rng.uniform(0.5, 1.5, size))
+    gamma = rng.normal(size=size)
+    # Точки поглощения в том числе у краев спектра и за его пределами
+    line_frequency = rng.uniform(frequency[0] - 5, frequency[-1] + 5, int(rng.integers(1, 8)))
+
+    expected = _original_labeling(frequency.tolist(), gamma.tolist(), line_frequency.tolist(), window_width)
+    windows = label_spectrum(frequency, gamma, line_frequency, window_width)
+
+    assert len(windows) == len(expected)
+    assert windows.label.tolist() == [label for _, _, label, _ in expected]
+    assert windows.center.tolist() == [center for _, _, _, center in expected]
+    np.testing.assert_array_equal(windows.frequency, np.array([segment for segment, _, _, _ in expected]))
+    np.testing.assert_array_equal(windows.gamma, np.array([segment for _, segment, _, _ in expected]))
+
+
+def test_line_index_marks_absorption_points_inside_windows():
+    frequency = np.arange(100, dtype=np.float64)
+    windows = label_spectrum(frequency, np.zeros(100), np.array([10.0, 13.0]), window_width=10)
+    positive = windows.positive
+    np.testing.assert_array_equal(positive.center, [10, 13])
+    # Окно с центром 10 содержит обе точки: в центре и на 3 точки правее
+    np.testing.assert_array_equal(np.flatnonzero(positive.line_index[0]), [5, 8])
+    assert not windows.negative.line_index.any()
+
+
+def test_empty_lines_give_no_windows():
+    windows = label_spectrum(np.arange(10.0), np.zeros(10), np.array([np.nan]), window_width=4)
+    assert len(windows) == 0
+    assert windows.width == 5
+
+
+def test_nearest_indices_prefers_left_point_on_tie():
+    frequency = np.array([0.0, 1.0, 2.0])
+    np.testing.assert_array_equal(nearest_indices(frequency, np.array([-1.0, 0.5, 1.6, 9.0])), [0, 0, 2, 2])
+
+
+def test_frame_round_trip():
+    rng = np.random.default_rng(0)
+    frequency = np.arange(200, dtype=np.float64)
+    windows = label_spectrum(frequency, rng.normal(size=200), np.array([20.0, 120.0]), window_width=8)
+    restored = windows_from_frame(windows_to_frame(windows))
+    np.testing.assert_array_equal(restored.gamma, windows.gamma)
+    np.testing.assert_array_equal(restored.line_index, windows.line_index)
+    np.testing.assert_array_equal(restored.label, windows.label)
+    np.testing.assert_array_equal(restored.center, windows.center)
+    np.testing.assert_array_equal(restored.frequency[:, 4], windows.frequency[:, 4])
+    assert isinstance(windows_to_frame(windows), pd.DataFrame)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from src.line_detection import DetectionParams, detect_lines, detect_peaks, merge_detected_lines, moving_average
+
+SIZE: int = 6000
+LINE_POSITIONS = np.arange(300, SIZE - 300, 400)
+
+
+def _background(index: np.ndarray) -> np.ndarray:
+    # Фон меняется медленно по сравнению с окном базовой линии и не имеет наклона у краев спектра
+    return 1.0 + 0.05 * np.cos(np.pi * index / SIZE)
+
+
+def _lines(index: np.ndarray, height: float = 0.2, width: float = 3.0) -> np.ndarray:
+    return height * np.exp(-0.5 * ((index[:, None] - LINE_POSITIONS[None, :]) / width) ** 2).sum(axis=1)
+
+
+def _spectrum(gamma: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({"frequency": 1e5 + 0.05 * np.arange(len(gamma)), "gamma": gamma})
+
+
+def test_moving_average_matches_convolution():
+    values = np.random.default_rng(0).normal(size=200)
+    padded = np.pad(values, 5, mode="edge")
+    np.testing.assert_allclose(moving_average(values, 11), np.convolve(padded, np.ones(11) / 11, mode="valid"))
+
+
+def test_detects_known_lines():
+    index = np.arange(SIZE, dtype=np.float64)
+    noise = np.random.default_rng(1).normal(scale=0.005, size=SIZE)
+    peaks = detect_peaks(_background(index) + _lines(index) + noise)
+    np.testing.assert_allclose(peaks, LINE_POSITIONS, atol=2)
+
+
+def test_flat_and_noise_only_spectra_have_no_lines():
+    assert len(detect_peaks(np.full(SIZE, 3.0))) == 0
+    noise = np.random.default_rng(2).normal(scale=0.005, size=SIZE)
+    assert len(detect_peaks(_background(np.arange(SIZE, dtype=np.float64)) + noise)) == 0
+    assert len(detect_peaks(np.full(SIZE, np.nan))) == 0
+
+
+def test_detects_lines_on_difference_with_substance_free_spectrum():
+    index = np.arange(SIZE, dtype=np.float64)
+    rng = np.random.default_rng(3)
+    # Фон содержит собственные узкие пики, которые есть в обоих спектрах и не являются линиями вещества
+    background = _background(index) + 0.2 * np.exp(-0.5 * ((index - 3100) / 3.0) ** 2)
+    with_substance = _spectrum(background + _lines(index) + rng.normal(scale=0.002, size=SIZE))
+    without_substance = _spectrum(background + rng.normal(scale=0.002, size=SIZE))
+
+    lines = detect_lines(with_substance, without_substance, DetectionParams(min_distance=20))
+
+    expected = with_substance["frequency"].to_numpy()[LINE_POSITIONS]
+    np.testing.assert_allclose(lines["frequency"].to_numpy(), expected, atol=0.1)
+    assert lines["src"].all()
+    # Гамма линии берется из спектра с веществом
+    np.testing.assert_allclose(lines["gamma"].to_numpy(), with_substance["gamma"].to_numpy()[LINE_POSITIONS], atol=0.05)
+
+
+def test_merge_keeps_manual_points():
+    existing = pd.DataFrame({"frequency": [1.0, 5.0, 3.0], "gamma": [0.1, 0.5, 0.3], "src": [False, True, False]})
+    detected = pd.DataFrame({"frequency": [4.0], "gamma": [0.4], "src": [True]})
+    merged = merge_detected_lines(existing, detected)
+    assert merged["frequency"].tolist() == [1.0, 3.0, 4.0]
+    assert merged["src"].tolist() == [False, False, True]
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.matched_filter import (
+    LINE_SHAPES, MatchedFilterParams, find_line_candidates, line_template, match_templates, template_bank
+)
+from src.peaks import robust_noise
+
+STEP = 0.06
+
+
+def _spectrum(gamma: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({"frequency": 1e5 + np.arange(len(gamma)) * STEP, "gamma": gamma})
+
+
+@pytest.mark.parametrize("shape", LINE_SHAPES)
+def test_line_template_is_zero_mean_unit_norm(shape):
+    template = line_template(shape, 4.0)
+    assert len(template) % 2 == 1
+    assert abs(template.mean()) < 1e-12
+    assert np.linalg.norm(template) == pytest.approx(1.0)
+
+
+def test_match_templates_matches_direct_correlation():
+    rng = np.random.default_rng(0)
+    signal = rng.normal(size=3000)
+    bank = template_bank(MatchedFilterParams(widths=(2.0, 8.0)))
+    score, best = match_templates(signal, bank)
+    pad = max(len(template) for _, _, template in bank) // 2
+    padded = np.pad(signal, pad, mode="edge")
+    expected = []
+    for _, _, template in bank:
+        response = np.correlate(padded, template, mode="same")[pad:pad + len(signal)]
+        expected.append(response / robust_noise(response))
+    expected = np.array(expected)
+    np.testing.assert_allclose(score, expected.max(axis=0), atol=1e-9)
+    np.testing.assert_array_equal(best, expected.argmax(axis=0))
+
+
+@pytest.mark.parametrize("level", [0.0, 1.0, 1e3])
+def test_flat_spectrum_has_no_candidates(level):
+    # MAD отклика равно нулю, деление ошибок округления БПФ на него давало ложные кандидаты
+    assert find_line_candidates(_spectrum(np.full(5000, level))).empty
+
+
+def test_noiseless_lines_are_found():
+    x = np.arange(5000)
+    centers = [700, 2000, 3500]
+    gamma = 1.0 + sum(1 / (1 + ((x - center) / 5) ** 2) for center in centers)
+    candidates = find_line_candidates(_spectrum(gamma))
+    np.testing.assert_allclose(np.sort(candidates["frequency"]), 1e5 + np.array(centers) * STEP, atol=2 * STEP)
+
+
+def test_noisy_lines_are_found_with_width():
+    rng = np.random.default_rng(1)
+    x = np.arange(20000)
+    centers = np.arange(1000, 20000, 2000)
+    gamma = rng.normal(scale=0.05, size=len(x)) + sum(1 / (1 + ((x - center) / 8) ** 2) for center in centers)
+    candidates = find_line_candidates(_spectrum(gamma))
+    assert len(candidates) == len(centers)
+    np.testing.assert_allclose(np.sort(candidates["frequency"]), 1e5 + centers * STEP, atol=3 * STEP)
+    assert np.all(candidates["score"] > MatchedFilterParams().threshold)
+    assert np.all((candidates["width"] >= 4 * STEP) & (candidates["width"] <= 16 * STEP))
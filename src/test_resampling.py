@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.resampling import median_step, resample_frames, resampled_file_name, uniform_grid
+
+
+def test_median_step_ignores_order_nan_and_duplicates():
+    frequency = np.array([3.0, 1.0, np.nan, 2.0, 2.0, 5.0])
+    assert median_step(frequency) == 1.0
+    with pytest.raises(ValueError):
+        median_step(np.array([1.0, 1.0, np.nan]))
+
+
+def test_uniform_grid_covers_common_range_with_step_multiples():
+    grid = uniform_grid([np.array([0.95, 3.0]), np.array([0.0, 2.71])], step=0.5)
+    np.testing.assert_allclose(grid, [1.0, 1.5, 2.0, 2.5])
+    # Пустые спектры не ограничивают диапазон
+    np.testing.assert_allclose(uniform_grid([np.array([0.0, 1.0]), np.empty(0)], step=0.5), [0.0, 0.5, 1.0])
+    assert len(uniform_grid([], step=0.5)) == 0
+
+
+def test_uniform_grid_errors():
+    with pytest.raises(ValueError):
+        uniform_grid([np.array([0.0, 1.0])], step=0.0)
+    with pytest.raises(ValueError):
+        uniform_grid([np.array([0.0, 1.0]), np.array([2.0, 3.0])], step=0.1)
+
+
+def test_resample_frames_interpolates_onto_common_grid():
+    rng = np.random.default_rng(0)
+    with_frequency = np.sort(rng.uniform(0, 10, 500))
+    without_frequency = np.sort(rng.uniform(1, 11, 400))[::-1]
+    frames = {
+        "with": pd.DataFrame({"frequency": with_frequency, "gamma": 2 * with_frequency + 1}),
+        "without": pd.DataFrame({"frequency": without_frequency, "gamma": -without_frequency}),
+    }
+    frames["with"].loc[10, "gamma"] = np.nan
+
+    resampled = resample_frames(frames, step=0.25)
+
+    assert list(resampled) == ["with", "without"]
+    grid = resampled["with"]["frequency"].to_numpy()
+    np.testing.assert_array_equal(resampled["without"]["frequency"].to_numpy(), grid)
+    assert grid[0] >= max(with_frequency.min(), without_frequency.min())
+    assert grid[-1] <= min(with_frequency.max(), without_frequency.max())
+    # Линейные функции интерполируются точно, NaN и обратный порядок точек не мешают
+    np.testing.assert_allclose(resampled["with"]["gamma"].to_numpy(), 2 * grid + 1)
+    np.testing.assert_allclose(resampled["without"]["gamma"].to_numpy(), -grid)
+    # Исходные DataFrame не изменяются
+    assert np.isnan(frames["with"].loc[10, "gamma"])
+    np.testing.assert_array_equal(frames["without"]["frequency"].to_numpy(), without_frequency)
+
+
+def test_resampled_file_name_replaces_previous_suffix():
+    assert resampled_file_name("spectrum", 0.06) == "spectrum_interp0.06"
+    assert resampled_file_name("spectrum_interp0.06", 0.1) == "spectrum_interp0.1"
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from src.row_cache import RowDataCache, row_data_size
+from src.row_data import RowData, RowName
+
+
+def _row_data(size: int) -> RowData:
+    frequency = np.arange(size, dtype=np.float64)
+    return RowData(with_substance=pd.DataFrame({"frequency": frequency, "gamma": np.zeros(size)}))
+
+
+def _key(row_id: int, file_name: str = "with") -> tuple:
+    return RowDataCache.make_key(row_id, RowName(with_substance=file_name))
+
+
+def test_evicts_least_recently_used_rows_over_budget():
+    size = row_data_size(_row_data(1000))
+    cache = RowDataCache(max_bytes=int(2.5 * size))
+    for row_id in range(3):
+        cache.put(_key(row_id), _row_data(1000))
+        if row_id == 1:
+            # Строка 0 использована позже строки 1 и не вытесняется
+            assert cache.get(_key(0)) is not None
+    assert cache.get(_key(0)) is not None
+    assert cache.get(_key(1)) is None
+    assert cache.get(_key(2)) is not None
+    assert cache.current_bytes == 2 * size <= cache.max_bytes
+
+
+def test_row_larger_than_budget_is_not_cached():
+    cache = RowDataCache(max_bytes=100)
+    cache.put(_key(0), _row_data(1000))
+    assert cache.get(_key(0)) is None
+    assert cache.current_bytes == 0
+
+
+def test_other_file_name_misses():
+    cache = RowDataCache()
+    cache.put(_key(0, "old"), _row_data(10))
+    assert cache.get(_key(0, "new")) is None
+    assert cache.get(_key(0, "old")) is not None
+
+
+def test_invalidate_row_removes_only_its_entries():
+    cache = RowDataCache()
+    cache.put(_key(0, "a"), _row_data(10))
+    cache.put(_key(0, "b"), _row_data(10))
+    cache.put(_key(1), _row_data(10))
+    cache.invalidate_row(0)
+    assert cache.get(_key(0, "a")) is None and cache.get(_key(0, "b")) is None
+    assert cache.get(_key(1)) is not None
+    assert cache.current_bytes == row_data_size(_row_data(10))
+
+
+def test_put_skips_data_read_before_invalidation():
+    cache = RowDataCache()
+    version = cache.row_version(0)
+    other_version = cache.row_version(1)
+    cache.invalidate_row(0)
+    cache.put(_key(0), _row_data(10), version=version)
+    cache.put(_key(1), _row_data(10), version=other_version)
+    assert cache.get(_key(0)) is None
+    assert cache.get(_key(1)) is not None
+
+    version = cache.row_version(1)
+    cache.clear()
+    cache.put(_key(1), _row_data(10), version=version)
+    assert cache.get(_key(1)) is None
+    cache.put(_key(1), _row_data(10), version=cache.row_version(1))
+    assert cache.get(_key(1)) is not None
+
+
+def test_stats():
+    cache = RowDataCache()
+    cache.put(_key(0), _row_data(10))
+    cache.get(_key(0))
+    cache.get(_key(1))
+    cache.get(_key(1), record_stats=False)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["items"]) == (1, 1, 1)
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from src.row_index import RowIndex
+
+
+def _check(index: RowIndex, expected: list[int]) -> None:
+    assert len(index) == len(expected)
+    assert index.row_ids() == expected
+    for row_number, row_id in enumerate(expected):
+        assert index.get_row_id(row_number) == row_id
+        assert index.get_row_number(row_id) == row_number
+    assert index.get_row_id(len(expected)) is None
+    assert index.get_row_id(-1) is None
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_append_remove_fuzz_matches_list(seed):
+    rng = random.Random(seed)
+    initial = list(range(rng.randint(0, 20)))
+    index = RowIndex(initial)
+    expected = list(initial)
+    next_id = len(initial)
+    for _ in range(500):
+        if expected and rng.random() < 0.45:
+            row_id = rng.choice(expected)
+            assert index.remove(row_id) == expected.index(row_id)
+            expected.remove(row_id)
+        else:
+            assert index.append(next_id) == len(expected)
+            expected.append(next_id)
+            next_id += 1
+        if rng.random() < 0.1:
+            _check(index, expected)
+    _check(index, expected)
+
+
+def test_remove_unknown_row():
+    index = RowIndex([5, 7])
+    assert index.remove(6) is None
+    assert index.remove(5) == 0
+    assert index.remove(5) is None
+    assert index.get_row_number(5) is None
+    _check(index, [7])
+
+
+def test_clear_and_reuse():
+    index = RowIndex([1, 2, 3])
+    index.clear()
+    _check(index, [])
+    assert index.append(4) == 0
+    _check(index, [4])
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.constant import COLUMN_2_WITH_SUB, COLUMN_4_ABSORPTION
+from src.database import Database
+from src.label_all import label_all_rows, rows_to_label
+from src.labeling import windows_from_frame
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return Database()
+
+
+def _spectrum(size: int = 2000) -> pd.DataFrame:
+    frequency = np.arange(size, dtype=np.float64)
+    return pd.DataFrame({"frequency": frequency, "gamma": np.sin(frequency / 50)})
+
+
+def _lines(*frequency: float) -> pd.DataFrame:
+    return pd.DataFrame({"frequency": list(frequency), "gamma": [0.0] * len(frequency)})
+
+
+def test_label_all_rows_stores_labeled_windows(db):
+    row_id, _ = db.add_row_to_end()
+    db.set_data(row_id, COLUMN_2_WITH_SUB, "with", _spectrum())
+    db.set_data(row_id, COLUMN_4_ABSORPTION, "lines", _lines(500.0, 1500.0))
+    # Строка без линий поглощения размечать нечем
+    without_lines_id, _ = db.add_row_to_end()
+    db.set_data(without_lines_id, COLUMN_2_WITH_SUB, "with", _spectrum())
+
+    assert set(rows_to_label(db, window_width=20)) == {row_id}
+    report = label_all_rows(db, window_width=20, workers=1)
+    assert report.updated == [row_id]
+
+    windows = windows_from_frame(db.get_data_row(row_id)[2].labeled_data)
+    assert windows.width == 21
+    assert windows.label.tolist() == [True, True, False, False]
+    assert windows.center[:2].tolist() == [500, 1500]
+    assert set(rows_to_label(db, window_width=20)) == set()
+    # Другая ширина окна - строку нужно разметить заново
+    assert set(rows_to_label(db, window_width=30)) == {row_id}
+
+
+def test_only_rows_with_changed_inputs_are_labeled_again(db):
+    row_ids = []
+    for _ in range(2):
+        row_id, _ = db.add_row_to_end()
+        db.set_data(row_id, COLUMN_2_WITH_SUB, "with", _spectrum())
+        db.set_data(row_id, COLUMN_4_ABSORPTION, "lines", _lines(500.0))
+        row_ids.append(row_id)
+    label_all_rows(db, window_width=20, workers=1)
+    assert set(rows_to_label(db, window_width=20)) == set()
+
+    # Те же данные под другим именем файла не меняют хэш входных данных
+    db.set_data(row_ids[0], COLUMN_4_ABSORPTION, "lines_copy", _lines(500.0))
+    db.set_data(row_ids[1], COLUMN_4_ABSORPTION, "lines", _lines(700.0))
+    assert set(rows_to_label(db, window_width=20)) == {row_ids[1]}
+    report = label_all_rows(db, window_width=20, workers=1)
+    assert report.updated == [row_ids[1]]
+    assert set(rows_to_label(db, window_width=20)) == set()
+
+
+def test_rows_without_updates_are_not_scheduled_again(db):
+    labeled_id, _ = db.add_row_to_end()
+    db.set_data(labeled_id, COLUMN_2_WITH_SUB, "with", _spectrum())
+    db.set_data(labeled_id, COLUMN_4_ABSORPTION, "lines", pd.DataFrame({"frequency": [500.0], "gamma": [0.0]}))
+    # Линии поглощения есть, но пустые: разметка строки не дает обновлений
+    empty_id, _ = db.add_row_to_end()
+    db.set_data(empty_id, COLUMN_2_WITH_SUB, "with", _spectrum())
+    db.set_data(empty_id, COLUMN_4_ABSORPTION, "lines", pd.DataFrame({"frequency": [], "gamma": []}))
+
+    assert set(rows_to_label(db, window_width=20)) == {labeled_id, empty_id}
+    report = label_all_rows(db, window_width=20, workers=1)
+    assert report.updated == [labeled_id]
+    assert report.skipped == [empty_id]
+    assert rows_to_label(db, window_width=20) == {}
+    # Новые данные строки снова делают ее кандидатом на разметку
+    db.set_data(empty_id, COLUMN_4_ABSORPTION, "lines", pd.DataFrame({"frequency": [700.0], "gamma": [0.0]}))
+    assert set(rows_to_label(db, window_width=20)) == {empty_id}
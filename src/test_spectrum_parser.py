@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from src.spectrum_parser import ParseCancelled, _parser_all_data, parse_spectrum_file
+
+
+def _spectrometer_text(size: int, seed: int = 0, tail: str = "*\nтрейлер 1 2 3\n") -> str:
+    rng = np.random.default_rng(seed)
+    lines = ["заголовок файла спектрометра"]
+    frequencies = (np.cumsum(rng.uniform(0.01, 0.1, size)) + 1e5).tolist()
+    for i, (frequency, gamma) in enumerate(zip(frequencies, rng.normal(size=size).tolist())):
+        lines.append(f"{i} {frequency!r} 0.0 1 {gamma!r} 7")
+    return "\n".join(lines) + "\n" + tail
+
+
+@pytest.mark.parametrize("chunk_bytes", [7, 64, 1000, 16 * 1024 * 1024])
+@pytest.mark.parametrize("tail", ["*\nтрейлер 1 2 3\n", "", "*"])
+def test_matches_line_by_line_parser(tmp_path, chunk_bytes, tail):
+    text = _spectrometer_text(300, tail=tail)
+    path = tmp_path / "spectrum.csv"
+    path.write_text(text)
+
+    expected_frequency, expected_gamma = _parser_all_data(text.splitlines())
+    frequency, gamma = parse_spectrum_file(str(path), chunk_bytes=chunk_bytes)
+
+    assert frequency.dtype == np.float64 and gamma.dtype == np.float64
+    np.testing.assert_array_equal(frequency, expected_frequency)
+    np.testing.assert_array_equal(gamma, expected_gamma)
+
+
+def test_hash_is_not_a_comment(tmp_path):
+    # "#" в начале строки или между столбцами - обычный символ, как в построчном разборе
+    text = "заголовок\n0 1.5 x y 2.5\n# 3.5 a b 4.5 # c\n5 6.5 7 8 9.5 10 11\n*\n"
+    path = tmp_path / "spectrum.csv"
+    path.write_text(text)
+    expected_frequency, expected_gamma = _parser_all_data(text.splitlines())
+    frequency, gamma = parse_spectrum_file(str(path), chunk_bytes=16)
+    np.testing.assert_array_equal(frequency, expected_frequency)
+    np.testing.assert_array_equal(gamma, expected_gamma)
+    assert frequency.tolist() == [1.5, 3.5, 6.5]
+
+
+def test_blank_lines_are_skipped(tmp_path):
+    text = _spectrometer_text(50)
+    lines = text.splitlines()
+    with_blank_lines = "\n".join(lines[:10] + ["", "   "] + lines[10:]) + "\n"
+    path = tmp_path / "spectrum.csv"
+    path.write_text(with_blank_lines)
+    # Построчный разбор на пустой строке падает, поэтому сравнение - с файлом без пустых строк
+    with pytest.raises(IndexError):
+        _parser_all_data(with_blank_lines.splitlines())
+    expected_frequency, expected_gamma = _parser_all_data(lines)
+    frequency, gamma = parse_spectrum_file(str(path), chunk_bytes=64)
+    np.testing.assert_array_equal(frequency, expected_frequency)
+    np.testing.assert_array_equal(gamma, expected_gamma)
+
+
+def test_header_only_file(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text("заголовок\n*\n")
+    frequency, gamma = parse_spectrum_file(str(path))
+    assert len(frequency) == 0 and len(gamma) == 0
+
+
+def test_progress_reaches_file_size(tmp_path):
+    path = tmp_path / "spectrum.csv"
+    path.write_text(_spectrometer_text(200))
+    progress = []
+    parse_spectrum_file(
+        str(path), chunk_bytes=500, progress_callback=lambda done, total: progress.append((done, total))
+    )
+    assert progress[-1][0] == progress[-1][1]
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+
+def test_cancel(tmp_path):
+    path = tmp_path / "spectrum.csv"
+    path.write_text(_spectrometer_text(200))
+    with pytest.raises(ParseCancelled):
+        parse_spectrum_file(str(path), chunk_bytes=500, is_cancelled=lambda: True)
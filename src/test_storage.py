@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.storage import STORAGE_FORMATS, NpyStorage, Storage, get_storage
+
+
+@pytest.fixture(params=sorted(STORAGE_FORMATS))
+def storage(request) -> Storage:
+    return get_storage(request.param)
+
+
+def _round_trip(storage: Storage, tmp_path, data: pd.DataFrame, mmap: bool = False) -> pd.DataFrame:
+    storage.write(str(tmp_path), "field", data)
+    return storage.read(str(tmp_path), "field", mmap=mmap)
+
+
+def test_storage_is_abstract():
+    with pytest.raises(TypeError):
+        Storage()
+
+
+def test_numeric_round_trip(storage, tmp_path):
+    data = pd.DataFrame({
+        "frequency": np.linspace(1e5, 1e5 + 10, 101),
+        "gamma": np.random.default_rng(0).normal(size=101)
+    })
+    pd.testing.assert_frame_equal(_round_trip(storage, tmp_path, data), data, check_exact=False, rtol=1e-15)
+
+
+def test_src_mask_survives_round_trip(storage, tmp_path):
+    # Столбец src с пропусками - объектный; после перезагрузки маски src == True/False не должны меняться
+    src = np.array([True, False, np.nan, True], dtype=object)
+    data = pd.DataFrame({"frequency": [1.0, 2.0, 3.0, 4.0], "gamma": [0.1, 0.2, 0.3, 0.4], "src": src})
+    loaded = _round_trip(storage, tmp_path, data)
+    np.testing.assert_array_equal(loaded["src"].to_numpy() == True, src == True)  # noqa: E712
+    np.testing.assert_array_equal(loaded["src"].to_numpy() == False, src == False)  # noqa: E712
+
+
+def test_bool_columns_round_trip(storage, tmp_path):
+    data = pd.DataFrame({"src": np.array([True, False, True]), "flag": np.array([False, True, True], dtype=object)})
+    loaded = _round_trip(storage, tmp_path, data)
+    assert loaded["src"].dtype == bool
+    assert loaded["flag"].dtype == bool
+    np.testing.assert_array_equal(loaded["flag"], [False, True, True])
+
+
+def test_npy_string_column_round_trip(tmp_path):
+    data = pd.DataFrame({"name": np.array(["a", "bc"], dtype=object)})
+    assert list(_round_trip(NpyStorage(), tmp_path, data)["name"]) == ["a", "bc"]
+
+
+def test_string_column_with_missing_values_round_trip(storage, tmp_path):
+    # CSV сохраняет такие столбцы, поэтому и бинарный формат не должен отказывать
+    data = pd.DataFrame({"name": np.array(["a", None, "bc", np.nan], dtype=object), "gamma": [1.0, 2.0, 3.0, 4.0]})
+    loaded = _round_trip(storage, tmp_path, data)
+    assert loaded["name"].tolist()[0::2] == ["a", "bc"]
+    assert loaded["name"].isna().tolist() == [False, True, False, True]
+    assert loaded["gamma"].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_npy_missing_mask_is_replaced_on_rewrite(tmp_path):
+    storage = NpyStorage()
+    _round_trip(storage, tmp_path, pd.DataFrame({"name": np.array([None, "a"], dtype=object)}))
+    loaded = _round_trip(storage, tmp_path, pd.DataFrame({"name": np.array(["b", "c"], dtype=object)}))
+    assert loaded["name"].tolist() == ["b", "c"]
+
+
+def test_npy_mmap_read_is_read_only(tmp_path):
+    data = pd.DataFrame({"gamma": np.arange(10, dtype=np.float64)})
+    loaded = _round_trip(NpyStorage(), tmp_path, data, mmap=True)
+    assert not loaded["gamma"].to_numpy().flags.writeable
+    np.testing.assert_array_equal(loaded["gamma"], data["gamma"])
+
+
+def test_replace_swaps_data(storage, tmp_path):
+    storage.write(str(tmp_path), "field", pd.DataFrame({"gamma": [1.0]}))
+    storage.write(str(tmp_path), ".tmp", pd.DataFrame({"gamma": [2.0]}))
+    storage.replace(str(tmp_path), ".tmp", "field")
+    assert not storage.exists(str(tmp_path), ".tmp")
+    assert storage.read(str(tmp_path), "field")["gamma"].tolist() == [2.0]